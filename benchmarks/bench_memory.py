@@ -0,0 +1,116 @@
+from glob import glob
+from os import sep
+from os.path import abspath, dirname
+from tempfile import TemporaryDirectory
+import tracemalloc
+import argparse
+import gc
+import sys
+import time
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import callgrapher
+from corpus import generate_corpus
+
+
+def run(fortran_files, root_callers=None):
+    # compare the memory held by the results of the parsing with that held
+    # by their compact representation, and the time taken to build the
+    # call graphs (checking that they are the same) from either
+    _sep = '__'
+
+    tracemalloc.start()
+    parsed = callgrapher.parse_fortran_files(fortran_files, _sep)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+
+    # once the results of the parsing are let go of (since the compact
+    # representation shares the strings of the names with them)
+    model = callgrapher.compact_parse_results(*parsed[:4], _sep, parsed[4])
+    del parsed
+    gc.collect()
+    compact_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    parsed = callgrapher.parse_fortran_files(fortran_files, _sep)
+
+    print(f"{len(fortran_files)} files, {len(model['names'])} symbols, "
+          f"{len(model['calls'][1])} distinct calls")
+    print(f"parsed:  {size / 2 ** 20:8.1f} MiB")
+    print(f"compact: {compact_size / 2 ** 20:8.1f} MiB "
+          f"(reduction {size / compact_size:.1f}x)")
+
+    if not root_callers:
+        root_callers = [name for name, kind in parsed[2].items()
+                        if kind == 'PROGRAM']
+
+    elapsed = compact_elapsed = 0
+    for root_caller in root_callers:
+        start = time.perf_counter()
+        graph, nodes, ext_caller_callers = callgrapher.build_call_graph(
+            root_caller, *parsed[:3], _sep
+        )
+        elapsed += time.perf_counter() - start
+
+        start = time.perf_counter()
+        compact_graph, compact_nodes, compact_ext_caller_callers = (
+            callgrapher.build_call_graph_compact(root_caller, model)
+        )
+        compact_elapsed += time.perf_counter() - start
+
+        names = model['names']
+        if [sorted(map(repr, statements))
+                for statements in [graph['base'], *graph['clusters'].values()]] != [
+                sorted(map(repr, statements))
+                for statements in [compact_graph['base'],
+                                   *compact_graph['clusters'].values()]]:
+            raise RuntimeError(f"call graph of {root_caller} differs")
+        if sorted(nodes) != sorted(names[node] for node in compact_nodes):
+            raise RuntimeError(f"nodes of {root_caller} differ")
+
+    print(f"call graphs: {elapsed:.3f} s, compact: {compact_elapsed:.3f} s "
+          f"(speedup {elapsed / compact_elapsed:.2f}x)")
+    print("call graphs identical (but for the order of nodes and edges)")
+
+
+if __name__ == '__main__':
+    # terminal interface
+    parser = argparse.ArgumentParser(
+        description="compare the memory held by the results of the parsing "
+                    "with that held by their compact representation"
+    )
+
+    parser.add_argument('root_callers',
+                        type=str,
+                        nargs='*',
+                        help="name(s) of the caller(s) to use as root to "
+                             "call graphs - default to all programs")
+    parser.add_argument('-s', '--source_dir',
+                        type=str,
+                        help="path to directory containing Fortran files to "
+                             "parse - default to a synthetic tree",
+                        default=None)
+    parser.add_argument('-e', '--extension',
+                        type=str,
+                        help="file extension for the source code "
+                             "(case-sensitive) - default to f90",
+                        default='f90')
+    parser.add_argument('-m', '--modules',
+                        type=int,
+                        help="number of modules in the synthetic tree "
+                             "- default to 2000",
+                        default=2000)
+
+    args = parser.parse_args()
+
+    if args.source_dir:
+        run(
+            glob(sep.join([args.source_dir, '/**/*.{}'.format(args.extension)]),
+                 recursive=True),
+            args.root_callers
+        )
+    else:
+        with TemporaryDirectory() as tmp_dir:
+            run(generate_corpus(tmp_dir, n_modules=args.modules),
+                args.root_callers)
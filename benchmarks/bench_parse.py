@@ -0,0 +1,136 @@
+from glob import glob
+from os import sep
+from os.path import abspath, dirname
+from tempfile import TemporaryDirectory
+import importlib.util
+import argparse
+import sys
+import time
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import callgrapher
+from corpus import generate_corpus
+
+
+def _load_reference(path):
+    # import another version of the call grapher to compare against
+    spec = importlib.util.spec_from_file_location('reference', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _time(parse, fortran_files, sep_, repeat, **kwargs):
+    # best wall time over the repeats
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = parse(fortran_files, sep_, **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def _compare(results, expected, against):
+    for name, current, other in zip(
+            ['caller_callees', 'memberships', 'kinds', 'locations'],
+            results, expected):
+        if (current != other) or (list(current) != list(other)):
+            raise RuntimeError(f"'{name}' differs from {against}")
+
+
+def run(fortran_files, reference=None, repeat=3, jobs=None):
+    _sep = '__'
+    n_lines = 0
+    for fortran_file in fortran_files:
+        with open(fortran_file, 'r') as f:
+            n_lines += sum(1 for _ in f)
+
+    print(f"{len(fortran_files)} files, {n_lines} lines")
+
+    elapsed, results = _time(
+        callgrapher.parse_fortran_files, fortran_files, _sep, repeat
+    )
+    print(f"current:   {elapsed:.3f} s ({n_lines / elapsed:,.0f} lines/s)")
+
+    if reference:
+        ref_elapsed, ref_results = _time(
+            _load_reference(reference).parse_fortran_files,
+            fortran_files, _sep, repeat
+        )
+        print(f"reference: {ref_elapsed:.3f} s "
+              f"({n_lines / ref_elapsed:,.0f} lines/s)")
+        print(f"speedup:   {ref_elapsed / elapsed:.2f}x")
+
+        _compare(results, ref_results, 'reference')
+        print("outputs identical to reference")
+
+    # parallel parsing must give the same outputs whatever the number of
+    # workers (and hence whatever the order in which they complete)
+    for n_jobs in jobs or []:
+        par_elapsed, par_results = _time(
+            callgrapher.parse_fortran_files, fortran_files, _sep, repeat,
+            jobs=n_jobs
+        )
+        print(f"{n_jobs} jobs: {par_elapsed:.3f} s "
+              f"({n_lines / par_elapsed:,.0f} lines/s, "
+              f"speedup {elapsed / par_elapsed:.2f}x)")
+
+        _compare(par_results, results, f"sequential parsing with {n_jobs} jobs")
+    if jobs:
+        print("outputs identical whatever the number of jobs")
+
+
+if __name__ == '__main__':
+    # terminal interface
+    parser = argparse.ArgumentParser(
+        description="time the parsing of Fortran source code"
+    )
+
+    parser.add_argument('-s', '--source_dir',
+                        type=str,
+                        help="path to directory containing Fortran files to "
+                             "parse - default to a synthetic tree",
+                        default=None)
+    parser.add_argument('-e', '--extension',
+                        type=str,
+                        help="file extension for the source code "
+                             "(case-sensitive) - default to f90",
+                        default='f90')
+    parser.add_argument('-m', '--modules',
+                        type=int,
+                        help="number of modules in the synthetic tree "
+                             "- default to 500",
+                        default=500)
+    parser.add_argument('-r', '--reference',
+                        type=str,
+                        help="path to another version of callgrapher.py "
+                             "to compare timing and outputs with (e.g. "
+                             "extracted using 'git show')",
+                        default=None)
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        nargs='+',
+                        help="number(s) of processes to also time parallel "
+                             "parsing with (outputs are checked against "
+                             "sequential parsing)",
+                        default=None)
+    parser.add_argument('-n', '--repeat',
+                        type=int,
+                        help="number of repeats to take the best time "
+                             "from - default to 3",
+                        default=3)
+
+    args = parser.parse_args()
+
+    if args.source_dir:
+        run(
+            glob(sep.join([args.source_dir, '/**/*.{}'.format(args.extension)]),
+                 recursive=True),
+            args.reference, args.repeat, args.jobs
+        )
+    else:
+        with TemporaryDirectory() as tmp_dir:
+            run(generate_corpus(tmp_dir, n_modules=args.modules),
+                args.reference, args.repeat, args.jobs)
@@ -0,0 +1,145 @@
+from os import sep
+from os.path import abspath, dirname
+from tempfile import TemporaryDirectory
+import subprocess
+import py_compile
+import argparse
+import sys
+import time
+
+from corpus import generate_corpus
+
+
+_repository = dirname(dirname(abspath(__file__)))
+_script = sep.join([_repository, 'callgrapher.py'])
+
+
+def _run(arguments, repeat):
+    # best wall time over the repeats, with the standard error of the
+    # last run (where -X importtime reports)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, *arguments], cwd=_repository,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+            check=True
+        )
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, process.stderr
+
+
+def _import_times(report):
+    # cumulative time (in seconds) of each module imported, with the times
+    # of the modules it imported itself, from the report of -X importtime
+    # (listing the modules imported by a module before it, one level of
+    # indentation further)
+    times = {}
+    children = [{}]
+    for line in report.splitlines():
+        if not line.startswith('import time:') or ('|' not in line):
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        while len(children) < depth + 2:
+            children.append({})
+        times[name.strip()] = (int(cumulative) / 1e6, children[depth + 1])
+        children[depth][name.strip()] = int(cumulative) / 1e6
+        children[depth + 1:] = []
+    return times
+
+
+def run(fortran_files, root_caller, source_dir, out_dir, repeat=5):
+    # time the import of the call grapher, and runs not rendering any call
+    # graph, against the start of the interpreter alone
+    interpreter, _ = _run(['-c', 'pass'], repeat)
+
+    # compile the call grapher beforehand (as when installed), so that its
+    # import is not timed with its compilation
+    py_compile.compile(_script)
+
+    best = None
+    for _ in range(repeat):
+        _, report = _run(['-X', 'importtime', '-c', 'import callgrapher'], 1)
+        times = _import_times(report)['callgrapher']
+        if (best is None) or (times[0] < best[0]):
+            best = times
+
+    # run as a script (compiled at each run), or as a module (using its
+    # compiled form kept by the interpreter)
+    arguments = [root_caller, '-s', source_dir, '-o', out_dir, '-n']
+    script, _ = _run([_script, *arguments], repeat)
+    module, report = _run(
+        ['-X', 'importtime', '-m', 'callgrapher', *arguments], repeat
+    )
+    rendering = sorted(
+        name for name in _import_times(report)
+        if name.split('.')[0] in ['graphviz', 'concurrent']
+    )
+
+    return {
+        'interpreter': interpreter,
+        'import': best[0],
+        # modules imported by the call grapher itself
+        'imports': best[1],
+        'script': script,
+        'module': module,
+        'files': len(fortran_files),
+        'unneeded': rendering
+    }
+
+
+if __name__ == '__main__':
+    # terminal interface
+    parser = argparse.ArgumentParser(
+        description="time the start of the call grapher (using python -X "
+                    "importtime) and of runs not rendering any call graph, "
+                    "and check them against a target"
+    )
+
+    parser.add_argument('-m', '--modules',
+                        type=int,
+                        help="number of modules in the synthetic tree "
+                             "- default to 20",
+                        default=20)
+    parser.add_argument('-n', '--repeat',
+                        type=int,
+                        help="number of repeats to take the best time "
+                             "from - default to 5",
+                        default=5)
+    parser.add_argument('-t', '--target',
+                        type=float,
+                        help="time in milliseconds the import of the call "
+                             "grapher must not exceed (exiting with an error "
+                             "otherwise) - default to 30",
+                        default=30.)
+
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as _tmp_dir, TemporaryDirectory() as _out_dir:
+        _report = run(
+            generate_corpus(_tmp_dir, n_modules=args.modules), 'driver',
+            _tmp_dir, _out_dir, args.repeat
+        )
+
+    print(f"interpreter:      {_report['interpreter'] * 1e3:7.1f} ms")
+    print(f"import:           {_report['import'] * 1e3:7.1f} ms "
+          f"(target {args.target:.1f} ms)")
+    for _name, _elapsed in sorted(_report['imports'].items(),
+                                  key=lambda item: -item[1])[:5]:
+        print(f"  {_name:<16}{_elapsed * 1e3:7.1f} ms")
+    print(f"run without rendering ({_report['files']} files)")
+    print(f"  as script:      {_report['script'] * 1e3:7.1f} ms")
+    print(f"  as module:      {_report['module'] * 1e3:7.1f} ms")
+
+    if _report['unneeded']:
+        print(f"modules imported without rendering: "
+              f"{', '.join(_report['unneeded'])}")
+        raise SystemExit(1)
+    if _report['import'] * 1e3 > args.target:
+        print("import slower than target")
+        raise SystemExit(1)
+    print("import within target")
@@ -0,0 +1,242 @@
+from glob import glob
+from os import sep
+from os.path import abspath, dirname, exists
+from tempfile import TemporaryDirectory
+import tracemalloc
+import argparse
+import json
+import sys
+import time
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import callgrapher
+from corpus import generate_corpus
+
+
+# stages of a run of the call grapher timed separately (in order)
+_stages = ['parse', 'graph', 'sources', 'dependencies']
+
+# differences in time (in seconds) too small to be told apart from noise
+_time_resolution = 0.01
+
+
+def _measure(function, repeat):
+    # best wall time over the repeats, and peak memory allocated during
+    # one more call traced separately (since tracing slows the calls down)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best, peak, result
+
+
+def run(fortran_files, root_callers=None, repeat=3):
+    # time each stage for all root callers (all programs by default)
+    _sep = '__'
+    n_lines = 0
+    for fortran_file in fortran_files:
+        with open(fortran_file, 'r') as f:
+            n_lines += sum(1 for _ in f)
+
+    stages = {}
+
+    elapsed, peak, (caller_callees, memberships, kinds, locations, _) = (
+        _measure(
+            lambda: callgrapher.parse_fortran_files(fortran_files, _sep),
+            repeat
+        )
+    )
+    stages['parse'] = {'time': elapsed, 'peak': peak}
+
+    if not root_callers:
+        root_callers = [name for name, kind in kinds.items()
+                        if kind == 'PROGRAM']
+
+    # call graphs without their rendering
+    elapsed, peak, graphs = _measure(
+        lambda: {
+            root_caller: callgrapher.build_call_graph(
+                root_caller, caller_callees, memberships, kinds, _sep
+            )
+            for root_caller in root_callers
+        },
+        repeat
+    )
+    stages['graph'] = {'time': elapsed, 'peak': peak}
+
+    with TemporaryDirectory() as tmp_dir:
+        elapsed, peak, _ = _measure(
+            lambda: [
+                callgrapher.generate_sources_file(
+                    root_caller, locations, graphs[root_caller][1], _sep,
+                    tmp_dir
+                )
+                for root_caller in root_callers
+            ],
+            repeat
+        )
+        stages['sources'] = {'time': elapsed, 'peak': peak}
+
+        elapsed, peak, _ = _measure(
+            lambda: [
+                callgrapher.generate_dependencies_file(
+                    root_caller, graphs[root_caller][2], locations, _sep,
+                    'src', 'build', tmp_dir
+                )
+                for root_caller in root_callers
+            ],
+            repeat
+        )
+        stages['dependencies'] = {'time': elapsed, 'peak': peak}
+
+    return {
+        'files': len(fortran_files),
+        'lines': n_lines,
+        'roots': len(root_callers),
+        'nodes': sum(len(graphs[root_caller][1]) for root_caller in root_callers),
+        'stages': stages
+    }
+
+
+def compare(report, baseline, tolerance=0.2):
+    # stages whose time or peak memory exceed that of the baseline by more
+    # than the given fraction
+    regressions = []
+    for stage in _stages:
+        for measure in ['time', 'peak']:
+            current = report['stages'][stage][measure]
+            reference = baseline['stages'][stage][measure]
+            if (measure == 'time') and (current - reference < _time_resolution):
+                continue
+            if current > reference * (1 + tolerance):
+                regressions.append((stage, measure, current, reference))
+    return regressions
+
+
+def format_report(report, baseline=None):
+    lines = [f"{report['files']} files, {report['lines']} lines, "
+             f"{report['roots']} root(s), {report['nodes']} nodes"]
+    for stage in _stages:
+        elapsed = report['stages'][stage]['time']
+        peak = report['stages'][stage]['peak'] / 2 ** 20
+        line = f"{stage:<13}{elapsed:9.4f} s {peak:9.2f} MiB"
+        if baseline:
+            ref_elapsed = baseline['stages'][stage]['time']
+            ref_peak = baseline['stages'][stage]['peak'] / 2 ** 20
+            line += (f" | baseline {ref_elapsed:9.4f} s {ref_peak:9.2f} MiB "
+                     f"({elapsed / ref_elapsed:.2f}x time, "
+                     f"{peak / ref_peak:.2f}x memory)")
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    # terminal interface
+    parser = argparse.ArgumentParser(
+        description="time each stage of the call grapher (parsing, call "
+                    "graphs without their layout, sources files, "
+                    "dependencies files) with their peak memory, and "
+                    "compare them with a stored baseline"
+    )
+
+    parser.add_argument('root_callers',
+                        type=str,
+                        nargs='*',
+                        help="name(s) of the caller(s) to use as root to "
+                             "call graphs - default to all programs")
+    parser.add_argument('-s', '--source_dir',
+                        type=str,
+                        help="path to directory containing Fortran files to "
+                             "parse - default to a synthetic tree",
+                        default=None)
+    parser.add_argument('-e', '--extension',
+                        type=str,
+                        help="file extension for the source code "
+                             "(case-sensitive) - default to f90",
+                        default='f90')
+    parser.add_argument('-m', '--modules',
+                        type=int,
+                        help="number of modules in the synthetic tree "
+                             "- default to 500",
+                        default=500)
+    parser.add_argument('-r', '--routines',
+                        type=int,
+                        help="number of subroutines/functions per module in "
+                             "the synthetic tree - default to 10",
+                        default=10)
+    parser.add_argument('-f', '--fan_out',
+                        type=int,
+                        help="maximum number of modules used by each "
+                             "subroutine/function in the synthetic tree "
+                             "- default to 5",
+                        default=5)
+    parser.add_argument('-n', '--repeat',
+                        type=int,
+                        help="number of repeats to take the best time "
+                             "from - default to 3",
+                        default=3)
+    parser.add_argument('-b', '--baseline',
+                        type=str,
+                        help="path to JSON file with the measures to "
+                             "compare with (exiting with an error if any "
+                             "stage regressed), or where to store them if "
+                             "it does not exist yet (or if --save is given)",
+                        default=None)
+    parser.add_argument('--save',
+                        dest='save',
+                        action='store_true',
+                        help="option to store the measures as the new "
+                             "baseline")
+    parser.add_argument('-t', '--tolerance',
+                        type=float,
+                        help="fraction by which time or peak memory may "
+                             "exceed the baseline before being considered a "
+                             "regression - default to 0.2",
+                        default=0.2)
+    parser.set_defaults(save=False)
+
+    args = parser.parse_args()
+
+    if args.source_dir:
+        _report = run(
+            glob(sep.join([args.source_dir, '/**/*.{}'.format(args.extension)]),
+                 recursive=True),
+            args.root_callers, args.repeat
+        )
+    else:
+        with TemporaryDirectory() as _tmp_dir:
+            _report = run(
+                generate_corpus(_tmp_dir, n_modules=args.modules,
+                                n_routines=args.routines,
+                                fan_out=args.fan_out),
+                args.root_callers, args.repeat
+            )
+
+    _baseline = None
+    if args.baseline and exists(args.baseline) and not args.save:
+        with open(args.baseline, 'r') as f:
+            _baseline = json.load(f)
+
+    print(format_report(_report, _baseline))
+
+    if args.baseline and not _baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(_report, f, indent=2)
+        print(f"baseline stored in {args.baseline}")
+    elif _baseline:
+        _regressions = compare(_report, _baseline, args.tolerance)
+        for _regression in _regressions:
+            print("regression in {} {}: {:.4g} against {:.4g}".format(
+                *_regression))
+        if _regressions:
+            raise SystemExit(1)
+        print("no regression against baseline")
@@ -0,0 +1,152 @@
+from os import sep
+from os.path import abspath, dirname
+from tempfile import TemporaryDirectory
+import importlib.util
+import argparse
+import random
+import sys
+import time
+
+import graphviz
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import callgrapher
+
+
+def synthetic_graph(n_edges, n_members=10, fan_out=4, sep_='__', seed=0):
+    # build parsed-like dictionaries for modules containing subroutines
+    # and variables, with each subroutine calling or using a few entities
+    # in lower modules, for approximately the given number of call edges
+    rng = random.Random(seed)
+
+    n_modules = max(2, n_edges // (n_members * fan_out))
+
+    caller_callees = {}
+    memberships = {}
+    kinds = {}
+
+    for m in range(n_modules):
+        module = 'mod{}'.format(m)
+        kinds[module] = 'MODULE'
+        memberships[module] = []
+        for r in range(n_members):
+            routine = 'sub{}'.format(r)
+            memberships[module].append(routine)
+            caller = sep_.join([module, routine])
+            kinds[caller] = 'SUBROUTINE'
+            if m:
+                caller_callees[caller] = [
+                    sep_.join([
+                        'mod{}'.format(rng.randrange(m)),
+                        # variables are not in the kinds
+                        'sub{}'.format(rng.randrange(n_members))
+                        if rng.random() < 0.7 else 'var{}'.format(r)
+                    ])
+                    for _ in range(fan_out)
+                ]
+
+    root_caller = sep_.join(['mod{}'.format(n_modules - 1), 'sub0'])
+
+    return root_caller, caller_callees, memberships, kinds
+
+
+def _load_reference(path):
+    # import another version of the call grapher to compare against
+    spec = importlib.util.spec_from_file_location('reference', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _save_only(self, filename, *args, **kwargs):
+    # write the dot source without running the layout (which is not
+    # what is being timed here, and may not be installed), for the call
+    # grapher and the reference alike (both importing graphviz lazily)
+    return self.save(filename)
+
+
+def _time(generate, root_caller, caller_callees, memberships, kinds,
+          out_dir, clustering):
+    start = time.perf_counter()
+    nodes, ext_caller_callers = generate(
+        root_caller, caller_callees, memberships, kinds, '__', out_dir,
+        clustering=clustering
+    )
+    elapsed = time.perf_counter() - start
+
+    with open(sep.join([out_dir, '{}.gv'.format(root_caller)]), 'r') as f:
+        source = f.read()
+
+    return elapsed, (nodes, ext_caller_callers, source)
+
+
+def run(sizes, reference=None, reference_max=10 ** 4, clustering=False):
+    graphviz.Digraph.render = _save_only
+
+    if reference:
+        reference = _load_reference(reference)
+
+    for n_edges in sizes:
+        graph = synthetic_graph(n_edges)
+        actual = sum(len(c) for c in graph[1].values())
+
+        with TemporaryDirectory() as tmp_dir:
+            elapsed, outputs = _time(
+                callgrapher.generate_dot_and_pdf, *graph, tmp_dir, clustering
+            )
+            line = (f"{actual:>9,} edges: {len(outputs[0]):>9,} nodes "
+                    f"in {elapsed:8.3f} s")
+
+            if reference and (n_edges <= reference_max):
+                ref_elapsed, ref_outputs = _time(
+                    reference.generate_dot_and_pdf, *graph, tmp_dir, clustering
+                )
+                line += (f" | reference {ref_elapsed:8.3f} s "
+                         f"(speedup {ref_elapsed / elapsed:.1f}x)")
+
+                for name, current, expected in zip(
+                        ['nodes', 'ext_caller_callers', 'dot source'],
+                        outputs, ref_outputs):
+                    if current != expected:
+                        raise RuntimeError(f"{name} differs from reference")
+
+        print(line)
+
+    if reference:
+        print("outputs identical to reference")
+
+
+if __name__ == '__main__':
+    # terminal interface
+    parser = argparse.ArgumentParser(
+        description="time the construction of call graphs (without the "
+                    "graph layout) on synthetic graphs of increasing size"
+    )
+
+    parser.add_argument('-n', '--sizes',
+                        type=int,
+                        nargs='+',
+                        help="approximate number(s) of call edges in the "
+                             "synthetic graphs - default to 10^3 to 10^6",
+                        default=[10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6])
+    parser.add_argument('-r', '--reference',
+                        type=str,
+                        help="path to another version of callgrapher.py "
+                             "to compare timing and outputs with (e.g. "
+                             "extracted using 'git show')",
+                        default=None)
+    parser.add_argument('--reference_max',
+                        type=int,
+                        help="largest number of edges to run the reference "
+                             "on - default to 10^4",
+                        default=10 ** 4)
+    parser.add_argument('-c', '--cluster',
+                        dest='cluster',
+                        action='store_true',
+                        help="gather entities into their containing modules")
+    parser.set_defaults(cluster=False)
+
+    args = parser.parse_args()
+
+    run(args.sizes, args.reference, args.reference_max, args.cluster)
@@ -0,0 +1,256 @@
+from os import makedirs, sep
+import random
+import argparse
+
+
+# sub-directories in which to place the modules (mimicking the JULES tree
+# so that the priorities used to order the compilation apply)
+_directories = [
+    'params/standalone',
+    'util',
+    'io/shared',
+    'control/shared',
+    'initialisation/shared',
+    'science/params',
+    'science/surface',
+    'science/snow',
+    'science/soil'
+]
+
+
+def _wrap(words, indent, width=72):
+    # join words with commas, wrapping them over several lines using '&'
+    lines = []
+    line = ''
+    for word in words:
+        if line and len(indent) + len(line) + len(word) > width:
+            lines.append(line + ' &')
+            line = ''
+        line += word + ', '
+    lines.append(line[:-2])
+    return ('\n' + indent).join(lines)
+
+
+def generate_corpus(out_dir, n_modules=100, n_routines=10, n_variables=10,
+                    fan_out=5, seed=0):
+    # write a tree of preprocessed Fortran files made of modules containing
+    # variables, types, interfaces, subroutines and functions that use and
+    # call each other, plus one program calling into the last modules
+    rng = random.Random(seed)
+    files = []
+
+    # dummy Dr Hook modules used by every module
+    directory = sep.join([out_dir, 'drhook_dummy'])
+    makedirs(directory, exist_ok=True)
+    for module, lines in [
+            ('parkind1', ['INTEGER, PARAMETER :: jpim = 4',
+                          'INTEGER, PARAMETER :: jprb = 8']),
+            ('yomhook', ['LOGICAL, PARAMETER :: lhook = .FALSE.',
+                         'CONTAINS',
+                         'SUBROUTINE dr_hook(name, code, handle)',
+                         'CHARACTER(LEN=*), INTENT(IN) :: name',
+                         'INTEGER, INTENT(IN) :: code',
+                         'REAL, INTENT(IN OUT) :: handle',
+                         'END SUBROUTINE dr_hook'])]:
+        file_ = sep.join([directory, '{}.f90'.format(module)])
+        with open(file_, 'w') as f:
+            f.write('\n'.join(['MODULE {}'.format(module)] + lines
+                              + ['END MODULE {}'.format(module), '']))
+        files.append(file_)
+
+    modules = ['mod{:05d}_mod'.format(m) for m in range(n_modules)]
+
+    for m, module in enumerate(modules):
+        directory = sep.join(
+            [out_dir, _directories[m * len(_directories) // n_modules]]
+        )
+        makedirs(directory, exist_ok=True)
+
+        routines = ['{}_sub{:03d}'.format(module[:-4], r) for r in range(n_routines)]
+        variables = ['{}_var{:03d}'.format(module[:-4], v) for v in range(n_variables)]
+
+        lines = [
+            '#if !defined(UM_JULES)',
+            '! *****************************COPYRIGHT*******************************',
+            '! Synthetic module {} generated for benchmarking'.format(module),
+            '! *****************************COPYRIGHT*******************************',
+            '',
+            'MODULE {}'.format(module),
+            '',
+            'USE parkind1, ONLY: jprb, jpim',
+            'USE yomhook, ONLY: lhook, dr_hook',
+            '',
+            'IMPLICIT NONE',
+            '',
+            'PRIVATE',
+            'PUBLIC :: {}'.format(_wrap(routines + variables, '  ')),
+            '',
+        ]
+
+        # module variables
+        for v, variable in enumerate(variables):
+            lines.append(
+                'REAL, PARAMETER :: {} = {}.0  ! variable {}'.format(variable, v, v)
+            )
+        lines.append('')
+
+        # derived type with an overloaded assignment
+        type_name = '{}_type'.format(module[:-4])
+        lines.extend([
+            'TYPE {}'.format(type_name),
+            '  REAL :: value',
+            'END TYPE {}'.format(type_name),
+            '',
+            'INTERFACE assignment(=)',
+            '  MODULE PROCEDURE {}_assign'.format(module[:-4]),
+            'END INTERFACE',
+            '',
+            # generic interface over the first two routines
+            'INTERFACE {}_generic'.format(module[:-4]),
+            '  MODULE PROCEDURE {}, {}'.format(routines[0], routines[-1]),
+            'END INTERFACE {}_generic'.format(module[:-4]),
+            '',
+            'CONTAINS',
+            ''
+        ])
+
+        for r, routine in enumerate(routines):
+            # use statements towards modules lower in the tree
+            uses = []
+            for _ in range(rng.randint(0, fan_out) if m else 0):
+                other = rng.randrange(m)
+                names = rng.sample(range(n_routines), min(3, n_routines))
+                only = [
+                    '{}_sub{:03d}'.format(modules[other][:-4], n)
+                    for n in names
+                ]
+                # rename some of the routines that are used
+                if rng.random() < 0.2:
+                    only[0] = 'local_{} => {}'.format(only[0], only[0])
+                only.append(
+                    '{}_var{:03d}'.format(modules[other][:-4],
+                                          rng.randrange(n_variables))
+                )
+                uses.append((modules[other], only))
+
+            kind = 'FUNCTION' if r % 4 == 3 else 'SUBROUTINE'
+            lines.extend([
+                '!' + '-' * 70,
+                '{}{} {}(x, y, &'.format(
+                    'REAL ' if kind == 'FUNCTION' else '', kind, routine
+                ),
+                '                          z)',
+                ''
+            ])
+            for other, only in uses:
+                lines.append(
+                    'USE {}, ONLY: {}'.format(other, _wrap(only, '  '))
+                )
+            lines.extend([
+                '',
+                'IMPLICIT NONE',
+                '',
+                'REAL, INTENT(IN) :: x, y',
+                'REAL, INTENT(IN OUT) :: z',
+                '',
+                'INTEGER(KIND=jpim), PARAMETER :: zhook_in  = 0',
+                'INTEGER(KIND=jpim), PARAMETER :: zhook_out = 1',
+                'REAL(KIND=jprb)               :: zhook_handle',
+                '',
+                "CHARACTER(LEN=*), PARAMETER :: RoutineName='{}'".format(
+                    routine.upper()
+                ),
+                '',
+                'IF (lhook) CALL dr_hook(ModuleName//":"//RoutineName, zhook_in, zhook_handle)',
+                ''
+            ])
+            # some science
+            for _ in range(rng.randint(5, 20)):
+                lines.append(
+                    'z = z + {} * x - y / {}.0  ! update'.format(
+                        rng.choice(variables), rng.randint(1, 9)
+                    )
+                )
+            # calls to used routines
+            for other, only in uses:
+                name = only[0].split('=>')[0].strip()
+                lines.extend([
+                    'CALL {}(x, y, &'.format(name),
+                    '     z)'
+                ])
+            # calls to internal routines (possibly defined further down)
+            if r + 1 < n_routines:
+                callee = routines[rng.randrange(n_routines)]
+                if not callee.endswith(('3', '7')):
+                    lines.append('CALL {}(x, y, z)'.format(callee))
+            lines.extend([
+                '',
+                'IF (lhook) CALL dr_hook(ModuleName//":"//RoutineName, zhook_out, zhook_handle)',
+                'RETURN',
+                'END {} {}'.format(kind, routine),
+                ''
+            ])
+
+        lines.extend([
+            'END MODULE {}'.format(module),
+            '#endif',
+            ''
+        ])
+
+        file_ = sep.join([directory, '{}.f90'.format(module)])
+        with open(file_, 'w') as f:
+            f.write('\n'.join(lines))
+        files.append(file_)
+
+    # a program using the modules at the top of the tree
+    directory = sep.join([out_dir, 'control/standalone'])
+    makedirs(directory, exist_ok=True)
+    lines = ['PROGRAM driver', '']
+    for module in modules[-fan_out:]:
+        lines.append('USE {}, ONLY: {}_sub000'.format(module, module[:-4]))
+    lines.extend(['', 'IMPLICIT NONE', '', 'REAL :: x, y, z', ''])
+    for module in modules[-fan_out:]:
+        lines.append('CALL {}_sub000(x, y, z)'.format(module[:-4]))
+    lines.extend(['', 'END PROGRAM driver', ''])
+    file_ = sep.join([directory, 'driver.f90'])
+    with open(file_, 'w') as f:
+        f.write('\n'.join(lines))
+    files.append(file_)
+
+    return files
+
+
+if __name__ == '__main__':
+    # terminal interface
+    parser = argparse.ArgumentParser(
+        description="generate a synthetic tree of preprocessed Fortran "
+                    "source code"
+    )
+
+    parser.add_argument('out_dir',
+                        type=str,
+                        help="path to directory where to write the tree")
+    parser.add_argument('-m', '--modules',
+                        type=int,
+                        help="number of modules - default to 100",
+                        default=100)
+    parser.add_argument('-r', '--routines',
+                        type=int,
+                        help="number of subroutines/functions per module "
+                             "- default to 10",
+                        default=10)
+    parser.add_argument('-f', '--fan_out',
+                        type=int,
+                        help="maximum number of modules used by each "
+                             "subroutine/function - default to 5",
+                        default=5)
+    parser.add_argument('--seed',
+                        type=int,
+                        help="seed for the random generator - default to 0",
+                        default=0)
+
+    args = parser.parse_args()
+
+    generate_corpus(args.out_dir, n_modules=args.modules,
+                    n_routines=args.routines, fan_out=args.fan_out,
+                    seed=args.seed)
@@ -0,0 +1,9 @@
+MODULE jules_radiation_mod
+
+IMPLICIT NONE
+
+LOGICAL :: l_snow_albedo = .FALSE.
+LOGICAL :: l_embedded_snow = .FALSE.
+INTEGER :: i_scatter_method = 1
+
+END MODULE jules_radiation_mod
@@ -0,0 +1,35 @@
+MODULE jules_snow_mod
+
+USE conversions_mod, ONLY: zerodegc
+
+IMPLICIT NONE
+
+INTEGER, PARAMETER :: nsmax_max = 10
+INTEGER :: nsmax = 3
+LOGICAL :: l_snowdep_surf = .FALSE.
+REAL :: rho_snow_const = 250.0
+REAL :: dzsnow(nsmax_max)
+
+TYPE snow_params_type
+  REAL :: rho_snow_fresh
+  REAL :: snowliqcap
+END TYPE snow_params_type
+
+NAMELIST /jules_snow/ nsmax, l_snowdep_surf, rho_snow_const, dzsnow
+
+CONTAINS
+
+SUBROUTINE check_jules_snow()
+USE yomhook, ONLY: lhook, dr_hook
+USE parkind1, ONLY: jprb, jpim
+IMPLICIT NONE
+REAL(KIND=jprb) :: zhook_handle
+IF (lhook) CALL dr_hook('CHECK_JULES_SNOW', 0, zhook_handle)
+IF (nsmax < 0 .OR. nsmax > nsmax_max) THEN
+  WRITE(*, *) 'nsmax out of range! check namelist; stopping'
+  STOP
+END IF
+IF (lhook) CALL dr_hook('CHECK_JULES_SNOW', 1, zhook_handle)
+END SUBROUTINE check_jules_snow
+
+END MODULE jules_snow_mod
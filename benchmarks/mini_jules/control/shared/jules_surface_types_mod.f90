@@ -0,0 +1,30 @@
+MODULE jules_surface_types_mod
+
+IMPLICIT NONE
+
+INTEGER :: npft = 5, ntype = 9, ice = 9
+
+TYPE tile_type
+  INTEGER :: index
+  REAL :: frac
+END TYPE tile_type
+
+INTERFACE OPERATOR(+)
+  MODULE PROCEDURE add_tiles
+END INTERFACE
+
+CONTAINS
+
+FUNCTION add_tiles(a, b) RESULT(c)
+TYPE(tile_type), INTENT(IN) :: a, b
+TYPE(tile_type) :: c
+c%index = a%index
+c%frac = a%frac + b%frac
+END FUNCTION add_tiles
+
+INTEGER FUNCTION tile_count(frac)
+REAL, INTENT(IN) :: frac(:)
+tile_count = COUNT(frac > 0.0)
+END FUNCTION tile_count
+
+END MODULE jules_surface_types_mod
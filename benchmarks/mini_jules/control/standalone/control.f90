@@ -0,0 +1,26 @@
+MODULE control_mod
+
+IMPLICIT NONE
+
+CONTAINS
+
+SUBROUTINE control(timestep, land_pts, tile_pts)
+
+USE jules_surface_types_mod, ONLY: tile_count
+USE surf_couple_mod, ONLY: surf_couple
+USE jules_snow_mod, ONLY: nsmax
+
+IMPLICIT NONE
+
+INTEGER, INTENT(IN) :: timestep, land_pts, tile_pts
+REAL :: snowfall(land_pts), canopy_snow(land_pts)
+INTEGER :: nsnow(land_pts)
+REAL :: ds(land_pts, nsmax), rho_snow(land_pts, nsmax), tsnow(land_pts, nsmax)
+
+snowfall = 0.0; canopy_snow = 0.0; nsnow = 0
+CALL surf_couple(land_pts, tile_pts, snowfall, canopy_snow, nsnow, ds,     &
+                 rho_snow, tsnow)
+
+END SUBROUTINE control
+
+END MODULE control_mod
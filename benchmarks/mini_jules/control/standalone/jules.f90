@@ -0,0 +1,28 @@
+PROGRAM jules
+
+USE control_mod, ONLY: control
+USE jules_snow_mod, ONLY: check_jules_snow, nsmax
+
+IMPLICIT NONE
+
+INTEGER :: timestep
+INTEGER, PARAMETER :: land_pts = 4, tile_pts = 4
+
+CALL init()
+DO timestep = 1, 3
+  CALL control(timestep, land_pts, tile_pts)
+END DO
+CALL finalise()
+
+CONTAINS
+
+SUBROUTINE init()
+CALL check_jules_snow()
+CALL log_info('init', 'model initialised')
+END SUBROUTINE init
+
+SUBROUTINE finalise()
+CALL log_info('finalise', 'run completed')
+END SUBROUTINE finalise
+
+END PROGRAM jules
@@ -0,0 +1,10 @@
+! physical constants and conversion factors
+MODULE conversions_mod
+
+IMPLICIT NONE
+
+REAL, PARAMETER :: zerodegc = 273.15      ! melting point of ice (K)
+REAL, PARAMETER :: rsec_per_day = 86400.0
+REAL, PARAMETER :: pi = 3.14159265
+
+END MODULE conversions_mod
@@ -0,0 +1,10 @@
+! properties of water and ice
+MODULE water_constants_mod
+
+IMPLICIT NONE
+
+REAL, PARAMETER :: hcapi = 2100.0         ! specific heat capacity of ice
+REAL, PARAMETER :: hcapw = 4180.0         ! specific heat capacity of water
+REAL, PARAMETER :: rho_ice = 917.0        ! density of ice (kg/m3)
+
+END MODULE water_constants_mod
@@ -0,0 +1,30 @@
+MODULE canopysnow_mod
+
+CONTAINS
+
+SUBROUTINE canopysnow(land_pts, tile_pts, snowfall, canopy_snow, unload)
+
+USE jules_surface_types_mod, ONLY: npft, tile_count
+
+USE yomhook, ONLY: lhook, dr_hook
+USE parkind1, ONLY: jprb, jpim
+
+IMPLICIT NONE
+
+INTEGER, INTENT(IN) :: land_pts, tile_pts
+REAL, INTENT(IN) :: snowfall(land_pts)
+REAL, INTENT(IN OUT) :: canopy_snow(land_pts)
+REAL, INTENT(OUT) :: unload(land_pts)
+REAL(KIND=jprb) :: zhook_handle
+
+IF (lhook) CALL dr_hook('CANOPYSNOW', 0, zhook_handle)
+
+IF (tile_count(snowfall) > 0) THEN
+  unload = 0.4 * canopy_snow; canopy_snow = canopy_snow - unload
+END IF
+
+IF (lhook) CALL dr_hook('CANOPYSNOW', 1, zhook_handle)
+
+END SUBROUTINE canopysnow
+
+END MODULE canopysnow_mod
@@ -0,0 +1,30 @@
+MODULE compactsnow_mod
+
+CONTAINS
+
+SUBROUTINE compactsnow(land_pts, nsnow, ds, rho_snow, tsnow)
+
+USE conversions_mod, ONLY: zerodegc, &
+                           rsec_per_day
+USE jules_snow_mod, ONLY: nsmax, rho_snow_const
+
+USE yomhook, ONLY: lhook, dr_hook
+USE parkind1, ONLY: jprb, jpim
+
+IMPLICIT NONE
+
+INTEGER, INTENT(IN) :: land_pts, nsnow(land_pts)
+REAL, INTENT(IN OUT) :: ds(land_pts, nsmax), rho_snow(land_pts, nsmax)
+REAL, INTENT(IN) :: tsnow(land_pts, nsmax)
+REAL(KIND=jprb) :: zhook_handle
+
+IF (lhook) CALL dr_hook('COMPACTSNOW', 0, zhook_handle)
+
+! densification (CALL statements in comments are not calls)
+WHERE (tsnow < zerodegc) rho_snow = rho_snow + rho_snow_const / rsec_per_day
+
+IF (lhook) CALL dr_hook('COMPACTSNOW', 1, zhook_handle)
+
+END SUBROUTINE compactsnow
+
+END MODULE compactsnow_mod
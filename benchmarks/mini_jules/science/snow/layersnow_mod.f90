@@ -0,0 +1,34 @@
+MODULE layersnow_mod
+
+CONTAINS
+
+SUBROUTINE layersnow(land_pts, tile_pts, tile_index, snowdepth, nsnow, ds)
+
+USE jules_snow_mod, ONLY: nsmax, dzsnow
+
+USE yomhook, ONLY: lhook, dr_hook
+USE parkind1, ONLY: jprb, jpim
+
+IMPLICIT NONE
+
+INTEGER, INTENT(IN) :: land_pts, tile_pts, tile_index(land_pts)
+REAL, INTENT(IN) :: snowdepth(land_pts)
+INTEGER, INTENT(OUT) :: nsnow(land_pts)
+REAL, INTENT(OUT) :: ds(land_pts, nsmax)
+INTEGER :: i, k
+REAL(KIND=jprb) :: zhook_handle
+
+IF (lhook) CALL dr_hook('LAYERSNOW', 0, zhook_handle)
+
+DO i = 1, tile_pts
+  nsnow(i) = 0; ds(i, :) = 0.0
+  DO k = 1, nsmax
+    IF (snowdepth(i) >= dzsnow(k)) nsnow(i) = k
+  END DO
+END DO
+
+IF (lhook) CALL dr_hook('LAYERSNOW', 1, zhook_handle)
+
+END SUBROUTINE layersnow
+
+END MODULE layersnow_mod
@@ -0,0 +1,45 @@
+MODULE relayersnow_mod
+
+USE conversions_mod, ONLY: zerodegc
+
+IMPLICIT NONE
+
+CONTAINS
+
+SUBROUTINE relayersnow(land_pts, tile_pts, nsnow, ds, tsnow)
+
+USE jules_snow_mod, ONLY: nsmax
+USE layersnow_mod, ONLY: layersnow
+
+USE yomhook, ONLY: lhook, dr_hook
+USE parkind1, ONLY: jprb, jpim
+
+IMPLICIT NONE
+
+INTEGER, INTENT(IN) :: land_pts, tile_pts
+INTEGER, INTENT(IN OUT) :: nsnow(land_pts)
+REAL, INTENT(IN OUT) :: ds(land_pts, nsmax), tsnow(land_pts, nsmax)
+INTEGER :: tile_index(land_pts)
+REAL :: snowdepth(land_pts)
+REAL(KIND=jprb) :: zhook_handle
+
+IF (lhook) CALL dr_hook('RELAYERSNOW', 0, zhook_handle)
+
+snowdepth(:) = SUM(ds, DIM=2)
+CALL layersnow(land_pts, tile_pts, tile_index, snowdepth, nsnow, ds)
+CALL remap_temperature(land_pts, nsnow, ds, tsnow)
+
+IF (lhook) CALL dr_hook('RELAYERSNOW', 1, zhook_handle)
+
+END SUBROUTINE relayersnow
+
+SUBROUTINE remap_temperature(land_pts, nsnow, ds, tsnow)
+USE jules_snow_mod, ONLY: nsmax
+IMPLICIT NONE
+INTEGER, INTENT(IN) :: land_pts, nsnow(land_pts)
+REAL, INTENT(IN) :: ds(land_pts, nsmax)
+REAL, INTENT(IN OUT) :: tsnow(land_pts, nsmax)
+tsnow = MIN(tsnow, zerodegc)
+END SUBROUTINE remap_temperature
+
+END MODULE relayersnow_mod
@@ -0,0 +1,55 @@
+MODULE snow_mod
+
+IMPLICIT NONE
+
+CHARACTER(LEN=*), PARAMETER, PRIVATE :: ModuleName = 'SNOW_MOD'
+
+CONTAINS
+
+SUBROUTINE snow(land_pts, tile_pts, snowfall, canopy_snow, nsnow, ds,     &
+                rho_snow, tsnow)
+
+USE jules_snow_mod, ONLY: nsmax, l_snowdep_surf,                          &
+                          snow_params => snow_params_type
+USE jules_radiation_mod, ONLY: l_snow_albedo, l_embedded_snow
+USE relayersnow_mod, ONLY: relayersnow
+USE snowpack_mod, ONLY: snowpack
+USE compactsnow_mod, ONLY: compactsnow
+USE canopysnow_mod, ONLY: canopy_unload => canopysnow
+USE snowtherm_mod
+
+USE yomhook, ONLY: lhook, dr_hook
+USE parkind1, ONLY: jprb, jpim
+
+IMPLICIT NONE
+
+INTEGER, INTENT(IN) :: land_pts, tile_pts
+REAL, INTENT(IN) :: snowfall(land_pts)
+REAL, INTENT(IN OUT) :: canopy_snow(land_pts)
+INTEGER, INTENT(IN OUT) :: nsnow(land_pts)
+REAL, INTENT(IN OUT) :: ds(land_pts, nsmax), rho_snow(land_pts, nsmax),   &
+                        tsnow(land_pts, nsmax)
+REAL :: unload(land_pts), hcaps(land_pts, nsmax), hcons(land_pts, nsmax)
+REAL(KIND=jprb) :: zhook_handle
+CHARACTER(LEN=*), PARAMETER :: RoutineName = 'SNOW'
+
+IF (lhook) CALL dr_hook(ModuleName // ':' // RoutineName, 0, zhook_handle)
+
+CALL canopy_unload(land_pts, tile_pts, snowfall, canopy_snow, unload)
+
+IF (nsmax > 0) THEN
+  CALL snowtherm(land_pts, nsnow, ds, rho_snow, hcaps, hcons)
+  CALL snowpack(land_pts, nsnow, ds, rho_snow, tsnow, hcaps, hcons)
+  CALL compactsnow(land_pts, nsnow, ds, rho_snow, tsnow); CALL relayersnow(    &
+    land_pts, tile_pts, nsnow, ds, tsnow)
+END IF
+
+IF (l_snow_albedo .AND. .NOT. l_embedded_snow) THEN
+  WRITE(*, *) 'snow albedo without embedded snow! (ignored)'
+END IF
+
+IF (lhook) CALL dr_hook(ModuleName // ':' // RoutineName, 1, zhook_handle)
+
+END SUBROUTINE snow
+
+END MODULE snow_mod
@@ -0,0 +1,38 @@
+MODULE snowpack_mod
+
+CONTAINS
+
+SUBROUTINE snowpack(land_pts, nsnow, ds, rho_snow, tsnow, hcaps, hcons)
+
+USE jules_snow_mod, ONLY: nsmax
+USE snowtherm_mod, ONLY: snowtherm
+
+USE yomhook, ONLY: lhook, dr_hook
+USE parkind1, ONLY: jprb, jpim
+
+IMPLICIT NONE
+
+INTEGER, INTENT(IN) :: land_pts, nsnow(land_pts)
+REAL, INTENT(IN) :: ds(land_pts, nsmax), rho_snow(land_pts, nsmax)
+REAL, INTENT(IN OUT) :: tsnow(land_pts, nsmax)
+REAL, INTENT(OUT) :: hcaps(land_pts, nsmax), hcons(land_pts, nsmax)
+REAL(KIND=jprb) :: zhook_handle
+
+INTERFACE
+  SUBROUTINE gauss(n, a, b, c, r, x)
+    INTEGER, INTENT(IN) :: n
+    REAL, INTENT(IN) :: a(n), b(n), c(n), r(n)
+    REAL, INTENT(OUT) :: x(n)
+  END SUBROUTINE gauss
+END INTERFACE
+
+IF (lhook) CALL dr_hook('SNOWPACK', 0, zhook_handle)
+
+CALL snowtherm(land_pts, nsnow, ds, rho_snow, hcaps, hcons)
+CALL gauss(nsmax, hcaps, hcons, hcaps, tsnow, tsnow)
+
+IF (lhook) CALL dr_hook('SNOWPACK', 1, zhook_handle)
+
+END SUBROUTINE snowpack
+
+END MODULE snowpack_mod
@@ -0,0 +1,32 @@
+MODULE snowtherm_mod
+
+USE jules_snow_mod
+
+IMPLICIT NONE
+
+CONTAINS
+
+SUBROUTINE snowtherm(land_pts, nsnow, ds, rho_snow, hcaps, hcons)
+
+USE water_constants_mod
+USE yomhook, ONLY: lhook, dr_hook
+USE parkind1, ONLY: jprb, jpim
+
+IMPLICIT NONE
+
+INTEGER, INTENT(IN) :: land_pts, nsnow(land_pts)
+REAL, INTENT(IN) :: ds(land_pts, nsmax), rho_snow(land_pts, nsmax)
+REAL, INTENT(OUT) :: hcaps(land_pts, nsmax), hcons(land_pts, nsmax)
+REAL(KIND=jprb) :: zhook_handle
+
+IF (lhook) CALL dr_hook('SNOWTHERM', 0, zhook_handle)
+
+CALL check_jules_snow()
+hcaps = hcapi * rho_snow * ds
+hcons = 2.22 * (rho_snow / 1000.0) ** 1.88
+
+IF (lhook) CALL dr_hook('SNOWTHERM', 1, zhook_handle)
+
+END SUBROUTINE snowtherm
+
+END MODULE snowtherm_mod
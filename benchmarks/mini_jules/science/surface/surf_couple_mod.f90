@@ -0,0 +1,37 @@
+MODULE surf_couple_mod
+
+USE jules_surface_types_mod, ONLY: npft, ntype, tile_type, OPERATOR(+)
+
+IMPLICIT NONE
+
+CONTAINS
+
+SUBROUTINE surf_couple(land_pts, tile_pts, snowfall, canopy_snow, nsnow,   &
+                       ds, rho_snow, tsnow)
+
+USE snow_mod, ONLY: snow
+
+USE yomhook, ONLY: lhook, dr_hook
+USE parkind1, ONLY: jprb, jpim
+
+IMPLICIT NONE
+
+INTEGER, INTENT(IN) :: land_pts, tile_pts
+REAL, INTENT(IN) :: snowfall(land_pts)
+REAL, INTENT(IN OUT) :: canopy_snow(land_pts)
+INTEGER, INTENT(IN OUT) :: nsnow(land_pts)
+REAL, INTENT(IN OUT) :: ds(:, :), rho_snow(:, :), tsnow(:, :)
+TYPE(tile_type) :: total
+REAL(KIND=jprb) :: zhook_handle
+
+IF (lhook) CALL dr_hook('SURF_COUPLE', 0, zhook_handle)
+
+CALL snow(land_pts, tile_pts, snowfall, canopy_snow, nsnow, ds, rho_snow,  &
+          tsnow)
+CALL surf_diagnostics(land_pts, tsnow)
+
+IF (lhook) CALL dr_hook('SURF_COUPLE', 1, zhook_handle)
+
+END SUBROUTINE surf_couple
+
+END MODULE surf_couple_mod
@@ -0,0 +1,7 @@
+! routine outside any module (e.g. written in the style of older code)
+SUBROUTINE surf_diagnostics(land_pts, tsnow)
+IMPLICIT NONE
+INTEGER, INTENT(IN) :: land_pts
+REAL, INTENT(IN) :: tsnow(:, :)
+CALL log_info('surf_diagnostics', 'writing "snow" diagnostics')
+END SUBROUTINE surf_diagnostics
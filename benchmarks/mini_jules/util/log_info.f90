@@ -0,0 +1,5 @@
+SUBROUTINE log_info(proc_name, message)
+IMPLICIT NONE
+CHARACTER(LEN=*), INTENT(IN) :: proc_name, message
+WRITE(*, '(A)') proc_name // ': ' // message
+END SUBROUTINE log_info
@@ -0,0 +1,8 @@
+MODULE parkind1
+
+IMPLICIT NONE
+
+INTEGER, PARAMETER :: jpim = SELECTED_INT_KIND(9)
+INTEGER, PARAMETER :: jprb = SELECTED_REAL_KIND(13,300)
+
+END MODULE parkind1
@@ -0,0 +1,30 @@
+MODULE yomhook
+
+USE parkind1, ONLY: jpim, jprb
+
+IMPLICIT NONE
+
+LOGICAL, PARAMETER :: lhook = .FALSE.
+
+INTERFACE dr_hook
+  MODULE PROCEDURE dr_hook_default
+  MODULE PROCEDURE dr_hook_file
+END INTERFACE dr_hook
+
+CONTAINS
+
+SUBROUTINE dr_hook_default(name, code, handle)
+CHARACTER(LEN=*), INTENT(IN) :: name
+INTEGER(KIND=jpim), INTENT(IN) :: code
+REAL(KIND=jprb), INTENT(IN OUT) :: handle
+RETURN
+END SUBROUTINE dr_hook_default
+
+SUBROUTINE dr_hook_file(name, code, handle, filename)
+CHARACTER(LEN=*), INTENT(IN) :: name, filename
+INTEGER(KIND=jpim), INTENT(IN) :: code
+REAL(KIND=jprb), INTENT(IN OUT) :: handle
+RETURN
+END SUBROUTINE dr_hook_file
+
+END MODULE yomhook
@@ -0,0 +1,396 @@
+from collections import Counter
+from os import makedirs, sep
+from os.path import abspath, dirname, exists
+from shutil import copytree
+from tempfile import TemporaryDirectory
+import subprocess
+import argparse
+import json
+import sys
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import callgrapher
+from corpus import generate_corpus
+
+
+_repository = dirname(dirname(abspath(__file__)))
+_script = sep.join([_repository, 'callgrapher.py'])
+_benchmarks = dirname(abspath(__file__))
+_golden_dir = sep.join([_benchmarks, 'golden'])
+
+# corpora, either bundled (a miniature JULES-like tree) or generated (given
+# the parameters of generate_corpus), with the root callers of their call
+# graphs
+_corpora = {
+    'mini_jules': (
+        None,
+        ['jules', 'snow_mod__snow', 'surf_couple_mod__surf_couple']
+    ),
+    'generated': (
+        {'n_modules': 12, 'n_routines': 4, 'n_variables': 4, 'fan_out': 3,
+         'seed': 1},
+        ['driver', 'mod00006_mod__mod00006_sub001']
+    ),
+    'generated_dense': (
+        {'n_modules': 16, 'n_routines': 3, 'n_variables': 2, 'fan_out': 6,
+         'seed': 2},
+        ['driver']
+    )
+}
+
+# options of the call graphs, each giving its own golden outputs
+_variants = {
+    'default': [],
+    'cluster': ['-c'],
+    'pruned': ['-v', '-i', 'yomhook__dr_hook']
+}
+
+# fast paths expected to give the same outputs as the baseline (with the
+# cache used twice, once to be filled and once to be read from, and the
+# snapshot being that exported by the baseline)
+_modes = {
+    'baseline': [],
+    'parallel': ['-j', '2'],
+    'cached': ['-k', '{cache}'],
+    'cached (warm)': ['-k', '{cache}'],
+    'compact': ['-m'],
+    'batch': ['-a'],
+    'snapshot': ['-l', '{snapshot}']
+}
+
+# outputs for each root caller
+_suffixes = ['gv', 'sources', 'levels', 'dependencies']
+
+
+def _normalise_parsed(parsed):
+    # results of the parsing, with the callees, members, and modules used
+    # without only of each entity in alphabetical order (but with their
+    # duplicates kept)
+    caller_callees, memberships, kinds, locations, uses, lines = parsed
+    return {
+        'caller_callees': {caller: sorted(callees)
+                           for caller, callees in caller_callees.items()},
+        'memberships': {parent: sorted(members)
+                        for parent, members in memberships.items()},
+        'kinds': kinds,
+        'locations': locations,
+        'uses': {scope: sorted(modules) for scope, modules in uses.items()},
+        'lines': lines
+    }
+
+
+def _normalise_gv(text):
+    # lines of the dot source outside and inside of each cluster, in any
+    # order (but for the lines opening and closing the graph)
+    lines = []
+    clusters = []
+    cluster = None
+    for line in text.splitlines():
+        if cluster is not None:
+            cluster.append(line)
+            if line == '\t}':
+                clusters.append(tuple(sorted(cluster)))
+                cluster = None
+        elif line.startswith('\tsubgraph '):
+            cluster = [line]
+        else:
+            lines.append(line)
+    return sorted(lines), sorted(clusters)
+
+
+def _normalise_dependencies(text):
+    # requirements of each target, in any order
+    dependencies = {}
+    for rule in text.split('\n\n'):
+        if not rule.strip():
+            continue
+        target, *requirements = [line.rstrip(' \\')
+                                 for line in rule.split('\n')]
+        dependencies[target.rstrip(':')] = Counter(requirements)
+    return dependencies
+
+
+# normalisation of each output before comparison (the order of the sources
+# and of the levels is that of the compilation, hence significant)
+_normalise = {
+    'gv': _normalise_gv,
+    'sources': str,
+    'levels': str,
+    'dependencies': _normalise_dependencies
+}
+
+
+def _run(source_dir, root_callers, options, out_dir):
+    # run the call grapher from the source directory (so that the paths in
+    # the outputs are relative to it, with the objects in a build directory)
+    # writing the dot sources of the call graphs and a snapshot of the
+    # results of the parsing, and return what it printed
+    process = subprocess.run(
+        [sys.executable, _script, *root_callers, '-s', '.', '-b', 'build',
+         '-o', out_dir, '-f', 'gv', '-x', sep.join([out_dir, 'parsed.json']),
+         *options],
+        cwd=source_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True
+    )
+    if process.returncode:
+        raise RuntimeError(f"call grapher failed with options {options}:\n"
+                           f"{process.stdout}")
+    return process.stdout
+
+
+def _read_outputs(directory, root_callers):
+    # outputs for each root caller, by file name
+    outputs = {}
+    for root_caller in root_callers:
+        for suffix in _suffixes:
+            filename = '{}.{}'.format(root_caller, suffix)
+            with open(sep.join([directory, filename]), 'r') as f:
+                outputs[filename] = f.read()
+    return outputs
+
+
+def _read(directory, root_callers):
+    # results of the parsing (from the snapshot) and outputs of a run
+    parsed = _normalise_parsed(
+        callgrapher.load_graph(sep.join([directory, 'parsed.json']), '__')
+    )
+    return parsed, _read_outputs(directory, root_callers)
+
+
+def _store(directory, parsed, outputs):
+    makedirs(directory, exist_ok=True)
+    if parsed is not None:
+        with open(sep.join([directory, 'parsed.json']), 'w') as f:
+            json.dump(parsed, f, indent=1, sort_keys=True)
+            f.write('\n')
+    for filename, text in outputs.items():
+        with open(sep.join([directory, filename]), 'w') as f:
+            f.write(text)
+
+
+def _differences(expected, actual):
+    # outputs (or parts of the results of the parsing) that differ
+    # once normalised
+    differences = []
+    for section in expected[0]:
+        if expected[0][section] != actual[0].get(section):
+            differences.append(f"parsed {section}")
+    for filename, text in expected[1].items():
+        normalise = _normalise[filename.rsplit('.', 1)[1]]
+        if normalise(text) != normalise(actual[1].get(filename, '')):
+            differences.append(filename)
+    return differences
+
+
+def check(corpus, source_dir, root_callers, update=False):
+    # run each variant in each mode over the source directory, compare the
+    # outputs with the golden outputs (replaced by the outputs of the
+    # baseline if updating them), and return the failures
+    failures = []
+    corpus_dir = sep.join([_golden_dir, corpus])
+
+    with TemporaryDirectory() as tmp_dir:
+        for variant, options in _variants.items():
+            golden_dir = sep.join([corpus_dir, variant])
+            cache = sep.join([tmp_dir, f"{variant}.cache"])
+            snapshot = None
+
+            expected = None
+            if not update:
+                with open(sep.join([corpus_dir, 'parsed.json']), 'r') as f:
+                    expected = (json.load(f),
+                                _read_outputs(golden_dir, root_callers))
+
+            for mode, mode_options in _modes.items():
+                out_dir = sep.join([tmp_dir, variant, mode])
+                makedirs(out_dir)
+                _run(source_dir, root_callers,
+                     [option.format(cache=cache, snapshot=snapshot)
+                      for option in [*options, *mode_options]],
+                     out_dir)
+                actual = _read(out_dir, root_callers)
+
+                if mode == 'baseline':
+                    snapshot = sep.join([out_dir, 'parsed.json'])
+                    if update:
+                        _store(corpus_dir, actual[0], {})
+                        _store(golden_dir, None, actual[1])
+                        expected = actual
+
+                differences = _differences(expected, actual)
+                status = 'ok' if not differences else 'FAILED'
+                print(f"{corpus:<16}{variant:<10}{mode:<16}{status}")
+                for difference in differences:
+                    print(f"  {difference} differs")
+                    failures.append((corpus, variant, mode, difference))
+
+    return failures
+
+
+def _missing_outputs(directory, root_callers):
+    # outputs expected for each root caller but not found in the directory
+    return [f"{root_caller}.{suffix}" for root_caller in root_callers
+            for suffix in _suffixes
+            if not exists(sep.join([directory, f"{root_caller}.{suffix}"]))]
+
+
+def _case_missing_output_dir(tmp_dir):
+    # outputs written in an output directory that does not exist yet
+    out_dir = sep.join([tmp_dir, 'missing', 'outputs'])
+    _run(sep.join([_benchmarks, 'mini_jules']), ['snow_mod__snow'], [],
+         out_dir)
+    missing = _missing_outputs(out_dir, ['snow_mod__snow'])
+    if missing:
+        return f"{', '.join(missing)} not written"
+
+
+def _case_max_nodes_qualified_root(tmp_dir):
+    # root caller (member of a module) and its module kept as nodes even if
+    # only one node is requested
+    _run(sep.join([_benchmarks, 'mini_jules']), ['snow_mod__snow'],
+         ['--max_nodes', '1'], tmp_dir)
+    with open(sep.join([tmp_dir, 'snow_mod__snow.gv']), 'r') as f:
+        lines = f.read().splitlines()
+    missing = [node for node in ['snow_mod', 'snow_mod__snow']
+               if not any(line.startswith(f"\t{node} [") for line in lines)]
+    if missing:
+        return f"{', '.join(missing)} not in the call graph"
+
+
+def _case_diff_removed_use(tmp_dir):
+    # file dependency removed with a module used without only
+    source_dir = sep.join([tmp_dir, 'mini_jules'])
+    copytree(sep.join([_benchmarks, 'mini_jules']), source_dir)
+    filename = sep.join([source_dir, 'science', 'snow', 'snowtherm_mod.f90'])
+    with open(filename, 'r') as f:
+        text = f.read()
+    with open(filename, 'w') as f:
+        f.write(text.replace('USE water_constants_mod\n', ''))
+
+    removed = ['science/snow/snowtherm_mod.f90',
+               'params/standalone/water_constants_mod.f90']
+    reports = json.loads(
+        _run(source_dir, ['snow_mod__snow'],
+             ['-d', sep.join([_benchmarks, 'mini_jules']), '-n', '--json'],
+             sep.join([tmp_dir, 'outputs']))
+    )
+    for root_caller, report in reports.items():
+        if report['dependencies'] != {'added': [], 'removed': [removed]}:
+            return (f"dependencies of {root_caller} changed by "
+                    f"{report['dependencies']}")
+
+
+def _case_keywords_in_strings(tmp_dir):
+    # no statement found in character strings (even containing '!' or ';',
+    # or continued over several lines), but found after them
+    source_dir = sep.join([tmp_dir, 'src'])
+    makedirs(source_dir)
+    with open(sep.join([source_dir, 'strings_mod.f90']), 'w') as f:
+        f.write("MODULE strings_mod\n"
+                "CONTAINS\n"
+                "SUBROUTINE run()\n"
+                "  WRITE(*,*) 'hello ! CALL baz'\n"
+                "  WRITE(*,*) \"USE other_mod; CALL qux\"; CALL first()\n"
+                "  PRINT *, 'it''s &\n"
+                "  &CALL hidden()'\n"
+                "  CALL second() ! CALL comment\n"
+                "END SUBROUTINE run\n"
+                "SUBROUTINE first()\n"
+                "END SUBROUTINE first\n"
+                "SUBROUTINE second()\n"
+                "END SUBROUTINE second\n"
+                "END MODULE strings_mod\n")
+
+    _run(source_dir, ['strings_mod__run'], [], tmp_dir)
+    with open(sep.join([tmp_dir, 'strings_mod__run.gv']), 'r') as f:
+        edges = {line.split()[2] for line in f.read().splitlines()
+                 if line.startswith('\tstrings_mod__run -> ')}
+    if edges != {'strings_mod__first', 'strings_mod__second'}:
+        return f"calls to {', '.join(sorted(edges))} found"
+
+
+# targeted checks of the command line interface and of edge cases, each
+# returning the description of its failure (if any)
+_cases = {
+    'missing output directory': _case_missing_output_dir,
+    'max nodes with qualified root': _case_max_nodes_qualified_root,
+    'diff with removed use': _case_diff_removed_use,
+    'keywords in strings': _case_keywords_in_strings
+}
+
+
+def check_cases():
+    # run each targeted check in a directory of its own and return the
+    # failures
+    failures = []
+    for name, case in _cases.items():
+        with TemporaryDirectory() as tmp_dir:
+            try:
+                failure = case(tmp_dir)
+            except RuntimeError as error:
+                failure = str(error)
+        status = 'ok' if failure is None else 'FAILED'
+        print(f"{'cases':<26}{name:<32}{status}")
+        if failure is not None:
+            print(f"  {failure}")
+            failures.append(('cases', name, failure))
+    return failures
+
+
+if __name__ == '__main__':
+    # terminal interface
+    parser = argparse.ArgumentParser(
+        description="run the call grapher over a bundled miniature JULES-like "
+                    "tree and over generated trees, with several options and "
+                    "in each of its fast paths (parallel parsing, cache, "
+                    "compact representation, batch, snapshot), and compare "
+                    "the results of the parsing and the outputs with golden "
+                    "files (in any order where the order is not significant)"
+    )
+
+    parser.add_argument('corpora',
+                        type=str,
+                        nargs='*',
+                        help="name(s) of the corpora to check (among {}), "
+                             "or cases for the targeted checks of the command "
+                             "line interface and of edge cases - default to "
+                             "all".format(', '.join(_corpora)))
+    parser.add_argument('--update',
+                        dest='update',
+                        action='store_true',
+                        help="option to store the outputs of the baseline as "
+                             "the new golden files (checking the fast paths "
+                             "against them)")
+    parser.set_defaults(update=False)
+
+    args = parser.parse_args()
+
+    for _corpus in args.corpora:
+        if (_corpus not in _corpora) and (_corpus != 'cases'):
+            parser.error(f"unknown corpus {_corpus}")
+
+    _failures = []
+    for _corpus in args.corpora or [*_corpora, 'cases']:
+        if _corpus == 'cases':
+            _failures.extend(check_cases())
+            continue
+        _parameters, _root_callers = _corpora[_corpus]
+        if _parameters is None:
+            _failures.extend(
+                check(_corpus, sep.join([_benchmarks, _corpus]), _root_callers,
+                      args.update)
+            )
+        else:
+            with TemporaryDirectory() as _tmp_dir:
+                generate_corpus(_tmp_dir, **_parameters)
+                _failures.extend(
+                    check(_corpus, _tmp_dir, _root_callers, args.update)
+                )
+
+    if args.update:
+        print(f"golden files stored in {_golden_dir}")
+    if _failures:
+        print(f"{len(_failures)} difference(s) with the golden files")
+        raise SystemExit(1)
+    print("outputs identical to the golden files")
@@ -1,8 +1,19 @@
-from glob import glob
-from os import sep
+from collections import OrderedDict, deque
+from itertools import chain, repeat
+from array import array
+from fnmatch import fnmatchcase
+from io import StringIO
+from os import sep, cpu_count, makedirs, scandir, stat, unlink
+from os.path import commonpath, dirname, exists, isfile, relpath, splitext
+import resource
+import json
+import time
+import sys
 import re
-import graphviz as gv
-import argparse
+
+# modules only needed by some of the features (i.e. parallelism, cache,
+# compressed snapshots, server, profiling, rendering) are imported when
+# first needed, so that the tool starts quickly without them
 
 
 _intrinsic_fortran = [
@@ -15,585 +26,3612 @@ _intrinsic_fortran = [
     'random_seed'
 ]
 
-# priorities to give in compilation to avoid missing dependencies
-# (keys are the priorities, optional values are lower-order priorities
-#  that need to be checked because the key name is included in the name
-#  of the value and could trigger a false positive)
-_priorities = {
-    'drhook_dummy': None,
-    'mpi_dummy': None,
-    'netcdf_dummy': None,
-    'params': 'science/params',
-    'util': None,
-    'io': None,
-    'control': None,
-    'initialisation': None,
-    'science/params': None,
-    'science': None
-}
+# name of the files listing patterns of files and directories to skip
+# when searching for Fortran files (one pattern per line)
+_ignore_file = '.callgraphignore'
+
+# extensions (in lower case) of fixed-form source code, whose comments (in
+# the first column) and continuations (in the sixth column) the parser does
+# not handle, hence never searched for
+_fixed_form_extensions = {'f', 'for', 'ftn', 'f77'}
+
+# number of files sent at once to each parsing worker when the files are
+# parsed as they are found
+_stream_chunksize = 8
+
+# version of the parsed results stored in the cache (to be incremented
+# each time a change in the parsing modifies the results)
+_cache_version = 6
+
+# version of the format of the graph snapshots (to be incremented each
+# time a change in the parsing or in the format modifies the snapshots)
+_graph_version = 4
+
+# size of the buffers of the files written (e.g. sources and dependencies
+# files, which may be long for large source code)
+_buffer_size = 2 ** 20
+
+# suffixes of the dependencies files in each of the formats supported
+_dependencies_suffixes = {
+    'make': 'dependencies',
+    'json': 'dependencies.json',
+    'ninja': 'ninja',
+    'cmake': 'cmake'
+}
+
+# formatting of the call graphs
+_membership_attrs = {
+    'arrowhead': 'none',
+    'arrowtail': 'diamond'
+}
+
+_node_attrs = {
+    'PROGRAM': {
+        'shape': 'parallelogram',
+        'style': 'filled',
+        'fillcolor': 'grey'
+    },
+    'MODULE': {
+        'style': 'filled',
+        'fillcolor': 'grey'
+    },
+    'SUBROUTINE': {
+        'style': 'filled',
+        'fillcolor': 'transparent'
+    },
+    'FUNCTION': {
+        'style': 'filled',
+        'fillcolor': 'transparent'
+    },
+    # generic interface assimilated as subroutine/function
+    'GENERIC_INTERFACE': {
+        'style': 'filled',
+        'fillcolor': 'transparent'
+    },
+    'TYPE': {
+        'style': 'rounded',
+        'fillcolor': 'transparent'
+    },
+    'VARIABLE': {
+        'style': 'diagonals',
+        'fillcolor': 'transparent'
+    }
+}
+
+# nodes whose callees or members were left out of a truncated call graph
+_truncated_attrs = {
+    'peripheries': '2',
+    'color': 'red'
+}
+
+# number of parts of call graphs whose dot source is kept in memory, and
+# in the cache file (see FragmentCache)
+_fragments_size = 8192
+_fragments_disk_size = 131072
+
+# columns of the metrics of each entity (see call_graph_metrics)
+_metrics_columns = ['name', 'kind', 'file', 'fan_in', 'fan_out', 'closure',
+                    'dependents', 'cycle', 'reached', 'users']
+
+# symbols and calls added and removed in a call graph difference
+_added_attrs = {
+    'color': 'green4',
+    'fontcolor': 'green4',
+    'penwidth': '2'
+}
+
+_removed_attrs = {
+    'color': 'red',
+    'fontcolor': 'red',
+    'penwidth': '2',
+    'style': 'dashed'
+}
+
+_graph_attrs = {
+    'engine': 'dot',
+    'graph_attr': {
+        'rankdir': 'LR',
+        'style': 'dotted'
+    },
+    # default edge
+    'edge_attr': {
+        'dir': 'both',
+        'arrowhead': 'normal',
+        'arrowtail': 'none'
+    },
+    # default node
+    'node_attr': {
+        'shape': 'box',
+        'fontname': 'Helvetica'
+    }
+}
+
+# keywords at least one of which must be found in a line for it to
+# contain any of the statements of interest to the parser
+_keywords = re.compile(r"SUBROUTINE|FUNCTION|INTERFACE|PROGRAM|MODULE|TYPE|USE|CALL")
+
+# interface statements (in order of precedence)
+_end_interface = re.compile(r"(END +INTERFACE *)([0-9A-Za-z_]*)")
+_operator_interface = re.compile(r"(INTERFACE +)(operator *\()")
+_assignment_interface = re.compile(r"(INTERFACE +)(assignment *\()")
+_generic_interface = re.compile(r"(INTERFACE +)([0-9A-Za-z_]+)")
+_explicit_interface = re.compile(r"(INTERFACE *)")
+
+# other statements (in order of precedence, each with a keyword that
+# must be in the line for its pattern to possibly match)
+_statements = [
+    ('END PROGRAM', 'PROGRAM', re.compile(r"(END +PROGRAM +)([0-9A-Za-z_]+)")),
+    ('PROGRAM', 'PROGRAM', re.compile(r"(PROGRAM +)([0-9A-Za-z_]+)")),
+    ('END MODULE', 'MODULE', re.compile(r"(END +MODULE +)([0-9A-Za-z_]+)")),
+    ('MODULE', 'MODULE', re.compile(r"(MODULE +)([0-9A-Za-z_]+)")),
+    ('END TYPE', 'TYPE', re.compile(r"(END +TYPE +)([0-9A-Za-z_]*)")),
+    ('TYPE', 'TYPE', re.compile(r"(TYPE +)([0-9A-Za-z_]+)")),
+    ('END SUBROUTINE', 'SUBROUTINE', re.compile(r"(END +SUBROUTINE +)([0-9A-Za-z_]+)")),
+    ('SUBROUTINE', 'SUBROUTINE', re.compile(r"(SUBROUTINE +)([0-9A-Za-z_]+)")),
+    ('END FUNCTION', 'FUNCTION', re.compile(r"(END +FUNCTION +)([0-9A-Za-z_]+)")),
+    ('FUNCTION', 'FUNCTION', re.compile(r"(FUNCTION +)([0-9A-Za-z_]+)")),
+    ('USE', 'USE', re.compile(r"(USE +)([0-9A-Za-z_]+)( *, *ONLY *:)([0-9A-Za-z_,+\-*/=><() ]+)")),
+    # use of all the public entities of a module (with some renamed)
+    ('USE ALL', 'USE', re.compile(r"(USE +)([0-9A-Za-z_]+) *(,|$)")),
+    ('CALL', 'CALL', re.compile(r"(CALL +)([0-9A-Za-z_]+)"))
+]
+
+# name of a type being closed (may be empty)
+_end_type_name = re.compile(r"(END +TYPE *)([0-9A-Za-z_]*)")
+
+# definitions of subroutines and functions
+_subroutine = _statements[7][2]
+_function = _statements[9][2]
+
+# markers in the arrays of the compact representation of the results of
+# the parsing (for no kind, no file, no parent, and no single parent)
+_no_kind = -1
+_no_location = -1
+_no_parent = -1
+_split_error = -2
+
+
+def _split_statements(line, quote=None):
+    # split a line (starting within a character string opened with the
+    # given quote, if any) into the statements it contains separated by
+    # ';', removing any comment (i.e. from a '!' outside character strings)
+    # and the contents of the character strings (e.g. 'CALL foo' becoming
+    # '', so that no statement is found in them), and return them with the
+    # quote of the character string left open at the end of the line (if
+    # any, the line then still ending with '&' if continued)
+    statements = []
+    parts = []
+    start = 0
+    for i, c in enumerate(line):
+        if quote:
+            if c == quote:
+                quote = None
+                start = i
+        elif (c == "'") or (c == '"'):
+            quote = c
+            parts.append(line[start:i + 1])
+        elif c == '!':
+            parts.append(line[start:i])
+            break
+        elif c == ';':
+            parts.append(line[start:i])
+            statements.append(''.join(parts))
+            parts = []
+            start = i + 1
+    else:
+        if quote is None:
+            parts.append(line[start:])
+        elif line.rstrip().endswith('&'):
+            parts.append('&')
+    statements.append(''.join(parts))
+    return statements, quote
+
+
+def _logical_lines(fortran_file, counts=None):
+    # yield the logical lines of a file with their line number (i.e. the
+    # number of the last physical line they span), i.e. the statements
+    # (separated by ';') with comments removed and lines wrapped using '&'
+    # (at the end of a line, and optionally at the start of the next one)
+    # unwrapped, and the contents of character strings removed (see
+    # _split_statements), in one pass over the physical lines (counted once
+    # all read if counts are given)
+    pieces = []
+    quote = None
+
+    i = -1
+    with open(fortran_file, 'r') as f:
+        for i, line in enumerate(f):
+            stripped = line.strip()
+
+            # ignore blank and commented lines (even between continued
+            # lines, noting that an empty string is in any string)
+            if stripped[:1] in '!#':
+                continue
+
+            # most lines are a single statement on its own without any
+            # character string
+            if not pieces:
+                if '!' in stripped:
+                    code = stripped[:stripped.index('!')]
+                    if ("'" not in code) and ('"' not in code) and (
+                            ';' not in code) and ('&' not in code):
+                        yield i + 1, code
+                        continue
+                elif ("'" not in stripped) and ('"' not in stripped) and (
+                        ';' not in stripped) and (stripped[-1] != '&'):
+                    yield i + 1, stripped
+                    continue
+
+            # drop '&' starting a continued line
+            if pieces and (stripped[0] == '&'):
+                stripped = stripped[1:]
+
+            if (quote is None) and ("'" not in stripped) and (
+                    '"' not in stripped):
+                # no character string, so '!' and ';' can be looked for as is
+                if '!' in stripped:
+                    stripped = stripped[:stripped.index('!')]
+                statements = stripped.split(';')
+            else:
+                statements, quote = _split_statements(stripped, quote)
+
+            # unwrap continued lines
+            last = statements[-1].rstrip()
+            continued = last.endswith('&')
+            if continued:
+                statements[-1] = last[:-1]
+            else:
+                quote = None
+
+            for statement in statements[:-1]:
+                pieces.append(statement)
+                statement = ' '.join(pieces)
+                pieces = []
+                if statement and not statement.isspace():
+                    yield i + 1, statement
+
+            pieces.append(statements[-1])
+            if not continued:
+                statement = ' '.join(pieces)
+                pieces = []
+                if statement and not statement.isspace():
+                    yield i + 1, statement
+
+    if counts is not None:
+        counts['physical lines'] += i + 1
+
+
+def _classify(line):
+    # find the statement of highest precedence in the line (if any)
+    for statement, keyword, pattern in _statements:
+        if keyword in line:
+            match = pattern.search(line)
+            if match:
+                return statement, match
+    return None, None
+
+
+def parse_fortran_file(fortran_file, sep_):
+    # parse one file (in a single pass over its lines, counting its lines
+    # and the statements found, see count_statements)
+    locations = {}
+    # line numbers of the definitions
+    lines = {}
+    caller_callees = {}
+    memberships = {}
+    # assignments of kinds in order of appearance
+    kinds = []
+
+    # internal subroutines and functions
+    internal = set()
+    # calls whose callee belongs to the file only if the callee is internal,
+    # which may only be known once the whole file has been read
+    pending = []
+    # variable or subroutine/function renaming using '=>'
+    renaming = {}
+    # store name of modules from use to append in call
+    use_to_call = {}
+    # to know if we are in an interface block
+    in_interface = False
+    # to store current location in tree view
+    breadcrumbs = []
+    scope = ''
+    # numbers of lines and of matches for each category of statement
+    counts = {'physical lines': 0, 'logical lines': 0, 'keyword lines': 0,
+              'INTERFACE': 0}
+    counts.update((statement, 0) for statement, _, _ in _statements)
+
+    for lineno, line in _logical_lines(fortran_file, counts):
+        counts['logical lines'] += 1
+        # most lines (e.g. assignments) do not contain any statement of interest
+        if not _keywords.search(line):
+            continue
+        counts['keyword lines'] += 1
+
+        # find out which functions/subroutines are internal
+        match = _subroutine.search(line) if 'SUBROUTINE' in line else None
+        if not match and 'FUNCTION' in line:
+            match = _function.search(line)
+        if match:
+            internal.add(match.group(2).lower())
+
+        # find interfaces
+        if 'INTERFACE' in line:
+            counts['INTERFACE'] += 1
+            match = _end_interface.search(line)
+            if match:
+                name = match.group(2).lower()
+                if not in_interface:
+                    raise RuntimeError("'END INTERFACE' found without 'INTERFACE': "
+                                       "{} in {} #L{}".format(name, fortran_file, lineno))
+                else:
+                    in_interface = False
+            elif in_interface in ['operator', 'assignment', 'generic']:
+                # ignore these type of interfaces
+                continue
+            elif _operator_interface.search(line):
+                # ignore interface since overloaded operator on type
+                in_interface = 'operator'
+            elif _assignment_interface.search(line):
+                # ignore interface since overloaded assignment on type
+                in_interface = 'assignment'
+            else:
+                match = _generic_interface.search(line)
+                if match:
+                    name = match.group(2).lower()
+                    if breadcrumbs:
+                        if breadcrumbs[-1] not in memberships:
+                            memberships[breadcrumbs[-1]] = []
+                        memberships[breadcrumbs[-1]].append(name)
+                    kinds.append((sep_.join(breadcrumbs + [name]), 'GENERIC_INTERFACE'))
+                    locations[sep_.join(breadcrumbs + [name])] = fortran_file
+                    lines[sep_.join(breadcrumbs + [name])] = lineno
+                    # ignore interface since also defined elsewhere
+                    in_interface = 'generic'
+                elif _explicit_interface.search(line):
+                    # proceed as if not in an interface
+                    in_interface = 'explicit'
+        elif in_interface in ['operator', 'assignment', 'generic']:
+            # ignore these type of interfaces
+            continue
+
+        statement, match = _classify(line)
+
+        if statement is None:
+            continue
+        counts[statement] += 1
+
+        # find programs, modules, types, subroutines, and functions
+        if statement.startswith('END'):
+            if statement == 'END TYPE':
+                name = _end_type_name.search(line).group(2).lower()
+            else:
+                name = match.group(2).lower()
+            kind = statement[4:]
+            if breadcrumbs and (name == breadcrumbs[-1]):
+                breadcrumbs.pop(-1)
+                scope = sep_.join(breadcrumbs)
+                if breadcrumbs and kind in ['PROGRAM', 'MODULE']:
+                    raise RuntimeError("'{}' closed but remainder: "
+                                       "{} in {} #L{}".format(kind, name, fortran_file, lineno))
+            elif kind == 'PROGRAM':
+                raise RuntimeError("'END PROGRAM' found without 'program': "
+                                   "{} in {} #L{}".format(name, fortran_file, lineno))
+            else:
+                raise RuntimeError("'END {0}' found without '{0}': "
+                                   "{1} in {2} #L{3}".format(kind, name, fortran_file, lineno))
+
+        elif statement in ['PROGRAM', 'MODULE']:
+            name = match.group(2).lower()
+            breadcrumbs.append(name)
+            scope = sep_.join(breadcrumbs)
+            kinds.append((scope, statement))
+            locations[scope] = fortran_file
+            lines[scope] = lineno
+
+        elif statement in ['TYPE', 'SUBROUTINE', 'FUNCTION']:
+            name = match.group(2).lower()
+            if breadcrumbs:
+                if breadcrumbs[-1] not in memberships:
+                    memberships[breadcrumbs[-1]] = []
+                memberships[breadcrumbs[-1]].append(name)
+            breadcrumbs.append(name)
+            scope = sep_.join(breadcrumbs)
+            kinds.append((scope, statement))
+            locations[scope] = fortran_file
+            lines[scope] = lineno
+
+        # find use statements
+        elif statement == 'USE':
+            module = match.group(2).lower()
+            for name in match.group(4).lower().split(','):
+                name = name.strip()
+                if name:
+                    if scope not in caller_callees:
+                        caller_callees[scope] = []
+                    if '=>' in name:
+                        name1, name2 = name.split('=>')
+                        caller_callees[scope].append(
+                            sep_.join([module, name2.strip()])
+                        )
+                        # store renaming
+                        renaming[name1.strip()] = name2.strip()
+                        # store module name
+                        use_to_call[name1.strip()] = module
+                    else:
+                        caller_callees[scope].append(
+                            sep_.join([module, name])
+                        )
+                        # store module name
+                        use_to_call[name] = module
+
+        # find use statements without only, the module itself being
+        # recorded as used, so that calls to the entities it exports can
+        # be resolved once all modules are known (see merge_parse_results)
+        elif statement == 'USE ALL':
+            module = match.group(2).lower()
+            if scope not in caller_callees:
+                caller_callees[scope] = []
+            caller_callees[scope].append(module)
+            kinds.append((module, 'MODULE'))
+            for name in line[match.end():].lower().split(','):
+                if '=>' in name:
+                    name1, name2 = name.split('=>')
+                    caller_callees[scope].append(
+                        sep_.join([module, name2.strip()])
+                    )
+                    # store renaming
+                    renaming[name1.strip()] = name2.strip()
+                    # store module name
+                    use_to_call[name1.strip()] = module
+
+        # find call statements
+        elif statement == 'CALL':
+            name = match.group(2).lower()
+            if scope not in caller_callees:
+                caller_callees[scope] = []
+            # determine belonging of callee
+            if name in use_to_call:
+                # it is within another namespace in another file
+                root = use_to_call[name]
+                # rename if required
+                if name in renaming:
+                    name = renaming[name]
+            elif breadcrumbs and (name not in internal):
+                # it is either in the given file (if found to be internal
+                # further down) or in another file outside any namespace
+                pending.append(
+                    (caller_callees[scope], len(caller_callees[scope]),
+                     len(kinds), breadcrumbs[0], name)
+                )
+                root = None
+            elif breadcrumbs:
+                # it is within the namespace in the given file
+                # (assuming only one namespace per file, which
+                #  seems to be a reasonable assumption for JULES)
+                root = breadcrumbs[0]
+            else:
+                # it is outside any namespace
+                root = ''
+            callee = sep_.join([root, name]) if root else name
+            caller_callees[scope].append(callee)
+            # add call to subroutine kind (even if it may
+            # already be in there, this makes sure calls to
+            # external modules are picked up)
+            kinds.append((callee, 'SUBROUTINE'))
+
+    # resolve the calls that were pending until all internal
+    # subroutines and functions of the file were known
+    for callees, index, position, root, name in pending:
+        if name in internal:
+            callee = sep_.join([root, name])
+            callees[index] = callee
+            kinds[position] = (callee, 'SUBROUTINE')
+
+    return caller_callees, memberships, dict(kinds), locations, lines, counts
+
+
+def count_statements(results):
+    # number of physical and logical lines in the files, of logical lines
+    # containing any of the keywords, and of matches for each category of
+    # statement (each logical line counting for its statement of highest
+    # precedence only, and only outside the interfaces that the parsing
+    # ignores), from the results of the parsing of the individual files
+    # (hence also for files whose results are taken from the cache)
+    counts = {}
+    for result in results:
+        for name, count in result[5].items():
+            counts[name] = counts.get(name, 0) + count
+    return counts
+
+
+def build_export_index(memberships, kinds):
+    # entities of each module (i.e. its subroutines, functions, generic
+    # interfaces, types, and variables, public or not) in sets for constant
+    # time look-ups
+    return {
+        module: set(members) for module, members in memberships.items()
+        if kinds.get(module) == 'MODULE'
+    }
+
+
+def resolve_calls(caller_callees, memberships, kinds, locations, sep_='__',
+                  exports=None):
+    # qualify the calls to entities not known to be in any module (i.e.
+    # neither imported using only, nor internal to the file of the caller)
+    # with the module exporting them among the modules used without only
+    # by the caller or by any of the entities containing it (the closest
+    # first), updating the results of the parsing in place (and removing
+    # the modules recorded as used from the callees, so that they are not
+    # nodes of the call graphs), and return the modules used without only
+    # in each scope (see add_module_uses)
+    if exports is None:
+        exports = build_export_index(memberships, kinds)
+
+    # modules used without only in each scope
+    used = {}
+    for caller, callees in caller_callees.items():
+        modules = [callee for callee in callees
+                   if (sep_ not in callee) and (kinds.get(callee) == 'MODULE')]
+        if modules:
+            used[caller] = list(dict.fromkeys(modules))
+            callees[:] = [callee for callee in callees
+                          if callee not in modules]
+
+    # forget about the scopes only recorded for the modules they use
+    for caller in used:
+        if not caller_callees[caller]:
+            del caller_callees[caller]
+    if not used:
+        return used
+
+    resolved = set()
+    for caller, callees in caller_callees.items():
+        # modules used by the caller and by the entities containing it
+        parts = caller.split(sep_)
+        modules = []
+        for i in range(len(parts), 0, -1):
+            modules.extend(module for module in used.get(sep_.join(parts[:i]), ())
+                           if module in exports)
+        if not modules:
+            continue
+
+        for position, callee in enumerate(callees):
+            if sep_ in callee:
+                continue
+            for module in modules:
+                if callee in exports[module]:
+                    qualified = sep_.join([module, callee])
+                    callees[position] = qualified
+                    if qualified not in kinds:
+                        kinds[qualified] = kinds.get(callee, 'SUBROUTINE')
+                    resolved.add(callee)
+                    break
+
+    # forget about modules outside of the source code, and about entities
+    # only known from calls that were all resolved
+    remaining = {callee for callees in caller_callees.values()
+                 for callee in callees if sep_ not in callee}
+    unknown = {module for modules in used.values() for module in modules
+               if module not in exports}
+    for name in (resolved - remaining) | unknown:
+        if (name not in locations) and (name not in caller_callees):
+            kinds.pop(name, None)
+
+    return used
+
+
+def merge_parse_results(results, line_numbers=False, sep_='__',
+                        counts=False):
+    # combine the results of the parsing of individual files (in the
+    # order the files are given, later files taking precedence for
+    # the kind and the location of an entity), with the calls through
+    # modules used without only resolved, followed by the modules used
+    # without only in each scope (see resolve_calls), by the line numbers
+    # of the definitions only if requested, and by the numbers of lines
+    # and statements of the files (see count_statements) only if requested
+    locations = {}
+    caller_callees = {}
+    memberships = {}
+    kinds = {}
+    lines = {}
+
+    results = list(results) if counts else results
+
+    for (file_caller_callees, file_memberships, file_kinds, file_locations,
+         file_lines, _) in results:
+        for caller, callees in file_caller_callees.items():
+            if caller not in caller_callees:
+                caller_callees[caller] = []
+            caller_callees[caller].extend(callees)
+        for parent, members in file_memberships.items():
+            if parent not in memberships:
+                memberships[parent] = []
+            memberships[parent].extend(members)
+        kinds.update(file_kinds)
+        locations.update(file_locations)
+        lines.update(file_lines)
+
+    uses = resolve_calls(caller_callees, memberships, kinds, locations, sep_)
+
+    merged = (caller_callees, memberships, kinds, locations, uses)
+    if line_numbers:
+        merged += (lines,)
+    if counts:
+        merged += (count_statements(results),)
+    return merged
+
+
+def _parse_each(fortran_files, sep_, jobs):
+    # parse files individually (in parallel if several jobs are requested),
+    # with the files given either as a list or as an iterator (e.g. to parse
+    # them as they are found)
+    if jobs < 1:
+        jobs = cpu_count() or 1
+
+    streamed = not isinstance(fortran_files, list)
+
+    if jobs == 1 or not (streamed or len(fortran_files) > 1):
+        return [parse_fortran_file(fortran_file, sep_)
+                for fortran_file in fortran_files]
+
+    # results are collected in the order the files are given whatever
+    # the order in which the workers complete, so that the merge (hence
+    # the outputs) do not depend on the number of workers (with files
+    # submitted to the workers as they are given)
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(
+            executor.map(
+                parse_fortran_file, fortran_files, repeat(sep_),
+                chunksize=_stream_chunksize if streamed else max(
+                    1, len(fortran_files) // (4 * jobs)
+                )
+            )
+        )
+
+
+def _digest(fortran_file):
+    import hashlib
+
+    with open(fortran_file, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _parse_each_cached(fortran_files, sep_, jobs, cache_file,
+                       source_dir=None):
+    # parse only the files that are not in the cache or that changed since
+    # they were cached, and forget about files that no longer exist (only
+    # among those in the source directory the files were found in, if
+    # given, so that the files of other source trees sharing the cache are
+    # kept, e.g. those of an earlier version compared using --diff)
+    import sqlite3
+
+    with sqlite3.connect(cache_file) as db:
+        db.execute("CREATE TABLE IF NOT EXISTS meta "
+                   "(key TEXT PRIMARY KEY, value TEXT)")
+        db.execute("CREATE TABLE IF NOT EXISTS files "
+                   "(path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, "
+                   "digest TEXT, result TEXT)")
+
+        # discard cache built by another version or with another separator
+        meta = dict(db.execute("SELECT key, value FROM meta"))
+        if meta != {'version': str(_cache_version), 'sep': sep_}:
+            db.execute("DELETE FROM files")
+            db.execute("DELETE FROM meta")
+            db.executemany("INSERT INTO meta VALUES (?, ?)",
+                           [('version', str(_cache_version)), ('sep', sep_)])
+
+        cached = {
+            path: (size, mtime, digest, result)
+            for path, size, mtime, digest, result in db.execute(
+                "SELECT path, size, mtime, digest, result FROM files"
+            )
+        }
+
+        results = {}
+        touched = []
+        to_parse = []
+        for fortran_file in fortran_files:
+            status = stat(fortran_file)
+            if fortran_file in cached:
+                size, mtime, digest, result = cached[fortran_file]
+                if (size, mtime) == (status.st_size, status.st_mtime_ns):
+                    results[fortran_file] = json.loads(result)
+                    continue
+                elif size == status.st_size:
+                    # file touched but content may be unchanged
+                    if digest == _digest(fortran_file):
+                        results[fortran_file] = json.loads(result)
+                        touched.append((status.st_mtime_ns, fortran_file))
+                        continue
+            to_parse.append(fortran_file)
+
+        # update modification times of files touched but unchanged
+        db.executemany("UPDATE files SET mtime = ? WHERE path = ?", touched)
+
+        # parse new or changed files and store their results
+        rows = []
+        for fortran_file, result in zip(
+                to_parse, _parse_each(to_parse, sep_, jobs)):
+            results[fortran_file] = result
+            status = stat(fortran_file)
+            rows.append(
+                (fortran_file, status.st_size, status.st_mtime_ns,
+                 _digest(fortran_file), json.dumps(result))
+            )
+        db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                       rows)
+
+        # forget about deleted files
+        deleted = set(cached) - set(results)
+        if source_dir is not None:
+            top = source_dir.rstrip(sep) or sep
+            prefix = top if top.endswith(sep) else top + sep
+            deleted = {path for path in deleted if path.startswith(prefix)}
+        db.executemany("DELETE FROM files WHERE path = ?",
+                       [(path,) for path in deleted])
+
+    db.close()
+
+    return [results[fortran_file] for fortran_file in fortran_files]
+
+
+def _ignore_patterns(lines, base):
+    # patterns of files or directories to skip (relative to the base
+    # directory if containing a '/', otherwise matching names at any depth,
+    # and matching only directories if ending with a '/')
+    patterns = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            dir_only = line.endswith('/')
+            line = line.strip('/')
+            patterns.append((base, line, '/' in line, dir_only))
+    return patterns
+
+
+def _ignored(relative, name, is_dir, patterns):
+    for base, pattern, anchored, dir_only in patterns:
+        if dir_only and not is_dir:
+            continue
+        if anchored:
+            if base:
+                if not relative.startswith(base + '/'):
+                    continue
+                path = relative[len(base) + 1:]
+            else:
+                path = relative
+            if fnmatchcase(path, pattern):
+                return True
+        elif fnmatchcase(name, pattern):
+            return True
+    return False
+
+
+def walk_fortran_files(source_dir, extensions=('f90',), exclude=None):
+    # yield the paths of the files with any of the given extensions
+    # (case-sensitive) in the source directory and its sub-directories as
+    # they are found, in the same order as glob (i.e. the files of each
+    # directory before those of its sub-directories, skipping hidden files
+    # and directories), without entering the files or directories matching
+    # any of the patterns to exclude or those listed in the .callgraphignore
+    # files found on the way (each applying to the directory it is in), and
+    # ignoring the extensions of fixed-form source code
+    suffixes = tuple('.' + extension for extension in extensions
+                     if extension.lower() not in _fixed_form_extensions)
+
+    top = source_dir.rstrip(sep) or sep
+    stack = [(top, '', _ignore_patterns(exclude or (), ''))]
+
+    while stack:
+        directory, relative, patterns = stack.pop()
+
+        try:
+            with scandir(directory) as it:
+                entries = [entry for entry in it if not entry.name.startswith('.')
+                           or entry.name == _ignore_file]
+        except OSError:
+            # e.g. permission denied, or directory removed in the meantime
+            continue
+
+        for entry in entries:
+            if entry.name == _ignore_file:
+                with open(entry.path, 'r') as f:
+                    patterns = patterns + _ignore_patterns(f, relative)
+
+        sub_directories = []
+        for entry in entries:
+            if entry.name == _ignore_file:
+                continue
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            path = '/'.join([relative, entry.name]) if relative else entry.name
+            if _ignored(path, entry.name, is_dir, patterns):
+                continue
+            if is_dir:
+                sub_directories.append((entry.path, path, patterns))
+            elif entry.name.endswith(suffixes):
+                yield entry.path
+
+        # sub-directories in reverse order so that the first is entered first
+        stack.extend(reversed(sub_directories))
+
+
+def _recording(iterable, record):
+    # yield the items of the iterable, also appending them to the record
+    for item in iterable:
+        record.append(item)
+        yield item
+
+
+def parse_fortran_files(fortran_files, sep_, jobs=1, cache_file=None,
+                        line_numbers=False, source_dir=None, counts=False):
+    # parse files (in parallel if several jobs are requested, and only
+    # those not already parsed in the cache if a cache file is given),
+    # with the files given either as a list or as an iterator (found in
+    # the source directory, if given, see _parse_each_cached)
+    if cache_file:
+        results = _parse_each_cached(list(fortran_files), sep_, jobs,
+                                     cache_file, source_dir)
+    else:
+        results = _parse_each(fortran_files, sep_, jobs)
+
+    return merge_parse_results(results, line_numbers, sep_, counts)
+
+
+def update_parse_results(fortran_files, sep_, results=None, jobs=1):
+    # parse only the files that are new or that were modified since they
+    # were parsed in the given results (mapping each file to its size and
+    # modification time at the time of parsing and to its parse result),
+    # and forget about the files no longer given
+    results = dict(results) if results else {}
+
+    to_parse = []
+    statuses = []
+    for fortran_file in fortran_files:
+        try:
+            status = stat(fortran_file)
+        except FileNotFoundError:
+            # deleted since found
+            continue
+        if (fortran_file not in results) or (
+                results[fortran_file][0] != (status.st_size, status.st_mtime_ns)):
+            to_parse.append(fortran_file)
+            statuses.append((status.st_size, status.st_mtime_ns))
+
+    removed = set(results).difference(fortran_files)
+    for fortran_file in removed:
+        del results[fortran_file]
+
+    for fortran_file, status, result in zip(
+            to_parse, statuses, _parse_each(to_parse, sep_, jobs)):
+        results[fortran_file] = status, result
+
+    return results, removed.union(to_parse)
+
+
+def _open_graph(filename, mode):
+    # open snapshot file (compressed if its name ends with .gz)
+    if filename.endswith('.gz'):
+        import gzip
+
+        return gzip.open(filename, mode + 't', encoding='utf-8')
+    return open(filename, mode, encoding='utf-8')
+
+
+def export_graph(filename, caller_callees, memberships, kinds, locations,
+                 uses, lines, sep_):
+    # store the results of the parsing (with the modules used without only
+    # and the line numbers of the definitions) in JSON format, with each
+    # name and each file stored once in tables and referred to by their
+    # positions in these tables (with the orders and the duplicates of the
+    # results kept as they are)
+    names = {}
+    files = {}
+
+    def name_id(name):
+        if name not in names:
+            names[name] = len(names)
+        return names[name]
+
+    def file_id(file_):
+        if file_ not in files:
+            files[file_] = len(files)
+        return files[file_]
+
+    kind_codes = {kind: code for code, kind in enumerate(_node_attrs)}
+
+    snapshot = {
+        'format': 'callgrapher-graph',
+        'version': _graph_version,
+        'sep': sep_,
+        'caller_callees': [
+            [name_id(caller), [name_id(callee) for callee in callees]]
+            for caller, callees in caller_callees.items()
+        ],
+        'memberships': [
+            [name_id(parent), [name_id(member) for member in members]]
+            for parent, members in memberships.items()
+        ],
+        'kinds': [[name_id(name), kind_codes[kind]]
+                  for name, kind in kinds.items()],
+        'locations': [[name_id(name), file_id(file_)]
+                      for name, file_ in locations.items()],
+        'uses': [
+            [name_id(scope), [name_id(module) for module in modules]]
+            for scope, modules in uses.items()
+        ],
+        'lines': [[name_id(name), line] for name, line in lines.items()]
+    }
+    snapshot['names'] = list(names)
+    snapshot['files'] = list(files)
+    snapshot['kind_names'] = list(kind_codes)
+
+    with _open_graph(filename, 'w') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+
+
+def load_graph(filename, sep_):
+    # load the results of the parsing (with the modules used without only
+    # and the line numbers of the definitions) stored using export_graph
+    with _open_graph(filename, 'r') as f:
+        snapshot = json.load(f)
+
+    if (snapshot.get('format') != 'callgrapher-graph') or (
+            snapshot.get('version') != _graph_version):
+        raise RuntimeError(
+            f"{filename} is not a graph snapshot in version {_graph_version}"
+        )
+    if snapshot['sep'] != sep_:
+        raise RuntimeError(
+            f"{filename} uses '{snapshot['sep']}' as separator instead of '{sep_}'"
+        )
+
+    names = snapshot['names']
+    files = snapshot['files']
+    kind_names = snapshot['kind_names']
+
+    caller_callees = {
+        names[caller]: [names[callee] for callee in callees]
+        for caller, callees in snapshot['caller_callees']
+    }
+    memberships = {
+        names[parent]: [names[member] for member in members]
+        for parent, members in snapshot['memberships']
+    }
+    kinds = {names[name]: kind_names[kind] for name, kind in snapshot['kinds']}
+    locations = {names[name]: files[file_]
+                 for name, file_ in snapshot['locations']}
+    uses = {
+        names[scope]: [names[module] for module in modules]
+        for scope, modules in snapshot['uses']
+    }
+    lines = {names[name]: line for name, line in snapshot['lines']}
+
+    return caller_callees, memberships, kinds, locations, uses, lines
+
+
+def build_call_graph(root_caller, caller_callees, memberships, kinds,
+                     sep_, ignore=None, clustering=False,
+                     without_variables=False, max_depth=None, max_nodes=None,
+                     siblings=True):
+    # create graph (as the statements making up the graph, with those
+    # of each cluster kept separately), stopping at the given number of
+    # call levels from the root caller or before exceeding the given
+    # number of nodes (if any), and only adding the other members of a
+    # parent when reaching one of them if siblings are requested, with
+    # the nodes whose callees or members were left out listed as truncated
+    # (with at least the root caller and its parent, if any, as nodes
+    # whatever the number of nodes requested, since a graph without any
+    # node could not show where it was truncated)
+    if (max_depth is not None) and (max_depth < 0):
+        raise ValueError(f"max_depth must be at least 0, not {max_depth}")
+    if (max_nodes is not None) and (max_nodes < 1):
+        raise ValueError(f"max_nodes must be at least 1, not {max_nodes}")
+
+    base = []
+
+    # get initial caller
+    callers = [root_caller]
+
+    # callees to ignore (if any) in a set for constant time look-ups
+    ignore = set(ignore) if ignore else None
+
+    # start graph construction (with nodes and edges both recorded in
+    # sets for constant time look-ups, and nodes also recorded in a list
+    # to keep track of the order in which they were added)
+    graphs = {}
+    nodes = []
+    seen_nodes = set()
+    seen_edges = set()
+    ext_caller_callers = {}
+
+    def add_node(name):
+        # add node for name (and for its parent if it has one), and
+        # return the potential next callers it brings in
+        next_callers = []
+
+        # split up parent and child in name if possible
+        if sep_ in name:
+            parent, child = name.split(sep_)
+            if parent not in seen_nodes:
+                # create cluster graph if requested
+                if clustering:
+                    if parent not in graphs:
+                        graph = []
+                        graphs[parent] = graph
+                    else:
+                        graph = graphs[parent]
+                else:
+                    graph = base
+
+                # add node for parent
+                graph.append(
+                    ('node', parent, None, _node_attrs[kinds.get(parent, 'MODULE')])
+                )
+                nodes.append(parent)
+                seen_nodes.add(parent)
+                # add parent as potential next caller
+                next_callers.append(parent)
+                # add other children of parent as potential next caller
+                if siblings and (parent in memberships):
+                    for m in memberships[parent]:
+                        other_child = sep_.join([parent, m])
+                        # check whether to ignore callee
+                        if not (ignore and (other_child in ignore)):
+                            # add child as potential next caller
+                            next_callers.append(other_child)
+            else:
+                # i.e. in the cluster of the parent, or in the base graph
+                # if the parent was reached directly (as a node on its own)
+                graph = graphs.get(parent, base)
+
+            if (parent, child) not in seen_edges:
+                # add edge for parent-child relationship
+                graph.append(('edge', parent, name, _membership_attrs))
+                seen_edges.add((parent, child))
+        else:
+            # assign name to base graph
+            graph = base
+
+        # add node for name
+        graph.append(
+            ('node', name, name.split(sep_)[-1],
+             _node_attrs[kinds.get(name, 'VARIABLE')])
+        )
+        nodes.append(name)
+        seen_nodes.add(name)
+
+        return next_callers
+
+    def fits(name):
+        # whether the node (and that of its parent if not added yet) can
+        # be added without exceeding the number of nodes requested (always
+        # the case of the root caller, the first to be added)
+        if not nodes:
+            return True
+        needed = 1
+        if (sep_ in name) and (name.split(sep_)[0] not in seen_nodes):
+            needed += 1
+        return len(nodes) + needed <= max_nodes
+
+    def shown(name):
+        # whether the name would be a node if it were reached
+        if ignore and (name in ignore):
+            return False
+        return (name in kinds) or not without_variables
+
+    # callers left unexplored if stopping early
+    remaining = []
+    depth = 0
+
+    while callers:
+        next_callers = []
+        for position, caller in enumerate(callers):
+            # if caller not already a node, make it one
+            if caller not in seen_nodes:
+                if caller not in kinds:
+                    # i.e. it is a variable
+                    if without_variables:
+                        continue
+
+                if (max_nodes is not None) and not fits(caller):
+                    remaining.extend(callers[position:])
+                    break
+
+                next_callers.extend(add_node(caller))
+
+            # stop at requested number of call levels
+            if (max_depth is not None) and (depth >= max_depth):
+                remaining.append(caller)
+                continue
+
+            # collect callees of current caller (if any)
+            callees = caller_callees.get(caller, [])
+            for callee in callees:
+                if ignore and (callee in ignore):
+                    continue
+
+                # if callee not already a node, make it one
+                if callee not in seen_nodes:
+                    if callee not in kinds:
+                        # i.e. it is a variable
+                        if without_variables:
+                            continue
+
+                    if (max_nodes is not None) and not fits(callee):
+                        remaining.extend(callers[position:])
+                        break
+
+                    next_callers.extend(add_node(callee))
+
+                    # store callee as potential next caller
+                    next_callers.append(callee)
+
+                # add edge between caller and callee
+                if (caller, callee) not in seen_edges:
+                    base.append(('edge', caller, callee, None))
+                    seen_edges.add((caller, callee))
+                    if caller not in ext_caller_callers:
+                        ext_caller_callers[caller] = []
+                    ext_caller_callers[caller].append(callee)
+
+            else:
+                continue
+            break
+
+        if remaining:
+            remaining.extend(next_callers)
+            break
+
+        # move on to next caller rank (eliminating duplicates)
+        next_callers = list(set(next_callers))
+        callers = next_callers
+        depth += 1
+
+    # nodes with callees or members that were not explored
+    truncated = []
+    if remaining or not siblings:
+        remaining = set(remaining)
+        for name in nodes if not siblings else remaining:
+            if name not in seen_nodes:
+                continue
+            if (name in remaining) and any(
+                    shown(callee) for callee in caller_callees.get(name, [])):
+                truncated.append(name)
+            elif any((other_child not in seen_nodes) and shown(other_child)
+                     for other_child in (sep_.join([name, m])
+                                         for m in memberships.get(name, []))):
+                truncated.append(name)
+        truncated.sort()
+
+    graph = {'base': base, 'clusters': graphs}
+    if truncated:
+        graph['truncated'] = truncated
+
+    return graph, nodes, ext_caller_callers
+
+
+def generate_dot_and_pdf(root_caller, caller_callees, memberships, kinds,
+                         sep_, out_dir, ignore=None, clustering=False,
+                         without_variables=False):
+    graph, nodes, ext_caller_callers = build_call_graph(
+        root_caller, caller_callees, memberships, kinds, sep_,
+        ignore, clustering, without_variables
+    )
+
+    # store graph in dot and pdf
+    render_call_graph(root_caller, graph, out_dir)
+
+    return nodes, ext_caller_callers
+
+
+def _bits(x):
+    # positions of the bits set in an integer
+    positions = []
+    digits = bin(x)[:1:-1]
+    i = digits.find('1')
+    while i >= 0:
+        positions.append(i)
+        i = digits.find('1', i + 1)
+    return positions
+
+
+def compute_reachability(root_callers, caller_callees, memberships, kinds,
+                         sep_, ignore=None, without_variables=False):
+    # determine what build_call_graph would find from each root caller,
+    # but in one traversal shared by all root callers: the graph it walks
+    # is condensed into strongly connected components, and the set of
+    # entities reachable from each component is computed only once (as
+    # a bitset) from the sets of the components it leads to
+    ignore = set(ignore) if ignore else set()
+
+    # vertices are entities, or expanded parents (i.e. parents reached via
+    # one of their children, which brings in all the other children)
+    vertices = {}
+    labels = []
+    adjacency = {}
+    # callees actually followed from each entity
+    calls = {}
+    # callees without parent either followed or skipped (as variables)
+    followed_bare = set()
+    skipped_bare = set()
+
+    def accepted(name):
+        return not (without_variables and (name not in kinds))
+
+    def vertex(name, expanded=False):
+        if (name, expanded) not in vertices:
+            vertices[(name, expanded)] = len(labels)
+            labels.append((name, expanded))
+        return vertices[(name, expanded)]
+
+    def successors(v):
+        name, expanded = labels[v]
+
+        if expanded:
+            # parent becomes a node and other children potential callers
+            succ = [vertex(name)]
+            for m in memberships.get(name, []):
+                other_child = sep_.join([name, m])
+                if (other_child not in ignore) and accepted(other_child):
+                    succ.append(vertex(other_child))
+            return succ
+
+        succ = []
+        if sep_ in name:
+            parent, child = name.split(sep_)
+            succ.append(vertex(parent, True))
+
+        followed = []
+        for callee in caller_callees.get(name, []):
+            if callee in ignore:
+                continue
+            if not accepted(callee):
+                if sep_ not in callee:
+                    skipped_bare.add(callee)
+                continue
+            if sep_ not in callee:
+                followed_bare.add(callee)
+            followed.append(callee)
+        calls[name] = list(dict.fromkeys(followed))
+        succ.extend(vertex(callee) for callee in calls[name])
+
+        return succ
+
+    # find strongly connected components (using an iterative version of
+    # Tarjan's algorithm, which yields them in reverse topological order)
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    component = {}
+    components = []
+
+    for root_caller in root_callers:
+        if not accepted(root_caller):
+            continue
+        r = vertex(root_caller)
+        if r in index:
+            continue
+
+        index[r] = lowlink[r] = len(index)
+        stack.append(r)
+        on_stack.add(r)
+        adjacency[r] = successors(r)
+        work = [(r, iter(adjacency[r]))]
+
+        while work:
+            v, it = work[-1]
+            for w in it:
+                if w not in index:
+                    index[w] = lowlink[w] = len(index)
+                    stack.append(w)
+                    on_stack.add(w)
+                    adjacency[w] = successors(w)
+                    work.append((w, iter(adjacency[w])))
+                    break
+                elif w in on_stack:
+                    lowlink[v] = min(lowlink[v], index[w])
+            else:
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    lowlink[u] = min(lowlink[u], lowlink[v])
+                if lowlink[v] == index[v]:
+                    members = []
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        component[w] = len(components)
+                        members.append(w)
+                        if w == v:
+                            break
+                    components.append(members)
+
+    # condensed graph, with the number of components leading to each
+    # component so that their bitsets are released once no longer needed
+    targets = []
+    pending = [0] * len(components)
+    for c, members in enumerate(components):
+        targets.append(
+            {component[w] for v in members for w in adjacency[v]} - {c}
+        )
+        for d in targets[c]:
+            pending[d] += 1
+
+    root_components = {
+        component[vertices[(root_caller, False)]]
+        for root_caller in root_callers if accepted(root_caller)
+    }
+
+    # reachable sets, from the components that lead nowhere else upwards
+    reach = {}
+    root_reach = {}
+    for c, members in enumerate(components):
+        bits = 0
+        for v in members:
+            bits |= 1 << v
+        for d in targets[c]:
+            bits |= reach[d]
+            pending[d] -= 1
+            if not pending[d]:
+                del reach[d]
+        if pending[c]:
+            reach[c] = bits
+        if c in root_components:
+            root_reach[c] = bits
+
+    # the search in build_call_graph visits the children of a parent only
+    # if it first reaches the parent via one of its children, and records
+    # parent-child and caller-callee edges together, so that its outcome
+    # depends on the order of the visit when a parent is also reached
+    # directly or when a parent calls a name shared by one of its children
+    ambiguous = 0
+    for (name, expanded), v in vertices.items():
+        if expanded:
+            if (name in followed_bare) or (name in skipped_bare):
+                ambiguous |= 1 << v
+        elif (sep_ in name) and (name.count(sep_) == 1):
+            parent, child = name.split(sep_)
+            if child in caller_callees.get(parent, ()):
+                ambiguous |= 1 << v
+
+    results = {}
+    for root_caller in root_callers:
+        if not accepted(root_caller):
+            results[root_caller] = [], set(), {}
+            continue
+
+        bits = root_reach[component[vertices[(root_caller, False)]]]
+        if (bits & ambiguous) or (
+                (root_caller, True) in vertices
+                and bits & (1 << vertices[(root_caller, True)])):
+            # leave it to build_call_graph
+            results[root_caller] = None
+            continue
+
+        nodes = []
+        expanded_parents = set()
+        for v in _bits(bits):
+            name, expanded = labels[v]
+            if expanded:
+                expanded_parents.add(name)
+            else:
+                nodes.append(name)
+
+        ext_caller_callers = {
+            node: calls[node] for node in nodes if calls[node]
+        }
+
+        results[root_caller] = nodes, expanded_parents, ext_caller_callers
+
+    return results
+
+
+def _graph_from_reachability(nodes, expanded_parents, ext_caller_callers,
+                             kinds, sep_, clustering=False):
+    # create graph
+    base = []
+    graphs = {}
+
+    def graph_of(parent):
+        # create cluster graph if requested
+        if clustering:
+            if parent not in graphs:
+                graphs[parent] = []
+            return graphs[parent]
+        return base
+
+    for node in nodes:
+        if node in expanded_parents:
+            # add node for parent
+            graph_of(node).append(
+                ('node', node, None, _node_attrs[kinds.get(node, 'MODULE')])
+            )
+        elif sep_ in node:
+            parent, child = node.split(sep_)
+            graph = graph_of(parent)
+            # add edge for parent-child relationship
+            graph.append(('edge', parent, node, _membership_attrs))
+            graph.append(
+                ('node', node, child, _node_attrs[kinds.get(node, 'VARIABLE')])
+            )
+        else:
+            base.append(
+                ('node', node, node, _node_attrs[kinds.get(node, 'VARIABLE')])
+            )
+
+    # add edges between callers and callees
+    for caller, callees in ext_caller_callers.items():
+        for callee in callees:
+            base.append(('edge', caller, callee, None))
+
+    return {'base': base, 'clusters': graphs}
+
+
+def build_call_graphs(root_callers, caller_callees, memberships, kinds,
+                      sep_, ignore=None, clustering=False,
+                      without_variables=False):
+    # same as build_call_graph for several root callers at once, with
+    # the same nodes and edges but not necessarily in the same order
+    reachability = compute_reachability(
+        root_callers, caller_callees, memberships, kinds, sep_,
+        ignore, without_variables
+    )
+
+    results = {}
+    for root_caller in root_callers:
+        if reachability[root_caller] is None:
+            results[root_caller] = build_call_graph(
+                root_caller, caller_callees, memberships, kinds, sep_,
+                ignore, clustering, without_variables
+            )
+        else:
+            nodes, expanded_parents, ext_caller_callers = reachability[root_caller]
+            graph = _graph_from_reachability(
+                nodes, expanded_parents, ext_caller_callers, kinds, sep_,
+                clustering
+            )
+            results[root_caller] = graph, nodes, ext_caller_callers
+
+    return results
+
+
+def _intern(model, name):
+    # identifier of the symbol with the given name, adding it (and the
+    # symbols for the parts of its name) to the model if not in there yet
+    ids = model['ids']
+    if name in ids:
+        return ids[name]
+
+    sep_ = model['sep']
+    parts = name.split(sep_)
+
+    # first part (as used to find the file of the parent of a caller),
+    # all but the last part (as used to find the file of a variable), and
+    # last part (for a name made of exactly two parts, as used to label
+    # its node and to record its membership to its parent)
+    if len(parts) > 1:
+        head = _intern(model, parts[0])
+        parent = _intern(model, sep_.join(parts[:-1]))
+        child = _intern(model, parts[-1]) if len(parts) == 2 else _split_error
+    else:
+        head = parent = child = _no_parent
+
+    symbol = len(model['names'])
+    ids[name] = symbol
+    model['names'].append(name)
+    model['kinds'].append(_no_kind)
+    model['locations'].append(_no_location)
+    model['heads'].append(symbol if head == _no_parent else head)
+    model['parents'].append(parent)
+    model['children'].append(child)
+    # no call nor member for the symbol (if the adjacencies are built)
+    for adjacency in ['calls', 'members']:
+        if adjacency in model:
+            offsets = model[adjacency][0]
+            offsets.append(offsets[-1])
+
+    return symbol
+
+
+def _adjacency(model, neighbours):
+    # compressed sparse rows for the given neighbours of the symbols (with
+    # duplicates removed, keeping the first occurrences in their order)
+    offsets = array('i', [0])
+    targets = array('i')
+    for symbol in range(len(model['names'])):
+        targets.extend(dict.fromkeys(neighbours.get(symbol, ())))
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+def compact_parse_results(caller_callees, memberships, kinds, locations, sep_,
+                          uses=None):
+    # compact representation of the results of the parsing, with the
+    # symbols interned into integer identifiers (with their names, kinds,
+    # files, and the identifiers of the parts of their names, in arrays
+    # indexed by identifier), the callees and the members of the symbols
+    # as compressed sparse rows without duplicates, a table of files, and
+    # the modules used without only in each scope (if given)
+    model = {
+        'sep': sep_,
+        'names': [],
+        'ids': {},
+        'kinds': array('b'),
+        'locations': array('i'),
+        'heads': array('i'),
+        'parents': array('i'),
+        'children': array('i'),
+        'files': []
+    }
+
+    for name in chain(kinds, locations, caller_callees):
+        _intern(model, name)
+
+    kind_codes = {kind: code for code, kind in enumerate(_node_attrs)}
+    for name, kind in kinds.items():
+        model['kinds'][model['ids'][name]] = kind_codes[kind]
+
+    file_codes = {}
+    for name, file_ in locations.items():
+        if file_ not in file_codes:
+            file_codes[file_] = len(model['files'])
+            model['files'].append(file_)
+        model['locations'][model['ids'][name]] = file_codes[file_]
+
+    calls = {
+        _intern(model, caller): [_intern(model, callee) for callee in callees]
+        for caller, callees in caller_callees.items()
+    }
+    members = {
+        _intern(model, parent): [
+            _intern(model, sep_.join([parent, member])) for member in members_
+        ]
+        for parent, members_ in memberships.items()
+    }
+
+    model['calls'] = _adjacency(model, calls)
+    model['members'] = _adjacency(model, members)
+    model['uses'] = {
+        _intern(model, scope): [_intern(model, module) for module in modules]
+        for scope, modules in (uses or {}).items()
+    }
+
+    return model
+
+
+def build_call_graph_compact(root_caller, model, ignore=None,
+                             clustering=False, without_variables=False):
+    # same as build_call_graph on the compact representation of the
+    # results of the parsing, with the nodes and the callers (and their
+    # callees) returned as identifiers (nodes and edges are the same, but
+    # not necessarily listed in the same order)
+    names = model['names']
+    kinds = model['kinds']
+    parents = model['parents']
+    children = model['children']
+    call_offsets, call_targets = model['calls']
+    member_offsets, member_targets = model['members']
+
+    node_attrs = list(_node_attrs.values())
+
+    base = []
+
+    # get initial caller
+    callers = [_intern(model, root_caller)]
+
+    # callees to ignore (if any) in a set for constant time look-ups
+    ignore = {_intern(model, name) for name in ignore} if ignore else None
+
+    # number of symbols (once all names given are interned) to encode edges
+    n_symbols = len(names)
+
+    # start graph construction (with nodes and edges both recorded in sets
+    # for constant time look-ups, edges as one integer each, and nodes also
+    # recorded in a list to keep track of the order in which they were added)
+    graphs = {}
+    nodes = []
+    seen_nodes = set()
+    seen_edges = set()
+    ext_caller_callers = {}
+
+    def add_node(symbol):
+        # add node for symbol (and for its parent if it has one), and
+        # return the potential next callers it brings in
+        next_callers = []
+
+        # split up parent and child in name if possible
+        parent = parents[symbol]
+        if parent != _no_parent:
+            child = children[symbol]
+            if child == _split_error:
+                raise ValueError(
+                    f"too many values to unpack (expected 2): {names[symbol]}"
+                )
+            if parent not in seen_nodes:
+                # create cluster graph if requested
+                if clustering:
+                    if parent not in graphs:
+                        graph = []
+                        graphs[parent] = graph
+                    else:
+                        graph = graphs[parent]
+                else:
+                    graph = base
+
+                # add node for parent
+                kind = kinds[parent]
+                graph.append(
+                    ('node', names[parent], None,
+                     node_attrs[kind] if kind != _no_kind else _node_attrs['MODULE'])
+                )
+                nodes.append(parent)
+                seen_nodes.add(parent)
+                # add parent as potential next caller
+                next_callers.append(parent)
+                # add other children of parent as potential next caller
+                for other_child in member_targets[
+                        member_offsets[parent]:member_offsets[parent + 1]]:
+                    # check whether to ignore callee
+                    if not (ignore and (other_child in ignore)):
+                        # add child as potential next caller
+                        next_callers.append(other_child)
+            else:
+                # i.e. in the cluster of the parent, or in the base graph
+                # if the parent was reached directly (as a node on its own)
+                graph = graphs.get(parent, base)
+
+            edge = parent * n_symbols + child
+            if edge not in seen_edges:
+                # add edge for parent-child relationship
+                graph.append(('edge', names[parent], names[symbol], _membership_attrs))
+                seen_edges.add(edge)
+            label = names[child]
+        else:
+            # assign name to base graph
+            graph = base
+            label = names[symbol]
+
+        # add node for symbol
+        kind = kinds[symbol]
+        graph.append(
+            ('node', names[symbol], label,
+             node_attrs[kind] if kind != _no_kind else _node_attrs['VARIABLE'])
+        )
+        nodes.append(symbol)
+        seen_nodes.add(symbol)
+
+        return next_callers
+
+    while callers:
+        next_callers = []
+        for caller in callers:
+            # if caller not already a node, make it one
+            if caller not in seen_nodes:
+                if kinds[caller] == _no_kind:
+                    # i.e. it is a variable
+                    if without_variables:
+                        continue
+
+                next_callers.extend(add_node(caller))
+
+            # collect callees of current caller (if any)
+            for callee in call_targets[
+                    call_offsets[caller]:call_offsets[caller + 1]]:
+                if ignore and (callee in ignore):
+                    continue
+
+                # if callee not already a node, make it one
+                if callee not in seen_nodes:
+                    if kinds[callee] == _no_kind:
+                        # i.e. it is a variable
+                        if without_variables:
+                            continue
+
+                    next_callers.extend(add_node(callee))
+
+                    # store callee as potential next caller
+                    next_callers.append(callee)
+
+                # add edge between caller and callee
+                edge = caller * n_symbols + callee
+                if edge not in seen_edges:
+                    base.append(('edge', names[caller], names[callee], None))
+                    seen_edges.add(edge)
+                    if caller not in ext_caller_callers:
+                        ext_caller_callers[caller] = []
+                    ext_caller_callers[caller].append(callee)
+
+        # move on to next caller rank (eliminating duplicates)
+        callers = list(set(next_callers))
+
+    return (
+        {'base': base,
+         'clusters': {names[parent]: graph for parent, graph in graphs.items()}},
+        nodes,
+        ext_caller_callers
+    )
+
+
+def to_digraph(graph):
+    # create the graphviz graph from the statements making up the graph
+    def apply(digraph, statements):
+        for statement, name, other, attrs in statements:
+            if statement == 'node':
+                digraph.node(name, other, **attrs)
+            elif attrs:
+                digraph.edge(name, other, **attrs)
+            else:
+                digraph.edge(name, other)
+
+    import graphviz as gv
+
+    base = gv.Digraph(name='base', **_graph_attrs)
+    apply(base, graph['base'])
+
+    # append clusters as sub-graphs of base graph
+    for parent, statements in graph['clusters'].items():
+        cluster = gv.Digraph(name='_'.join(['cluster', parent]), **_graph_attrs)
+        apply(cluster, statements)
+        base.subgraph(cluster)
+
+    # outline the nodes left unexplored (if any)
+    for name in graph.get('truncated', []):
+        base.node(name, **_truncated_attrs)
+
+    return base
+
+
+def render_call_graph(root_caller, graph, out_dir, format_='pdf'):
+    # store graph (given as its statements, or as its dot source) in dot,
+    # and in the given format using the graph layout (unless no format is
+    # given)
+    filename = sep.join([out_dir, '{}.gv'.format(root_caller)])
+
+    if isinstance(graph, str):
+        if not format_:
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(graph)
+            return
+
+        import graphviz as gv
+
+        digraph = gv.Source(graph, engine=_graph_attrs['engine'])
+    else:
+        digraph = to_digraph(graph)
+
+    if format_:
+        digraph.render(filename, format=format_, view=False)
+    else:
+        digraph.save(filename)
+
+
+def render_call_graphs(graphs, out_dir, format_='pdf', jobs=1):
+    # store graphs for several root callers, with the graph layouts (which
+    # run as separate processes) running concurrently on several threads
+    if jobs < 1:
+        jobs = cpu_count() or 1
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        # collect results for exceptions (if any) to be raised
+        list(
+            executor.map(
+                lambda item: render_call_graph(item[0], item[1], out_dir, format_),
+                graphs.items()
+            )
+        )
+
+
+class FragmentCache:
+    # dot source of the parts of call graphs (i.e. a parent with its
+    # children, or an entity without parent, with the edges to their
+    # callees), kept in memory for the parts most recently used, and in
+    # the cache file (if given) for any part, keyed by a digest of its
+    # content, so that the call graphs of root callers sharing sub-trees
+    # (in the same run, or in later runs) are assembled from the parts
+    # formatted once
+
+    def __init__(self, sep_, clustering=False, size=_fragments_size,
+                 cache_file=None):
+        self.sep = sep_
+        self.clustering = clustering
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._fragments = OrderedDict()
+        self._head = None
+        self._db = None
+        self._rows = {}
+        if cache_file:
+            import sqlite3
+
+            self._db = sqlite3.connect(cache_file)
+            self._db.execute("CREATE TABLE IF NOT EXISTS fragments "
+                             "(key TEXT PRIMARY KEY, base TEXT, "
+                             "cluster TEXT, used INTEGER)")
+
+    def _format(self, part, names, kinds, ext_caller_callers, direct):
+        # dot source of the nodes of the part (in their cluster if
+        # requested, unless its parent was reached directly) and of the
+        # edges to their callees, as they would be in the dot source of
+        # to_digraph
+        import graphviz as gv
+
+        sep_ = self.sep
+        base = gv.Digraph(name='base')
+        members = base
+        if self.clustering and (len(names) > 1) and not direct:
+            members = gv.Digraph(name='_'.join(['cluster', part]),
+                                 **_graph_attrs)
+
+        for name in names:
+            if name == part:
+                if (len(names) > 1) and not direct:
+                    # add node for parent
+                    members.node(name, None,
+                                 **_node_attrs[kinds.get(name, 'MODULE')])
+                else:
+                    base.node(name, name,
+                              **_node_attrs[kinds.get(name, 'VARIABLE')])
+            else:
+                parent, child = name.split(sep_)
+                # add edge for parent-child relationship
+                members.edge(parent, name, **_membership_attrs)
+                members.node(name, child,
+                             **_node_attrs[kinds.get(name, 'VARIABLE')])
+
+        # add edges between callers and callees
+        for name in names:
+            for callee in ext_caller_callers.get(name, ()):
+                base.edge(name, callee)
+
+        cluster = ''
+        if members is not base:
+            outer = gv.Digraph(name='base')
+            outer.subgraph(members)
+            cluster = ''.join(outer.body)
+
+        return ''.join(base.body), cluster
+
+    def fragment(self, part, names, kinds, ext_caller_callers,
+                 direct=False):
+        # dot source of a part (see _format), given the names of its nodes
+        # (the parent first, if any) and whether its parent was reached
+        # directly (i.e. as the root caller or as a callee)
+        key = (part, tuple(names), tuple(kinds.get(name) for name in names),
+               tuple(tuple(ext_caller_callers.get(name, ())) for name in names),
+               direct)
+
+        fragment = self._fragments.get(key)
+        if fragment is not None:
+            self._fragments.move_to_end(key)
+            self.hits += 1
+            return fragment
+
+        digest = None
+        if self._db is not None:
+            import hashlib
+
+            digest = hashlib.sha1(
+                repr((_graph_version, self.clustering, key)).encode()
+            ).hexdigest()
+            row = self._db.execute(
+                "SELECT base, cluster FROM fragments WHERE key = ?", (digest,)
+            ).fetchone()
+            if row is not None:
+                fragment = tuple(row)
+                self.hits += 1
+
+        if fragment is None:
+            fragment = self._format(part, names, kinds, ext_caller_callers,
+                                    direct)
+            self.misses += 1
+
+        if digest is not None:
+            self._rows[digest] = fragment
+
+        self._fragments[key] = fragment
+        if len(self._fragments) > self.size:
+            self._fragments.popitem(last=False)
+
+        return fragment
+
+    def source(self, root_caller, nodes, ext_caller_callers, kinds):
+        # dot source of the call graph with the given nodes and edges (with
+        # the same statements as to_digraph for the graph of build_call_graph
+        # or build_call_graphs, but in the order of the parts' names)
+        sep_ = self.sep
+
+        # entities reached directly, which remain nodes on their own even
+        # when some of their children are reached too
+        direct = {root_caller}
+        for callees in ext_caller_callers.values():
+            direct.update(callees)
+
+        parts = {}
+        for name in nodes:
+            part = name.split(sep_)[0] if sep_ in name else name
+            if part not in parts:
+                parts[part] = []
+            parts[part].append(name)
+
+        if self._head is None:
+            import graphviz as gv
+
+            self._head = ''.join(list(gv.Digraph(name='base', **_graph_attrs))[:-1])
+
+        bases = []
+        clusters = []
+        for part in sorted(parts):
+            # sorted with the parent (if any) first
+            base, cluster = self.fragment(
+                part, sorted(parts[part]), kinds, ext_caller_callers,
+                part in direct
+            )
+            bases.append(base)
+            clusters.append(cluster)
+
+        return ''.join([self._head, *bases, *clusters, '}\n'])
+
+    def close(self):
+        # store the parts used in the cache file (if any), keeping only
+        # the most recently used ones
+        if self._db is None:
+            return
+
+        with self._db as db:
+            used = time.time_ns()
+            db.executemany(
+                "INSERT OR REPLACE INTO fragments VALUES (?, ?, ?, ?)",
+                [(digest, base, cluster, used)
+                 for digest, (base, cluster) in self._rows.items()]
+            )
+            db.execute(
+                "DELETE FROM fragments WHERE key NOT IN "
+                "(SELECT key FROM fragments ORDER BY used DESC LIMIT ?)",
+                (_fragments_disk_size,)
+            )
+        self._db.close()
+        self._db = None
+        self._rows = {}
+
+
+def build_reverse_index(caller_callees, memberships, kinds, sep_):
+    # callers of each callee, children of each parent (i.e. the entities
+    # through which a parent and all its members are reached), and members
+    # of each parent
+    callee_callers = {}
+    for caller, callees in caller_callees.items():
+        for callee in callees:
+            if callee not in callee_callers:
+                callee_callers[callee] = {}
+            callee_callers[callee][caller] = None
+
+    parent_members = {
+        parent: set(members) for parent, members in memberships.items()
+    }
+
+    parent_children = {}
+    names = set(kinds).union(caller_callees, callee_callers)
+    for parent, members in parent_members.items():
+        names.update(sep_.join([parent, m]) for m in members)
+    for name in names:
+        if name.count(sep_) == 1:
+            parent = name.split(sep_)[0]
+            if parent not in parent_children:
+                parent_children[parent] = []
+            parent_children[parent].append(name)
+
+    return (
+        {callee: list(callers) for callee, callers in callee_callers.items()},
+        parent_children,
+        parent_members
+    )
+
+
+def find_callers(symbols, caller_callees, memberships, kinds, sep_,
+                 ignore=None, without_variables=False, reverse_index=None):
+    # find all the entities from which build_call_graph would reach any of
+    # the symbols, by walking up the graph it walks down (where a parent
+    # reached via one of its children brings in all its members)
+    if reverse_index is None:
+        reverse_index = build_reverse_index(
+            caller_callees, memberships, kinds, sep_
+        )
+    callee_callers, parent_children, parent_members = reverse_index
+
+    ignore = set(ignore) if ignore else set()
+
+    def accepted(name):
+        return not (without_variables and (name not in kinds))
+
+    # vertices are entities, or expanded parents (i.e. parents reached via
+    # one of their children)
+    visited = {(symbol, False) for symbol in symbols}
+    queue = deque(visited)
+
+    while queue:
+        name, expanded = queue.popleft()
+
+        predecessors = []
+        if expanded:
+            # any child of the parent brings in the parent and its members
+            predecessors.extend(
+                (child, False) for child in parent_children.get(name, [])
+                if accepted(child)
+            )
+        else:
+            if (name not in ignore) and accepted(name):
+                # callers
+                predecessors.extend(
+                    (caller, False) for caller in callee_callers.get(name, [])
+                    if accepted(caller)
+                )
+                # parent brought in via another of its children
+                if name.count(sep_) == 1:
+                    parent, child = name.split(sep_)
+                    if child in parent_members.get(parent, ()):
+                        predecessors.append((parent, True))
+            # parent itself brought in via one of its children
+            if name in parent_children:
+                predecessors.append((name, True))
+
+        for predecessor in predecessors:
+            if predecessor not in visited:
+                visited.add(predecessor)
+                queue.append(predecessor)
+
+    return {name for name, expanded in visited if not expanded}
+
+
+def impact_report(symbols, callers, kinds, locations, sep_,
+                  root_callers=None, reverse_index=None):
+    # summarise which callers, root callers (those given, or otherwise the
+    # programs and the subroutines/functions that no one calls) and files
+    # are affected by changes in the symbols
+    if root_callers:
+        roots = [root for root in root_callers if root in callers]
+    else:
+        callee_callers = reverse_index[0] if reverse_index else {}
+        roots = sorted(
+            name for name in callers
+            if (kinds.get(name) == 'PROGRAM')
+            or ((kinds.get(name) in ['SUBROUTINE', 'FUNCTION'])
+                and not callee_callers.get(name))
+        )
+
+    files = set()
+    for name in callers:
+        if name in locations:
+            files.add(locations[name])
+        elif sep_.join(name.split(sep_)[:-1]) in locations:
+            files.add(locations[sep_.join(name.split(sep_)[:-1])])
+
+    return {
+        'symbols': list(symbols),
+        'callers': sorted(set(callers) - set(symbols)),
+        'roots': roots,
+        'files': sorted(files)
+    }
+
+
+def format_impact_report(report, as_json=False):
+    if as_json:
+        return json.dumps(report, indent=2)
+
+    lines = []
+    for section in ['symbols', 'callers', 'roots', 'files']:
+        lines.append(f"# {section} ({len(report[section])})")
+        lines.extend(report[section])
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def relative_locations(locations, source_dir=None):
+    # locations relative to the source directory (or to the deepest
+    # directory containing all the files if not known), so that the files
+    # of two versions of the source code can be compared
+    if not locations:
+        return {}
+    if source_dir is None:
+        source_dir = commonpath(
+            [dirname(file_) for file_ in set(locations.values())]
+        )
+    return {name: relpath(file_, source_dir)
+            for name, file_ in locations.items()}
+
+
+def call_graph_tables(root_caller, caller_callees, memberships, kinds,
+                      locations, uses, sep_, ignore=None,
+                      without_variables=False):
+    # symbols, calls, and file dependencies (as sets) of the call graph of
+    # a root caller, or of the whole source code if no root caller is given
+    # (with the dependencies on the modules used without only, see
+    # add_module_uses)
+    if root_caller is None:
+        ignore = set(ignore) if ignore else set()
+
+        def accepted(name):
+            return (name not in ignore) and not (
+                without_variables and (name not in kinds)
+            )
+
+        ext_caller_callees = {
+            caller: [callee for callee in callees if accepted(callee)]
+            for caller, callees in caller_callees.items() if accepted(caller)
+        }
+        symbols = {name for name in kinds if accepted(name)}
+        symbols.update(ext_caller_callees)
+        for callees in ext_caller_callees.values():
+            symbols.update(callees)
+    else:
+        _, nodes, ext_caller_callees = build_call_graph(
+            root_caller, caller_callees, memberships, kinds, sep_,
+            ignore, False, without_variables
+        )
+        symbols = set(nodes)
+
+    calls = {(caller, callee)
+             for caller, callees in ext_caller_callees.items()
+             for callee in callees}
+    _, used_edges = add_module_uses(
+        sorted(symbols), ext_caller_callees, uses, caller_callees, locations,
+        sep_
+    )
+    dependencies = {
+        (file_, required)
+        for file_, requirements in module_dependencies(
+            used_edges, kinds, locations, sep_
+        ).items()
+        for required in requirements
+    }
+
+    return symbols, calls, dependencies
+
+
+def diff_call_graphs(root_caller, old, new, sep_, ignore=None,
+                     without_variables=False):
+    # symbols, calls, and file dependencies added and removed between two
+    # versions of the source code (each being the results of its parsing,
+    # with its locations relative to its source directory, followed by the
+    # modules used without only in each scope) for a root caller, or for
+    # the whole source code if no root caller is given, and the graph of
+    # the changes (the whole call graph for a root caller, only the calls
+    # added and removed otherwise) with them highlighted
+    old_symbols, old_calls, old_dependencies = call_graph_tables(
+        root_caller, *old, sep_, ignore, without_variables
+    )
+    new_symbols, new_calls, new_dependencies = call_graph_tables(
+        root_caller, *new, sep_, ignore, without_variables
+    )
+    old_kinds, new_kinds = old[2], new[2]
+
+    report = {}
+    for section, old_table, new_table in [
+            ('symbols', old_symbols, new_symbols),
+            ('calls', old_calls, new_calls),
+            ('dependencies', old_dependencies, new_dependencies)]:
+        report[section] = {
+            'added': sorted(new_table - old_table),
+            'removed': sorted(old_table - new_table)
+        }
+    report['kinds'] = sorted(
+        (name, old_kinds[name], new_kinds[name])
+        for name in old_symbols & new_symbols
+        if (name in old_kinds) and (name in new_kinds)
+        and (old_kinds[name] != new_kinds[name])
+    )
+
+    # calls shown (with the entities they link)
+    if root_caller is None:
+        calls = old_calls ^ new_calls
+        symbols = old_symbols ^ new_symbols
+        symbols.update(name for call in calls for name in call)
+    else:
+        calls = old_calls | new_calls
+        symbols = old_symbols | new_symbols
+
+    statements = []
+    for name in sorted(symbols):
+        kind = new_kinds.get(name, old_kinds.get(name, 'VARIABLE'))
+        attrs = dict(_node_attrs[kind])
+        if (name in new_symbols) and (name not in old_symbols):
+            attrs.update(_added_attrs)
+        elif (name in old_symbols) and (name not in new_symbols):
+            attrs.update(_removed_attrs)
+        statements.append(('node', name, name.split(sep_)[-1], attrs))
+        if (name.count(sep_) == 1) and (name.split(sep_)[0] in symbols):
+            statements.append(
+                ('edge', name.split(sep_)[0], name, _membership_attrs)
+            )
+    for caller, callee in sorted(calls):
+        if (caller, callee) not in old_calls:
+            attrs = _added_attrs
+        elif (caller, callee) not in new_calls:
+            attrs = _removed_attrs
+        else:
+            attrs = None
+        statements.append(('edge', caller, callee, attrs))
+
+    return report, {'base': statements, 'clusters': {}}
+
+
+def format_diff_report(reports, as_json=False):
+    # reports of diff_call_graphs for each root caller (the whole source
+    # code being given as '*')
+    if as_json:
+        return json.dumps(reports, indent=2)
+
+    lines = []
+    for root_caller, report in reports.items():
+        lines.append(f"## {root_caller}")
+        for section in ['symbols', 'calls', 'dependencies']:
+            for change in ['added', 'removed']:
+                entries = report[section][change]
+                lines.append(f"# {section} {change} ({len(entries)})")
+                if section == 'symbols':
+                    lines.extend(entries)
+                elif section == 'calls':
+                    lines.extend(f"{caller} -> {callee}"
+                                 for caller, callee in entries)
+                else:
+                    lines.extend(f"{file_}: {required}"
+                                 for file_, required in entries)
+        lines.append(f"# kinds changed ({len(report['kinds'])})")
+        lines.extend(f"{name}: {old_kind} -> {new_kind}"
+                     for name, old_kind, new_kind in report['kinds'])
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def _topological_levels(dag, np):
+    # components of a directed acyclic graph grouped into levels, from the
+    # components calling no other (first level) to the components only
+    # calling components of the previous levels
+    remaining = np.diff(dag.indptr)
+    callers = dag.transpose().tocsr()
+    level = np.flatnonzero(remaining == 0)
+    levels = []
+    while level.size:
+        levels.append(level)
+        # components whose callees are now all in a level
+        predecessors = callers[level].indices
+        np.subtract.at(remaining, predecessors, 1)
+        level = np.unique(predecessors[remaining[predecessors] == 0])
+    return levels
+
+
+def _closure_sizes(dag, sizes, memory, np):
+    # number of entities reached from each component of a directed acyclic
+    # graph (with the number of entities in each component), found with
+    # the reachability to a chunk of components at a time kept as bit sets
+    # (one per component) filled in level by level, from the components
+    # calling no other one (with at most about the given number of bytes
+    # used for the bit sets)
+    n_components = dag.shape[0]
+    levels = _topological_levels(dag, np)
+    level_calls = [dag[level] for level in levels]
+    largest = max([len(calls.indices) for calls in level_calls] + [1])
+    words = max(1, min(memory // (8 * (n_components + largest)),
+                       -(-n_components // 64)))
+
+    closures = np.zeros(n_components, dtype=np.int64)
+    for start in range(0, n_components, 64 * words):
+        stop = min(start + 64 * words, n_components)
+        reach = np.zeros((n_components, words), dtype=np.uint64)
+        own = np.arange(start, stop)
+        shifts = ((own - start) & 63).astype(np.uint64)
+        reach[own, (own - start) >> 6] = np.left_shift(np.uint64(1), shifts)
+        for level, calls in zip(levels, level_calls):
+            calling = np.diff(calls.indptr) > 0
+            if calling.any():
+                reach[level[calling]] |= np.bitwise_or.reduceat(
+                    reach[calls.indices], calls.indptr[:-1][calling], axis=0
+                )
+
+        if hasattr(np, 'bitwise_count'):
+            closures += np.bitwise_count(reach).sum(axis=1, dtype=np.int64)
+        else:
+            table = np.array([bin(i).count('1') for i in range(256)],
+                             dtype=np.uint8)
+            closures += table[reach.view(np.uint8)].sum(axis=1, dtype=np.int64)
+
+        # components of several entities counted once so far
+        several = np.flatnonzero(sizes[start:stop] > 1)
+        if several.size:
+            bits = (reach[:, several >> 6] >> shifts[several]) & np.uint64(1)
+            closures += bits.astype(np.int64) @ (sizes[start + several] - 1)
+
+    return closures
+
+
+def call_graph_metrics(model, ignore=None, without_variables=False,
+                       memory=2 ** 28):
+    # metrics on the whole source code from its compact representation
+    # (see compact_parse_results) using sparse matrices, i.e. for each
+    # entity: the number of entities calling it and called by it, the size
+    # of its transitive closure (the number of other entities reached
+    # through calls and modules used without only, an entity also reaching
+    # its parents, e.g. a module and what it uses, which gives the entities
+    # it depends on) and the number of entities depending on it, the size
+    # of the cycle it is in (if any), whether it is reached from any
+    # program, and for the programs and modules, the number of other
+    # programs and modules calling any of their members (or using them
+    # without only), the transitive closures being found
+    # on the graph condensed into strongly connected components with the
+    # reachability to a chunk of components at a time kept as bit sets
+    # (using at most about the given number of bytes)
+    try:
+        import numpy as np
+        from scipy import sparse
+        from scipy.sparse import csgraph
+    except ImportError:
+        raise RuntimeError("numpy and scipy are required for the metrics")
+
+    n = len(model['names'])
+    kinds = np.asarray(model['kinds'], dtype=np.int64)
+    offsets = np.asarray(model['calls'][0], dtype=np.int64)
+    targets = np.asarray(model['calls'][1], dtype=np.int64)
+    sources = np.repeat(np.arange(n), np.diff(offsets))
+
+    # symbols that are entities (and not only parts of their names)
+    entity = kinds != _no_kind
+    entity[targets] = True
+    entity[sources] = True
+
+    # modules used without only (if any, see compact_parse_results), which
+    # their users depend on (as on what they call) without calling them
+    uses = model.get('uses', {})
+    use_sources = np.asarray(
+        [scope for scope, modules in uses.items() for _ in modules],
+        dtype=np.int64
+    )
+    use_targets = np.asarray(
+        [module for modules in uses.values() for module in modules],
+        dtype=np.int64
+    )
+    entity[use_targets] = True
+
+    # calls and uses to consider
+    keep = np.ones(len(targets), dtype=bool)
+    keep_uses = np.ones(len(use_targets), dtype=bool)
+    if without_variables:
+        keep &= kinds[targets] != _no_kind
+        keep_uses &= kinds[use_targets] != _no_kind
+    if ignore:
+        ignored = np.zeros(n, dtype=bool)
+        ignored[[model['ids'][name] for name in ignore
+                 if name in model['ids']]] = True
+        keep &= ~ignored[targets]
+        keep_uses &= ~ignored[use_targets]
+    sources = sources[keep]
+    targets = targets[keep]
+    use_sources = use_sources[keep_uses]
+    use_targets = use_targets[keep_uses]
+    calls = sparse.csr_matrix(
+        (np.ones(len(targets), dtype=np.int8), (sources, targets)),
+        shape=(n, n)
+    )
+    calls.sum_duplicates()
+    fan_out = np.diff(calls.indptr)
+    fan_in = np.bincount(calls.indices, minlength=n)
+
+    # graph of the calls, of the uses, and of the entities to their
+    # parents, condensed into strongly connected components
+    parents = np.asarray(model['parents'], dtype=np.int64)
+    members = np.flatnonzero((parents >= 0) & entity)
+    graph = sparse.csr_matrix(
+        (np.ones(len(targets) + len(use_targets) + len(members),
+                 dtype=np.int8),
+         (np.concatenate([sources, use_sources, members]),
+          np.concatenate([targets, use_targets, parents[members]]))),
+        shape=(n, n)
+    )
+    n_components, labels = csgraph.connected_components(
+        graph, directed=True, connection='strong'
+    )
+    sizes = np.bincount(labels[entity], minlength=n_components)
+
+    # graph of the components (only those with entities, i.e. not those of
+    # the parts of names, which are not linked to any other)
+    active = np.flatnonzero(sizes > 0)
+    position = np.full(n_components, -1)
+    position[active] = np.arange(len(active))
+    coo = graph.tocoo()
+    between = labels[coo.row] != labels[coo.col]
+    dag = sparse.csr_matrix(
+        (np.ones(int(between.sum()), dtype=np.int8),
+         (position[labels[coo.row[between]]],
+          position[labels[coo.col[between]]])),
+        shape=(len(active), len(active))
+    )
+    dag.sum_duplicates()
+    closures = _closure_sizes(dag, sizes[active], memory, np)
+    dependents = _closure_sizes(dag.transpose().tocsr(), sizes[active],
+                                memory, np)
+
+    # entities reached from any program (through a virtual entity calling
+    # all programs)
+    programs = np.flatnonzero(kinds == list(_node_attrs).index('PROGRAM'))
+    reached = np.zeros(n, dtype=bool)
+    if len(programs):
+        extended = sparse.vstack([
+            sparse.hstack([graph, sparse.csr_matrix((n, 1), dtype=np.int8)]),
+            sparse.csr_matrix(
+                (np.ones(len(programs), dtype=np.int8),
+                 (np.zeros(len(programs), dtype=np.int64), programs)),
+                shape=(1, n + 1)
+            )
+        ]).tocsr()
+        order = csgraph.breadth_first_order(
+            extended, n, directed=True, return_predecessors=False
+        )
+        reached[order[order < n]] = True
+
+    # programs and modules calling any member of each program or module
+    # (or using it without only)
+    heads = np.asarray(model['heads'], dtype=np.int64)
+    callers = np.concatenate([sources, use_sources])
+    callees = np.concatenate([targets, use_targets])
+    outside = heads[callers] != heads[callees]
+    users = np.bincount(
+        np.unique(heads[callees[outside]] * n + heads[callers[outside]]) // n,
+        minlength=n
+    )
+
+    names = model['names']
+    files = model['files']
+    kind_names = list(_node_attrs)
+    locations = model['locations']
+    routines = {kind_names.index(kind)
+                for kind in ['SUBROUTINE', 'FUNCTION']}
+    cycles = {}
+
+    metrics = []
+    for symbol in np.flatnonzero(entity):
+        component = position[labels[symbol]]
+        size = sizes[labels[symbol]]
+        metrics.append({
+            'name': names[symbol],
+            'kind': kind_names[kinds[symbol]] if kinds[symbol] != _no_kind
+            else 'VARIABLE',
+            'file': files[locations[symbol]]
+            if locations[symbol] != _no_location else None,
+            'fan_in': int(fan_in[symbol]),
+            'fan_out': int(fan_out[symbol]),
+            'closure': int(closures[component]) - 1,
+            'dependents': int(dependents[component]) - 1,
+            'cycle': int(size) if size > 1 else 0,
+            'reached': bool(reached[symbol]),
+            'users': int(users[symbol]) if heads[symbol] == symbol else None
+        })
+        if size > 1:
+            cycles.setdefault(component, []).append(names[symbol])
+
+    return {
+        'entities': metrics,
+        'modules': sorted(
+            ([entry['name'], entry['users'], entry['dependents']]
+             for entry in metrics if entry['kind'] == 'MODULE'),
+            key=lambda entry: (-entry[2], -entry[1], entry[0])
+        ),
+        'dead': sorted(
+            names[symbol] for symbol in np.flatnonzero(
+                entity & ~reached & np.isin(kinds, list(routines))
+                & (np.asarray(locations) != _no_location)
+            )
+        ) if len(programs) else [],
+        'cycles': sorted(sorted(cycle) for cycle in cycles.values())
+    }
+
+
+def format_metrics(metrics, top=10):
+    # summary of the metrics of call_graph_metrics
+    lines = [f"{len(metrics['entities'])} entities, "
+             f"{len(metrics['cycles'])} cycle(s), "
+             f"{len(metrics['dead'])} subroutine(s)/function(s) not reached "
+             f"from any program"]
+    lines.append("# most depended-on modules (users, dependents)")
+    lines.extend(f"{name}: {users}, {dependents}"
+                 for name, users, dependents in metrics['modules'][:top])
+    for column in ['fan_in', 'fan_out', 'closure']:
+        lines.append(f"# largest {column.replace('_', '-')}")
+        lines.extend(
+            f"{entry['name']}: {entry[column]}"
+            for entry in sorted(metrics['entities'],
+                                key=lambda entry: (-entry[column],
+                                                   entry['name']))[:top]
+        )
+    return '\n'.join(lines)
+
+
+def write_metrics(metrics, filename):
+    # store the metrics of call_graph_metrics in JSON format (if the name
+    # of the file ends with .json) or the metrics of each entity in CSV
+    # format (otherwise)
+    if filename.endswith('.json'):
+        with open(filename, 'w') as f:
+            json.dump(metrics, f, indent=2)
+    else:
+        import csv
+
+        with open(filename, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=_metrics_columns)
+            writer.writeheader()
+            writer.writerows(metrics['entities'])
+
+
+def list_sources(locations, nodes, sep_, dependencies=None):
+    # generate list of files required for compilation (in an order in
+    # which they can be compiled given the dependencies between files, if
+    # given, see module_dependencies)
+    list_files = set()
+    for node in nodes:
+        if node in locations:
+            list_files.add(locations[node])
+        elif node in _intrinsic_fortran:
+            pass
+        else:
+            # it is a variable
+            node_ = sep_.join(node.split(sep_)[:-1])
+            if node_ in locations:
+                list_files.add(locations[node_])
+            elif node_ in _intrinsic_fortran:
+                pass
+            else:
+                raise KeyError(f"location for node '{node}' not found")
+
+    levels, _ = compile_levels(list_files, dependencies or {})
+    return [file_ for level in levels for file_ in level]
+
+
+def write_sources(f, sources):
+    # one file per line, written as they are listed
+    f.writelines(f"{file_}\n" for file_ in sources)
+
+
+def format_sources(sources):
+    f = StringIO()
+    write_sources(f, sources)
+    return f.getvalue()
+
+
+def generate_sources_file(root_caller, locations, nodes, sep_, out_dir,
+                          dependencies=None):
+    # create a text file listing required source files in compilation order
+    with open(sep.join([out_dir, '{}.sources'.format(root_caller)]), 'w',
+              buffering=_buffer_size) as f:
+        write_sources(f, list_sources(locations, nodes, sep_, dependencies))
+
+
+def list_dependencies(ext_caller_callees, locations, sep_):
+    # gather dependencies per target
+    dependencies = {}
+
+    for caller, callees in ext_caller_callees.items():
+        parent = caller.split(sep_)[0]
+        try:
+            target = locations[parent]
+        except KeyError:
+            RuntimeError(f"{parent} has no location")
+
+        requirements = set()
+        for callee in callees:
+            child = callee.split(sep_)[0]
+            if child != parent:
+                try:
+                    requirements.add(locations[child])
+                except KeyError:
+                    RuntimeError(f"{child} has no location")
+
+        if requirements:
+            if target not in dependencies:
+                dependencies[target] = set()
+            dependencies[target].update(requirements)
+
+    # requirements in alphabetical order (targets in order of appearance)
+    return {target: sorted(requirements)
+            for target, requirements in dependencies.items()}
+
+
+def list_sources_compact(model, nodes, dependencies=None):
+    # same as list_sources on the compact representation of the results
+    # of the parsing (see module_dependencies_compact)
+    names = model['names']
+    locations = model['locations']
+    parents = model['parents']
+    files = model['files']
+
+    list_files = set()
+    for node in nodes:
+        if locations[node] != _no_location:
+            list_files.add(files[locations[node]])
+        elif names[node] in _intrinsic_fortran:
+            pass
+        else:
+            # it is a variable
+            node_ = parents[node]
+            if node_ == _no_parent:
+                raise KeyError(f"location for node '{names[node]}' not found")
+            elif locations[node_] != _no_location:
+                list_files.add(files[locations[node_]])
+            elif names[node_] in _intrinsic_fortran:
+                pass
+            else:
+                raise KeyError(f"location for node '{names[node]}' not found")
+
+    levels, _ = compile_levels(list_files, dependencies or {})
+    return [file_ for level in levels for file_ in level]
+
+
+def list_dependencies_compact(model, ext_caller_callees):
+    # same as list_dependencies on the compact representation of the
+    # results of the parsing (with the callers and callees as identifiers)
+    locations = model['locations']
+    heads = model['heads']
+    files = model['files']
+
+    # gather dependencies per target
+    dependencies = {}
+
+    for caller, callees in ext_caller_callees.items():
+        parent = heads[caller]
+        if locations[parent] != _no_location:
+            target = files[locations[parent]]
+
+        requirements = set()
+        for callee in callees:
+            child = heads[callee]
+            if (child != parent) and (locations[child] != _no_location):
+                requirements.add(locations[child])
+
+        if requirements:
+            if target not in dependencies:
+                dependencies[target] = set()
+            dependencies[target].update(files[r] for r in requirements)
+
+    return {target: sorted(requirements)
+            for target, requirements in dependencies.items()}
+
+
+def module_dependencies(ext_caller_callees, kinds, locations, sep_):
+    # files required to compile each file, i.e. the files of the modules
+    # used in the file (found from the edges of a call graph between the
+    # entities of different modules, other edges being calls to external
+    # subroutines/functions which are only required for linking)
+    dependencies = {}
+
+    for caller, callees in ext_caller_callees.items():
+        parent = caller.split(sep_)[0]
+        if parent not in locations:
+            continue
+        target = locations[parent]
+
+        for callee in callees:
+            child = callee.split(sep_)[0]
+            if (child != parent) and (kinds.get(child) == 'MODULE') and (
+                    child in locations) and (locations[child] != target):
+                if target not in dependencies:
+                    dependencies[target] = set()
+                dependencies[target].add(locations[child])
+
+    return dependencies
+
+
+def module_dependencies_compact(model, ext_caller_callees):
+    # same as module_dependencies on the compact representation of the
+    # results of the parsing (with the callers and callees as identifiers)
+    kinds = model['kinds']
+    locations = model['locations']
+    heads = model['heads']
+    files = model['files']
+
+    module = list(_node_attrs).index('MODULE')
+    dependencies = {}
+
+    for caller, callees in ext_caller_callees.items():
+        parent = heads[caller]
+        if locations[parent] == _no_location:
+            continue
+        target = locations[parent]
+
+        for callee in callees:
+            child = heads[callee]
+            if (child != parent) and (kinds[child] == module) and (
+                    locations[child] not in (_no_location, target)):
+                if files[target] not in dependencies:
+                    dependencies[files[target]] = set()
+                dependencies[files[target]].add(files[locations[child]])
+
+    return dependencies
+
+
+def add_module_uses(nodes, ext_caller_callees, uses, caller_callees,
+                    locations, sep_):
+    # nodes and edges of a call graph with the modules of the source code
+    # used without only added (which are not nodes of the call graph
+    # themselves, but whose files are required to compile the files using
+    # them), as edges from the nodes using them, and in turn from these
+    # modules to the modules they use without only and to the entities
+    # they import using only, to find the files required and the
+    # dependencies between files
+    extra = []
+    edges = {}
+    graph_nodes = set(nodes)
+    seen = set(graph_nodes)
+    users = list(nodes)
+    while users:
+        user = users.pop()
+        callees = [module for module in uses.get(user, ())
+                   if module in locations]
+        if user not in graph_nodes:
+            # i.e. added here, with the entities it requires at its scope
+            callees.extend(
+                callee for callee in caller_callees.get(user, ())
+                if callee.split(sep_)[0] in locations
+            )
+        if not callees:
+            continue
+
+        edges[user] = callees
+        for callee in callees:
+            if callee not in seen:
+                seen.add(callee)
+                extra.append(callee)
+            module = callee.split(sep_)[0]
+            if module not in seen:
+                seen.add(module)
+                users.append(module)
+
+    if not edges:
+        return nodes, ext_caller_callees
+
+    combined = dict(ext_caller_callees)
+    for user, callees in edges.items():
+        combined[user] = [*combined.get(user, ()), *callees]
+    return [*nodes, *extra], combined
+
+
+def add_module_uses_compact(model, nodes, ext_caller_callees):
+    # same as add_module_uses on the compact representation of the results
+    # of the parsing (with the modules used without only in the model, see
+    # compact_parse_results)
+    uses = model['uses']
+    locations = model['locations']
+    heads = model['heads']
+    call_offsets, call_targets = model['calls']
+
+    extra = []
+    edges = {}
+    graph_nodes = set(nodes)
+    seen = set(graph_nodes)
+    users = list(nodes)
+    while users:
+        user = users.pop()
+        callees = [module for module in uses.get(user, ())
+                   if locations[module] != _no_location]
+        if user not in graph_nodes:
+            # i.e. added here, with the entities it requires at its scope
+            callees.extend(
+                callee for callee in call_targets[
+                    call_offsets[user]:call_offsets[user + 1]]
+                if locations[heads[callee]] != _no_location
+            )
+        if not callees:
+            continue
+
+        edges[user] = callees
+        for callee in callees:
+            if callee not in seen:
+                seen.add(callee)
+                extra.append(callee)
+            module = heads[callee]
+            if module not in seen:
+                seen.add(module)
+                users.append(module)
+
+    if not edges:
+        return nodes, ext_caller_callees
+
+    combined = dict(ext_caller_callees)
+    for user, callees in edges.items():
+        combined[user] = [*combined.get(user, ()), *callees]
+    return [*nodes, *extra], combined
+
+
+def compile_levels(files, dependencies):
+    # group the files into levels such that each file only requires files
+    # of lower levels (i.e. the files of a level can be compiled at the
+    # same time once those of the lower levels are), with the files that
+    # require each other in a cycle (which cannot be ordered) put in the
+    # same level, and return the levels (with their files in alphabetical
+    # order) and the cycles found (as lists of files in alphabetical order)
+    files = sorted(files)
+    known = set(files)
+    required = {
+        file_: sorted(known.intersection(dependencies.get(file_, ())))
+        for file_ in files
+    }
+
+    # find strongly connected components (using an iterative version of
+    # Tarjan's algorithm, which yields them in reverse topological order,
+    # i.e. with the files required before the files requiring them)
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    component = {}
+    components = []
+
+    for root in files:
+        if root in index:
+            continue
+
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(required[root]))]
+
+        while work:
+            v, it = work[-1]
+            for w in it:
+                if w not in index:
+                    index[w] = lowlink[w] = len(index)
+                    stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, iter(required[w])))
+                    break
+                elif w in on_stack:
+                    lowlink[v] = min(lowlink[v], index[w])
+            else:
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    lowlink[u] = min(lowlink[u], lowlink[v])
+                if lowlink[v] == index[v]:
+                    members = []
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        component[w] = len(components)
+                        members.append(w)
+                        if w == v:
+                            break
+                    components.append(members)
+
+    # level of each component, one above the highest level it requires
+    levels = []
+    component_levels = []
+    for c, members in enumerate(components):
+        level = 1 + max(
+            (component_levels[component[w]]
+             for v in members for w in required[v] if component[w] != c),
+            default=-1
+        )
+        component_levels.append(level)
+        if level == len(levels):
+            levels.append([])
+        levels[level].extend(members)
+
+    cycles = [sorted(members) for members in components if len(members) > 1]
+
+    return [sorted(level) for level in levels], sorted(cycles)
+
+
+def format_levels(levels):
+    # one level per line, with its files separated by spaces
+    return ''.join(' '.join(level) + '\n' for level in levels)
+
+
+def object_path(source, source_dir, build_dir):
+    # path of the object file resulting from the compilation of a source
+    # file, i.e. with the source directory the path starts with replaced
+    # by the build directory, and the extension replaced by .o (leaving
+    # any other occurrence of either in the path as it is)
+    if build_dir != source_dir:
+        top = source_dir.rstrip(sep) + sep
+        if source.startswith(top):
+            source = sep.join([build_dir.rstrip(sep), source[len(top):]])
+    return splitext(source)[0] + '.o'
+
+
+def _ninja_escape(path):
+    return path.replace('$', '$$').replace(' ', '$ ').replace(':', '$:')
+
+
+def _cmake_quote(path):
+    return '"{}"'.format(path.replace('\\', '\\\\').replace('"', '\\"'))
+
+
+def write_dependencies(f, dependencies, source_dir, build_dir, format_='make'):
+    # write object dependencies one target at a time (see list_dependencies),
+    # either as makefile rules, as a json object, as ninja build statements
+    # (for a 'fortran' rule to be defined in the build file including them),
+    # or as cmake source properties
+    objects = {}
+
+    def object_(source):
+        if source not in objects:
+            objects[source] = object_path(source, source_dir, build_dir)
+        return objects[source]
+
+    if format_ == 'make':
+        for target, requirements in dependencies.items():
+            f.write(f"{object_(target)}: \\\n")
+            f.write(' \\\n'.join(map(object_, requirements)))
+            f.write('\n\n')
+    elif format_ == 'json':
+        f.write('{')
+        for i, (target, requirements) in enumerate(dependencies.items()):
+            f.write(',\n  ' if i else '\n  ')
+            f.write(f"{json.dumps(object_(target))}: "
+                    f"{json.dumps([object_(r) for r in requirements])}")
+        f.write('\n}\n' if dependencies else '}\n')
+    elif format_ == 'ninja':
+        for target, requirements in dependencies.items():
+            f.write(f"build {_ninja_escape(object_(target))}: fortran "
+                    f"{_ninja_escape(target)} | ")
+            f.write(' '.join(_ninja_escape(object_(r)) for r in requirements))
+            f.write('\n')
+    elif format_ == 'cmake':
+        for target, requirements in dependencies.items():
+            f.write(f"set_property(SOURCE {_cmake_quote(target)} APPEND "
+                    f"PROPERTY OBJECT_DEPENDS\n")
+            f.write(''.join(f"  {_cmake_quote(object_(r))}\n"
+                            for r in requirements))
+            f.write(')\n')
+    else:
+        raise ValueError(f"unknown dependencies format '{format_}'")
+
+
+def format_dependencies(dependencies, source_dir, build_dir, format_='make'):
+    f = StringIO()
+    write_dependencies(f, dependencies, source_dir, build_dir, format_)
+    return f.getvalue()
+
+
+def generate_dependencies_file(root_caller, ext_caller_callees, locations,
+                               sep_, source_dir, build_dir, out_dir,
+                               formats=('make',)):
+    # create files containing object dependencies (one per format, e.g.
+    # for makefile)
+    dependencies = list_dependencies(ext_caller_callees, locations, sep_)
+    for format_ in formats:
+        filename = '{}.{}'.format(root_caller, _dependencies_suffixes[format_])
+        with open(sep.join([out_dir, filename]), 'w',
+                  buffering=_buffer_size) as f:
+            write_dependencies(f, dependencies, source_dir, build_dir, format_)
+
+
+def _reachable(root_caller, caller_callees, memberships, kinds, sep_,
+               ignore=None, without_variables=False):
+    # nodes and edges reachable from root caller
+    reachability = compute_reachability(
+        [root_caller], caller_callees, memberships, kinds, sep_,
+        ignore, without_variables
+    )[root_caller]
+
+    if reachability is None:
+        _, nodes, ext_caller_callers = build_call_graph(
+            root_caller, caller_callees, memberships, kinds, sep_,
+            ignore, False, without_variables
+        )
+    else:
+        nodes, _, ext_caller_callers = reachability
+
+    return nodes, ext_caller_callers
+
+
+def answer_query(query, caller_callees, memberships, kinds, locations, sep_,
+                 memo=None, uses=None):
+    # answer a query about the parsed source code given as a dictionary
+    # with the name of the query and its arguments, e.g.
+    # {"query": "is_reachable", "root": "snow_mod__snow",
+    #  "symbol": "jules_snow_mod__nsmax"}
+    # (memo is to keep results that can be reused until the next parsing,
+    # and uses the modules used without only, see merge_parse_results)
+    memo = {} if memo is None else memo
+    uses = {} if uses is None else uses
+
+    name = query.get('query')
+    symbol = query.get('symbol')
+    root = query.get('root')
+    ignore = tuple(query.get('ignore') or ())
+    without_variables = bool(query.get('without_variables', False))
+
+    def reachable():
+        key = ('reachable', root, ignore, without_variables)
+        if key not in memo:
+            memo[key] = _reachable(
+                root, caller_callees, memberships, kinds, sep_,
+                ignore, without_variables
+            )
+        return memo[key]
+
+    def required():
+        # with the modules used without only (see add_module_uses)
+        key = ('required', root, ignore, without_variables)
+        if key not in memo:
+            memo[key] = add_module_uses(
+                *reachable(), uses, caller_callees, locations, sep_
+            )
+        return memo[key]
+
+    def reverse_index():
+        if 'reverse_index' not in memo:
+            memo['reverse_index'] = build_reverse_index(
+                caller_callees, memberships, kinds, sep_
+            )
+        return memo['reverse_index']
+
+    if name == 'callees':
+        return list(dict.fromkeys(caller_callees.get(symbol, [])))
+    elif name == 'callers':
+        return reverse_index()[0].get(symbol, [])
+    elif name == 'kind':
+        return kinds.get(symbol)
+    elif name == 'location':
+        return locations.get(symbol)
+    elif name == 'reachable':
+        return reachable()[0]
+    elif name == 'is_reachable':
+        key = ('reachable_set', root, ignore, without_variables)
+        if key not in memo:
+            memo[key] = set(reachable()[0])
+        return symbol in memo[key]
+    elif name == 'sources':
+        return list_sources(
+            locations, required()[0], sep_,
+            module_dependencies(required()[1], kinds, locations, sep_)
+        )
+    elif name == 'levels':
+        nodes, ext_caller_callees = required()
+        requirements = module_dependencies(
+            ext_caller_callees, kinds, locations, sep_
+        )
+        levels, cycles = compile_levels(
+            list_sources(locations, nodes, sep_, requirements), requirements
+        )
+        return {'levels': levels, 'cycles': cycles}
+    elif name == 'dependencies':
+        return {
+            target: sorted(set(requirements))
+            for target, requirements in list_dependencies(
+                required()[1], locations, sep_
+            ).items()
+        }
+    elif name == 'callers_of':
+        symbols = query.get('symbols') or [symbol]
+        callers = find_callers(
+            symbols, caller_callees, memberships, kinds, sep_,
+            ignore, without_variables, reverse_index()
+        )
+        return impact_report(symbols, callers, kinds, locations, sep_,
+                             query.get('roots'), reverse_index())
+    else:
+        raise ValueError(f"unknown query '{name}'")
+
+
+class CallGraph:
+    # results of the parsing of the source code kept in memory to build the
+    # call graphs of any number of root callers and to find their sources
+    # and dependencies, with the results for each root caller (and set of
+    # callees ignored) kept until the source code is parsed again, e.g.
+    #     call_graph = CallGraph.from_source_dir('jules-vn6.0/srcpp', jobs=0)
+    #     call_graph.sources('snow_mod__snow')
+    #     call_graph.refresh()  # parse again only the files modified
+
+    def __init__(self, caller_callees, memberships, kinds, locations,
+                 sep_='__', uses=None):
+        self.caller_callees = caller_callees
+        self.memberships = memberships
+        self.kinds = kinds
+        self.locations = locations
+        self.sep = sep_
+        # modules used without only in each scope (see merge_parse_results)
+        self.uses = {} if uses is None else uses
+        # parse result of each file (with its size and modification time)
+        # and how to find the files again, if built from a source directory
+        self._results = None
+        self._search = None
+        self._memo = {}
+
+    @classmethod
+    def from_source_dir(cls, source_dir='.', extensions=('f90',),
+                        exclude=None, sep_='__', jobs=1, cache_file=None):
+        # parse the Fortran files in the source directory (only those not
+        # already parsed in the cache if a cache file is given)
+        fortran_files = list(
+            walk_fortran_files(source_dir, extensions, exclude)
+        )
+        if cache_file:
+            results = {
+                fortran_file: ((status.st_size, status.st_mtime_ns), result)
+                for fortran_file, status, result in zip(
+                    fortran_files, map(stat, fortran_files),
+                    _parse_each_cached(fortran_files, sep_, jobs, cache_file,
+                                       source_dir)
+                )
+            }
+        else:
+            results, _ = update_parse_results(fortran_files, sep_, None, jobs)
+
+        caller_callees, memberships, kinds, locations, uses = (
+            merge_parse_results((results[fortran_file][1]
+                                 for fortran_file in fortran_files
+                                 if fortran_file in results), sep_=sep_)
+        )
+        call_graph = cls(caller_callees, memberships, kinds, locations, sep_,
+                         uses)
+        call_graph._results = results
+        call_graph._search = (source_dir, extensions, exclude, jobs)
+        return call_graph
+
+    @classmethod
+    def from_snapshot(cls, filename, sep_='__'):
+        # load the results of a parsing stored using export_graph
+        caller_callees, memberships, kinds, locations, uses, _ = load_graph(
+            filename, sep_
+        )
+        return cls(caller_callees, memberships, kinds, locations, sep_, uses)
+
+    def refresh(self):
+        # parse again the files modified (or added or removed) since they
+        # were parsed, forgetting all the results kept if any was, and
+        # return these files
+        if self._search is None:
+            raise RuntimeError("call graph not built from a source directory")
+        source_dir, extensions, exclude, jobs = self._search
 
+        fortran_files = list(
+            walk_fortran_files(source_dir, extensions, exclude)
+        )
+        results, changed = update_parse_results(
+            fortran_files, self.sep, self._results, jobs
+        )
+        if changed:
+            (self.caller_callees, self.memberships, self.kinds,
+             self.locations, self.uses) = merge_parse_results(
+                (results[fortran_file][1] for fortran_file in fortran_files
+                 if fortran_file in results), sep_=self.sep
+            )
+            self._memo = {}
+        self._results = results
 
-def parse_fortran_files(fortran_files, sep_):
-    # parse files
-    locations = {}
-    caller_callees = {}
-    memberships = {}
-    kinds = {}
+        return sorted(changed)
 
-    for fortran_file in fortran_files:
-        # internal subroutines and functions
-        internal = []
-        # variable or subroutine/function renaming using '=>'
-        renaming = {}
-        # store name of modules from use to append in call
-        use_to_call = {}
-        # to know if we are in an interface block
-        in_interface = False
-        # to unwrap wrapped lines using '&'
-        line_continued = ''
-        # to store current location in tree view
-        breadcrumbs = []
-
-        # first pass to find out which functions/subroutines are internal
-        with open(fortran_file, 'r') as f:
-            for i, line in enumerate(f):
-                # ignore commented lines
-                if line.strip().startswith('!') or line.strip().startswith('#'):
-                    continue
+    def _memoised(self, key, function, *args):
+        if key not in self._memo:
+            self._memo[key] = function(*args)
+        return self._memo[key]
 
-                # unwrap continued lines
-                if line.strip().endswith('&'):
-                    line_continued += ' ' + line.strip()[:-1]
-                    continue
-                elif line_continued:
-                    line = line_continued + ' ' + line.strip()
-                    line_continued = ''
-
-                # eliminate inline comments
-                if '!' in line:
-                    line = line.split('!')[0]
-
-                # find subroutines
-                if re.search(r"(SUBROUTINE +)([0-9A-Za-z_]+)", line):
-                    internal.append(re.search(r"(SUBROUTINE +)([0-9A-Za-z_]+)", line).group(2).lower())
-                # find functions
-                elif re.search(r"(FUNCTION +)([0-9A-Za-z_]+)", line):
-                    internal.append(re.search(r"(FUNCTION +)([0-9A-Za-z_]+)", line).group(2).lower())
-
-        # second pass to properly parse the file
-        with open(fortran_file, 'r') as f:
-            for i, line in enumerate(f):
-                lineno = i + 1
-
-                # ignore commented lines
-                if line.strip().startswith('!') or line.strip().startswith('#'):
-                    continue
+    def _reached(self, root_caller, ignore=None, without_variables=False):
+        # nodes and edges reachable from root caller
+        ignore = frozenset(ignore) if ignore else frozenset()
+        return self._memoised(
+            ('reachable', root_caller, ignore, without_variables),
+            _reachable, root_caller, self.caller_callees, self.memberships,
+            self.kinds, self.sep, ignore, without_variables
+        )
 
-                # unwrap continued lines
-                if line.strip().endswith('&'):
-                    line_continued += ' ' + line.strip()[:-1]
-                    continue
-                elif line_continued:
-                    line = line_continued + ' ' + line.strip()
-                    line_continued = ''
-
-                # eliminate inline comments
-                if '!' in line:
-                    line = line.split('!')[0]
-
-                # find interfaces
-                if re.search(r"(END +INTERFACE *)([0-9A-Za-z_]*)", line):
-                    name = re.search(r"(END +INTERFACE *)([0-9A-Za-z_]*)", line).group(2).lower()
-                    if not in_interface:
-                        raise RuntimeError("'END INTERFACE' found without 'INTERFACE': "
-                                           "{} in {} #L{}".format(name, fortran_file, lineno))
-                    else:
-                        in_interface = False
-                elif in_interface in ['operator', 'assignment', 'generic']:
-                    # ignore these type of interfaces
-                    continue
-                elif re.search(r"(INTERFACE +)(operator *\()", line):
-                    # ignore interface since overloaded operator on type
-                    in_interface = 'operator'
-                elif re.search(r"(INTERFACE +)(assignment *\()", line):
-                    # ignore interface since overloaded assignment on type
-                    in_interface = 'assignment'
-                elif re.search(r"(INTERFACE +)([0-9A-Za-z_]+)", line):
-                    name = re.search(r"(INTERFACE +)([0-9A-Za-z_]+)", line).group(2).lower()
-                    if breadcrumbs:
-                        if breadcrumbs[-1] not in memberships:
-                            memberships[breadcrumbs[-1]] = []
-                        memberships[breadcrumbs[-1]].append(name)
-                    kinds[sep_.join(breadcrumbs + [name])] = 'GENERIC_INTERFACE'
-                    locations[sep_.join(breadcrumbs + [name])] = fortran_file
-                    # ignore interface since also defined elsewhere
-                    in_interface = 'generic'
-                elif re.search(r"(INTERFACE *)", line):
-                    # proceed as if not in an interface
-                    in_interface = 'explicit'
+    def _required(self, root_caller, ignore=None, without_variables=False):
+        # nodes and edges reachable from root caller with the modules used
+        # without only (see add_module_uses)
+        ignore = frozenset(ignore) if ignore else frozenset()
+        return self._memoised(
+            ('required', root_caller, ignore, without_variables),
+            add_module_uses,
+            *self._reached(root_caller, ignore, without_variables),
+            self.uses, self.caller_callees, self.locations, self.sep
+        )
 
-                # find programs
-                if re.search(r"(END +PROGRAM +)([0-9A-Za-z_]+)", line):
-                    name = re.search(r"(END +PROGRAM +)([0-9A-Za-z_]+)", line).group(2).lower()
-                    if breadcrumbs and (name == breadcrumbs[-1]):
-                        breadcrumbs.pop(-1)
-                        if breadcrumbs:
-                            raise RuntimeError("'PROGRAM' closed but remainder: "
-                                               "{} in {} #L{}".format(name, fortran_file, lineno))
-                    else:
-                        raise RuntimeError("'END PROGRAM' found without 'program': "
-                                           "{} in {} #L{}".format(name, fortran_file, lineno))
-                elif re.search(r"(PROGRAM +)([0-9A-Za-z_]+)", line):
-                    name = re.search(r"(PROGRAM +)([0-9A-Za-z_]+)", line).group(2).lower()
-                    breadcrumbs.append(name)
-                    kinds[sep_.join(breadcrumbs)] = 'PROGRAM'
-                    locations[sep_.join(breadcrumbs)] = fortran_file
-
-                # find modules
-                elif re.search(r"(END +MODULE +)([0-9A-Za-z_]+)", line):
-                    name = re.search(r"(END +MODULE +)([0-9A-Za-z_]+)", line).group(2).lower()
-                    if breadcrumbs and (name == breadcrumbs[-1]):
-                        breadcrumbs.pop(-1)
-                        if breadcrumbs:
-                            raise RuntimeError("'MODULE' closed but remainder: "
-                                               "{} in {} #L{}".format(name, fortran_file, lineno))
-                    else:
-                        raise RuntimeError("'END MODULE' found without 'MODULE': "
-                                           "{} in {} #L{}".format(name, fortran_file, lineno))
-                elif re.search(r"(MODULE +)([0-9A-Za-z_]+)", line):
-                    name = re.search(r"(MODULE +)([0-9A-Za-z_]+)", line).group(2).lower()
-                    breadcrumbs.append(name)
-                    kinds[sep_.join(breadcrumbs)] = 'MODULE'
-                    locations[sep_.join(breadcrumbs)] = fortran_file
-
-                # find types
-                elif re.search(r"(END +TYPE +)([0-9A-Za-z_]*)", line):
-                    name = re.search(r"(END +TYPE *)([0-9A-Za-z_]*)", line).group(2).lower()
-                    if breadcrumbs and (name == breadcrumbs[-1]):
-                        breadcrumbs.pop(-1)
-                    else:
-                        raise RuntimeError("'END TYPE' found without 'TYPE': "
-                                           "{} in {} #L{}".format(name, fortran_file, lineno))
+    def _requirements(self, root_caller, ignore=None, without_variables=False):
+        # files required to compile each file of the call graph
+        ignore = frozenset(ignore) if ignore else frozenset()
+        return self._memoised(
+            ('requirements', root_caller, ignore, without_variables),
+            module_dependencies,
+            self._required(root_caller, ignore, without_variables)[1],
+            self.kinds, self.locations, self.sep
+        )
 
-                elif re.search(r"(TYPE +)([0-9A-Za-z_]+)", line):
-                    name = re.search(r"(TYPE +)([0-9A-Za-z_]+)", line).group(2).lower()
-                    if breadcrumbs:
-                        if breadcrumbs[-1] not in memberships:
-                            memberships[breadcrumbs[-1]] = []
-                        memberships[breadcrumbs[-1]].append(name)
-                    breadcrumbs.append(name)
-                    kinds[sep_.join(breadcrumbs)] = 'TYPE'
-                    locations[sep_.join(breadcrumbs)] = fortran_file
-
-                # find subroutines
-                elif re.search(r"(END +SUBROUTINE +)([0-9A-Za-z_]+)", line):
-                    name = re.search(r"(END +SUBROUTINE +)([0-9A-Za-z_]+)", line).group(2).lower()
-                    if breadcrumbs and (name == breadcrumbs[-1]):
-                        breadcrumbs.pop(-1)
-                    else:
-                        raise RuntimeError("'END SUBROUTINE' found without 'SUBROUTINE': "
-                                           "{} in {} #L{}".format(name, fortran_file, lineno))
-                elif re.search(r"(SUBROUTINE +)([0-9A-Za-z_]+)", line):
-                    name = re.search(r"(SUBROUTINE +)([0-9A-Za-z_]+)", line).group(2).lower()
-                    if breadcrumbs:
-                        if breadcrumbs[-1] not in memberships:
-                            memberships[breadcrumbs[-1]] = []
-                        memberships[breadcrumbs[-1]].append(name)
-                    breadcrumbs.append(name)
-                    kinds[sep_.join(breadcrumbs)] = 'SUBROUTINE'
-                    locations[sep_.join(breadcrumbs)] = fortran_file
-
-                # find functions
-                elif re.search(r"(END +FUNCTION +)([0-9A-Za-z_]+)", line):
-                    name = re.search(r"(END +FUNCTION +)([0-9A-Za-z_]+)", line).group(2).lower()
-                    if breadcrumbs and (name == breadcrumbs[-1]):
-                        breadcrumbs.pop(-1)
-                    else:
-                        raise RuntimeError("'END FUNCTION' found without 'FUNCTION': "
-                                           "{} in {} #L{}".format(name, fortran_file, lineno))
-                elif re.search(r"(FUNCTION +)([0-9A-Za-z_]+)", line):
-                    name = re.search(r"(FUNCTION +)([0-9A-Za-z_]+)", line).group(2).lower()
-                    if breadcrumbs:
-                        if breadcrumbs[-1] not in memberships:
-                            memberships[breadcrumbs[-1]] = []
-                        memberships[breadcrumbs[-1]].append(name)
-                    breadcrumbs.append(name)
-                    kinds[sep_.join(breadcrumbs)] = 'FUNCTION'
-                    locations[sep_.join(breadcrumbs)] = fortran_file
-
-                # find use statements
-                elif re.search(
-                        r"(USE +)([0-9A-Za-z_]+)( *, *ONLY *:)([0-9A-Za-z_,+\-*/=><() ]+)", line):
-                    match = re.search(r"(USE +)([0-9A-Za-z_]+)( *, *ONLY *:)([0-9A-Za-z_,+\-*/=><() ]+)", line)
-                    for name in match.group(4).lower().split(','):
-                        name = name.strip()
-                        if name:
-                            if sep_.join(breadcrumbs) not in caller_callees:
-                                caller_callees[sep_.join(breadcrumbs)] = []
-                            if '=>' in name:
-                                name1, name2 = name.split('=>')
-                                caller_callees[sep_.join(breadcrumbs)].append(
-                                    sep_.join([match.group(2).lower(), name2.strip()])
-                                )
-                                # store renaming
-                                renaming[name1.strip()] = name2.strip()
-                                # store module name
-                                use_to_call[name1.strip()] = match.group(2).lower()
-                            else:
-                                caller_callees[sep_.join(breadcrumbs)].append(
-                                    sep_.join([match.group(2).lower(), name])
-                                )
-                                # store module name
-                                use_to_call[name] = match.group(2).lower()
-
-                # find call statements
-                elif re.search(r"(CALL +)([0-9A-Za-z_]+)", line):
-                    name = re.search(r"(CALL +)([0-9A-Za-z_]+)", line).group(2).lower()
-                    # determine belonging of callee
-                    if name in use_to_call:
-                        # it is within another namespace in another file
-                        root = use_to_call[name]
-                    elif name in internal:
-                        if breadcrumbs:
-                            # it is within the namespace in the given file
-                            # (assuming only one namespace per file, which
-                            #  seems to be a reasonable assumption for JULES)
-                            root = breadcrumbs[0]
-                        else:
-                            # it is in the given file outside any namespace
-                            root = ''
-                    else:
-                        # it is in another file outside any namespace
-                        root = ''
-                    # rename if required
-                    if name in renaming:
-                        name = renaming[name]
-                    if sep_.join(breadcrumbs) not in caller_callees:
-                        caller_callees[sep_.join(breadcrumbs)] = []
-                    caller_callees[sep_.join(breadcrumbs)].append(
-                        sep_.join([root, name]) if root else name
-                    )
-                    # add call to subroutine kind (even if it may
-                    # already be in there, this makes sure calls to
-                    # external modules are picked up)
-                    kinds[sep_.join([root, name]) if root else name] = 'SUBROUTINE'
+    def reachable(self, root_caller, ignore=None, without_variables=False):
+        # entities in the call graph of the root caller
+        return self._reached(root_caller, ignore, without_variables)[0]
 
-    return caller_callees, memberships, kinds, locations
+    def is_reachable(self, root_caller, symbol, ignore=None,
+                     without_variables=False):
+        ignore = frozenset(ignore) if ignore else frozenset()
+        return symbol in self._memoised(
+            ('reachable_set', root_caller, ignore, without_variables),
+            set, self.reachable(root_caller, ignore, without_variables)
+        )
 
+    def subgraph(self, root_caller, ignore=None, clustering=False,
+                 without_variables=False, max_depth=None, max_nodes=None,
+                 siblings=True):
+        # call graph of the root caller (see build_call_graph)
+        ignore = frozenset(ignore) if ignore else frozenset()
+        return self._memoised(
+            ('subgraph', root_caller, ignore, clustering, without_variables,
+             max_depth, max_nodes, siblings),
+            build_call_graph, root_caller, self.caller_callees,
+            self.memberships, self.kinds, self.sep, ignore, clustering,
+            without_variables, max_depth, max_nodes, siblings
+        )[0]
 
-def generate_dot_and_pdf(root_caller, caller_callees, memberships, kinds,
-                         sep_, out_dir, ignore=None, clustering=False,
-                         without_variables=False):
-    # formatting
-    node_attrs = {
-        'PROGRAM': {
-            'shape': 'parallelogram',
-            'style': 'filled',
-            'fillcolor': 'grey'
-        },
-        'MODULE': {
-            'style': 'filled',
-            'fillcolor': 'grey'
-        },
-        'SUBROUTINE': {
-            'style': 'filled',
-            'fillcolor': 'transparent'
-        },
-        'FUNCTION': {
-            'style': 'filled',
-            'fillcolor': 'transparent'
-        },
-        # generic interface assimilated as subroutine/function
-        'GENERIC_INTERFACE': {
-            'style': 'filled',
-            'fillcolor': 'transparent'
-        },
-        'TYPE': {
-            'style': 'rounded',
-            'fillcolor': 'transparent'
-        },
-        'VARIABLE': {
-            'style': 'diagonals',
-            'fillcolor': 'transparent'
-        }
-    }
+    def sources(self, root_caller, ignore=None, without_variables=False):
+        # files required for the call graph of the root caller, in an order
+        # in which they can be compiled
+        ignore = frozenset(ignore) if ignore else frozenset()
+        return self._memoised(
+            ('sources', root_caller, ignore, without_variables),
+            list_sources, self.locations,
+            self._required(root_caller, ignore, without_variables)[0],
+            self.sep,
+            self._requirements(root_caller, ignore, without_variables)
+        )
 
-    graph_attrs = {
-        'engine': 'dot',
-        'graph_attr': {
-            'rankdir': 'LR',
-            'style': 'dotted'
-        },
-        # default edge
-        'edge_attr': {
-            'dir': 'both',
-            'arrowhead': 'normal',
-            'arrowtail': 'none'
-        },
-        # default node
-        'node_attr': {
-            'shape': 'box',
-            'fontname': 'Helvetica'
-        }
-    }
+    def levels(self, root_caller, ignore=None, without_variables=False):
+        # files required grouped into levels that can be compiled one after
+        # the other, and cycles between files (see compile_levels)
+        ignore = frozenset(ignore) if ignore else frozenset()
+        return self._memoised(
+            ('levels', root_caller, ignore, without_variables),
+            compile_levels,
+            self.sources(root_caller, ignore, without_variables),
+            self._requirements(root_caller, ignore, without_variables)
+        )
 
-    # create graph
-    base = gv.Digraph(name='base', **graph_attrs)
+    def dependencies(self, root_caller, ignore=None, without_variables=False):
+        # files required by each file to build the call graph (see
+        # list_dependencies)
+        ignore = frozenset(ignore) if ignore else frozenset()
+        return self._memoised(
+            ('dependencies', root_caller, ignore, without_variables),
+            list_dependencies,
+            self._required(root_caller, ignore, without_variables)[1],
+            self.locations, self.sep
+        )
 
-    # get initial caller
-    callers = [root_caller]
+    def callers_of(self, symbols, ignore=None, without_variables=False):
+        # entities from which any of the symbols is reached (see
+        # find_callers)
+        ignore = frozenset(ignore) if ignore else frozenset()
+        reverse_index = self._memoised(
+            ('reverse_index',), build_reverse_index, self.caller_callees,
+            self.memberships, self.kinds, self.sep
+        )
+        return self._memoised(
+            ('callers_of', frozenset(symbols), ignore, without_variables),
+            find_callers, symbols, self.caller_callees, self.memberships,
+            self.kinds, self.sep, ignore, without_variables, reverse_index
+        )
 
-    # start graph construction
-    graphs = {}
-    nodes = []
-    edges = []
-    ext_caller_callers = {}
+    def render(self, root_caller, out_dir, format_='pdf', ignore=None,
+               clustering=False, without_variables=False):
+        # store the call graph of the root caller in dot, and in the given
+        # format using the graph layout (unless no format is given)
+        render_call_graph(
+            root_caller,
+            self.subgraph(root_caller, ignore, clustering, without_variables),
+            out_dir, format_
+        )
 
-    while callers:
-        next_callers = []
-        for caller in callers:
-            # if caller not already a node, make it one
-            if caller not in nodes:
-                if caller not in kinds:
-                    # i.e. it is a variable
-                    if without_variables:
-                        continue
 
-                # split up parent and child in caller if possible
-                if sep_ in caller:
-                    parent, child = caller.split(sep_)
-                    if parent not in nodes:
-                        # create cluster graph if requested
-                        if clustering:
-                            if parent not in graphs:
-                                graph = gv.Digraph(
-                                    name='_'.join(['cluster', parent]),
-                                    **graph_attrs
-                                )
-                                graphs[parent] = graph
-                            else:
-                                graph = graphs[parent]
-                        else:
-                            graph = base
-
-                        # add node for parent
-                        graph.node(parent, **node_attrs[kinds.get(parent, 'MODULE')])
-                        nodes.append(parent)
-                        # add parent as potential next caller
-                        next_callers.append(parent)
-                        # add other children of parent as potential next caller
-                        if parent in memberships:
-                            for m in memberships[parent]:
-                                other_child = sep_.join([parent, m])
-                                # check whether to ignore callee
-                                if not (ignore and (other_child in ignore)):
-                                    # add child as potential next caller
-                                    next_callers.append(other_child)
-                    else:
-                        if parent in graphs:
-                            graph = graphs[parent]
-
-                    if (parent, child) not in edges:
-                        # add edge for parent-child relationship
-                        graph.edge(parent, caller, arrowhead='none',
-                                   arrowtail='diamond')
-                        edges.append((parent, child))
-                else:
-                    # assign caller to base graph
-                    graph = base
+def serve(source_dir, extensions, sep_, socket_path=None, poll=1.0, jobs=1,
+          exclude=None):
+    # parse the source code once and answer queries (as JSON objects, one
+    # per line, see answer_query) on a Unix socket or on the standard input
+    # and output, parsing again only the files modified in the meantime
+    import socketserver
+    import threading
 
-                # add node for caller
-                graph.node(
-                    name=caller, label=caller.split(sep_)[-1],
-                    **node_attrs[kinds.get(caller, 'VARIABLE')]
-                )
-                nodes.append(caller)
+    state = {'results': {}, 'model': None, 'memo': {}}
+    lock = threading.Lock()
 
-            # collect callees of current caller (if any)
-            callees = caller_callees.get(caller, [])
-            for callee in callees:
-                if ignore and (callee in ignore):
-                    continue
+    def refresh():
+        fortran_files = list(
+            walk_fortran_files(source_dir, extensions, exclude)
+        )
+        results, changed = update_parse_results(
+            fortran_files, sep_, state['results'], jobs
+        )
+        if changed or (state['model'] is None):
+            model = merge_parse_results(
+                (results[fortran_file][1] for fortran_file in fortran_files
+                 if fortran_file in results), sep_=sep_
+            )
+            with lock:
+                state['results'] = results
+                state['model'] = model
+                state['memo'] = {}
 
-                # if callee not already a node, make it one
-                if callee not in nodes:
-                    if callee not in kinds:
-                        # i.e. it is a variable
-                        if without_variables:
-                            continue
+    def poller():
+        while True:
+            time.sleep(poll)
+            try:
+                refresh()
+            except Exception as e:
+                # e.g. file caught while being written, try again later
+                print(f"callgrapher: {e}", file=sys.stderr)
 
-                    # split up parent and child in callee if possible
-                    if sep_ in callee:
-                        parent, child = callee.split(sep_)
-                        if parent not in nodes:
-                            # create cluster graph if requested
-                            if clustering:
-                                if parent not in graphs:
-                                    graph = gv.Digraph(
-                                        name='_'.join(['cluster', parent]),
-                                        **graph_attrs
-                                    )
-                                    graphs[parent] = graph
-                                else:
-                                    graph = graphs[parent]
-                            else:
-                                graph = base
-
-                            # add node for parent
-                            graph.node(parent, **node_attrs[kinds.get(parent, 'MODULE')])
-                            nodes.append(parent)
-                            # add parent as potential next caller
-                            next_callers.append(parent)
-                            # add other children of parent as potential next caller
-                            if parent in memberships:
-                                for m in memberships[parent]:
-                                    other_child = sep_.join([parent, m])
-                                    # check whether to ignore callee
-                                    if not (ignore and (other_child in ignore)):
-                                        # add child as potential next caller
-                                        next_callers.append(other_child)
-                        else:
-                            if parent in graphs:
-                                graph = graphs[parent]
-
-                        if (parent, child) not in edges:
-                            # add edge for parent-child relationship
-                            graph.edge(parent, callee, arrowhead='none',
-                                       arrowtail='diamond')
-                            edges.append((parent, child))
-                    else:
-                        # assign callee to base graph
-                        graph = base
+    def respond(line):
+        query = {}
+        try:
+            query = json.loads(line)
+            with lock:
+                *model, uses = state['model']
+                result = answer_query(query, *model, sep_, state['memo'],
+                                      uses)
+            response = {'ok': True, 'result': result}
+        except Exception as e:
+            query = query if isinstance(query, dict) else {}
+            response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+        if 'id' in query:
+            response['id'] = query['id']
+        return json.dumps(response)
 
-                    # add node for callee
-                    graph.node(
-                        name=callee, label=callee.split(sep_)[-1],
-                        **node_attrs[kinds.get(callee, 'VARIABLE')]
-                    )
-                    nodes.append(callee)
+    refresh()
+    threading.Thread(target=poller, daemon=True).start()
 
-                    # store callee as potential next caller
-                    next_callers.append(callee)
+    if socket_path:
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if line.strip():
+                        self.wfile.write(
+                            (respond(line.decode()) + '\n').encode()
+                        )
+                        self.wfile.flush()
 
-                # add edge between caller and callee
-                if (caller, callee) not in edges:
-                    base.edge(caller, callee)
-                    edges.append((caller, callee))
-                    if caller not in ext_caller_callers:
-                        ext_caller_callers[caller] = []
-                    ext_caller_callers[caller].append(callee)
+        # remove socket left behind by a server that was killed (if any)
+        if exists(socket_path):
+            unlink(socket_path)
 
-        # move on to next caller rank (eliminating duplicates)
-        next_callers = list(set(next_callers))
-        callers = next_callers
+        with socketserver.ThreadingUnixStreamServer(socket_path, Handler) as server:
+            server.daemon_threads = True
+            try:
+                server.serve_forever()
+            finally:
+                unlink(socket_path)
+    else:
+        for line in sys.stdin:
+            if line.strip():
+                print(respond(line), flush=True)
 
-    # if clustering requested, append clusters as sub-graphs of base graph
-    if clustering:
-        for parent, graph in graphs.items():
-            base.subgraph(graph)
 
-    # store graph in dot and pdf
-    base.render(
-        sep.join([out_dir, '{}.gv'.format(root_caller)]),
-        format='pdf',
-        view=False
-    )
+def _cpu_time():
+    # CPU time of the process and of its child processes that terminated
+    # (e.g. parsing workers and graph layouts)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
 
-    return nodes, ext_caller_callers
 
+def profile_stage(profile, stage, function, *args, **kwargs):
+    # call the function, adding its wall and CPU times to those of the
+    # given stage in the profile (if any)
+    if profile is None:
+        return function(*args, **kwargs)
 
-def generate_sources_file(root_caller, locations, nodes, sep_, out_dir):
-    # generate list of files required for compilation
-    list_files = []
-    for node in nodes:
-        if node in locations:
-            if locations[node] not in list_files:
-                list_files.append(locations[node])
-        elif node in _intrinsic_fortran:
-            pass
-        else:
-            # it is a variable
-            node_ = sep_.join(node.split(sep_)[:-1])
-            if node_ in locations:
-                if locations[node_] not in list_files:
-                    list_files.append(locations[node_])
-            elif node_ in _intrinsic_fortran:
-                pass
-            else:
-                raise KeyError(f"location for node '{node}' not found")
+    wall, cpu = time.perf_counter(), _cpu_time()
+    result = function(*args, **kwargs)
+    times = profile['stages'].setdefault(stage, {'wall': 0., 'cpu': 0.})
+    times['wall'] += time.perf_counter() - wall
+    times['cpu'] += _cpu_time() - cpu
 
-    # eliminate duplicates
-    list_files = list(set(list_files))
-
-    # store files into sub-groups
-    sub_groups = {p: [] for p in _priorities}
-
-    for file_ in list_files:
-        found = False
-        # find priority
-        for p in _priorities:
-            if f"{sep}{p}{sep}" in file_:
-                if not found:
-                    # deal with lower priority sharing same name as current
-                    if _priorities[p] and (f"{sep}{_priorities[p]}{sep}" in file_):
-                        sub_groups[_priorities[p]].append(file_)
-                    else:
-                        sub_groups[p].append(file_)
-                    found = True
+    return result
 
-        if not found:
-            raise RuntimeError(f"no priority found for {file_}")
 
-    # create a text file listing required source files by order of priority
-    with open(sep.join([out_dir, '{}.sources'.format(root_caller)]), 'w') as f:
-        for p in _priorities:
-            # arbitrary alphabetical sorting within same level of priority
-            list_files = sorted(sub_groups[p])
-            for file_ in list_files:
-                f.write(f"{file_}\n")
+def write_profile(profile, filename):
+    # complete the profile with the throughput of the parsing and with the
+    # peak resident set sizes (in bytes) and store it in JSON format
+    if 'parse' in profile['stages'] and profile['stages']['parse']['wall']:
+        elapsed = profile['stages']['parse']['wall']
+        profile['files per second'] = profile['files'] / elapsed
+        profile['lines per second'] = (
+            profile['matches']['physical lines'] / elapsed
+        )
 
+    # maximum resident set size is in kilobytes except on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    profile['peak rss'] = {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    }
 
-def generate_dependencies_file(root_caller, ext_caller_callees, locations,
-                               sep_, source_dir, build_dir, out_dir):
-    # gather dependencies per target
-    dependencies = {}
+    with open(filename, 'w') as f:
+        json.dump(profile, f, indent=2)
 
-    for caller, callees in ext_caller_callees.items():
-        parent = caller.split(sep_)[0]
-        try:
-            target = locations[parent]
-        except KeyError:
-            RuntimeError(f"{parent} has no location")
 
-        requirements = []
-        for callee in callees:
-            child = callee.split(sep_)[0]
-            if child != parent:
-                try:
-                    requirements.append(locations[child])
-                except KeyError:
-                    RuntimeError(f"{child} has no location")
+def _write_if_changed(filename, text):
+    # write file only if its content changes (so that its modification
+    # time, which make relies upon, is otherwise left untouched)
+    try:
+        with open(filename, 'r') as f:
+            if f.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(filename, 'w') as f:
+        f.write(text)
+    return True
 
-        requirements = list(set(requirements))
 
-        if requirements:
-            if target not in dependencies:
-                dependencies[target] = []
-            dependencies[target].extend(requirements)
+def _entries(result):
+    # names whose entries in the merged results a file contributes to
+    caller_callees, memberships, kinds, locations, _, _ = result
+    return set(caller_callees).union(memberships, kinds, locations)
 
-    # create a file containing object dependencies for makefile
-    with open(sep.join([out_dir, '{}.dependencies'.format(root_caller)]), 'w') as f:
-        for target, requirements in dependencies.items():
-            requirements = list(set(requirements))
 
-            requirements = ' \\\n'.join(requirements)
-            f.write(
-                f"{target}: \\\n{requirements}\n\n".replace(
-                    '.f90', '.o').replace(source_dir, build_dir)
+def _dependents(root_caller, nodes, caller_callees, memberships, uses, sep_):
+    # names whose entries in the merged results the call graph of the root
+    # caller was built from (i.e. its nodes and the modules they use without
+    # only, see add_module_uses, but also the callees and the members that
+    # may have been left out, e.g. as variables or ignored, and the modules
+    # used without only that are not in the source code yet)
+    names = {root_caller}
+    names.update(nodes)
+    for node in nodes:
+        names.update(caller_callees.get(node, ()))
+        names.update(
+            sep_.join([node, member]) for member in memberships.get(node, ())
+        )
+        names.update(uses.get(node, ()))
+    return names
+
+
+def watch(root_callers, source_dir, extensions, sep_, out_dir, build_dir,
+          ignore=None, clustering=False, without_variables=False,
+          batch=False, format_='pdf', render=True, poll=1.0, jobs=1,
+          exclude=None, dependencies_formats=('make',)):
+    # generate the sources and dependencies files and the call graphs of
+    # the root callers, then keep checking for modified files to parse
+    # them again and to regenerate the outputs of only the root callers
+    # whose call graphs may depend on them, with the files rewritten only
+    # if their content changes
+    results = {}
+    dependents = {}
+    # dot source of the parts of the call graphs built at once, kept from
+    # one check to the next
+    fragments = FragmentCache(sep_, clustering) if batch else None
+    error = None
+
+    while True:
+        try:
+            fortran_files = list(
+                walk_fortran_files(source_dir, extensions, exclude)
+            )
+            updated, changed = update_parse_results(
+                fortran_files, sep_, results, jobs
             )
 
+            names = set()
+            for fortran_file in changed:
+                for parsed in (results, updated):
+                    if fortran_file in parsed:
+                        names.update(_entries(parsed[fortran_file][1]))
+            affected = [
+                root_caller for root_caller in root_callers
+                if (root_caller not in dependents)
+                or not names.isdisjoint(dependents[root_caller])
+            ]
+
+            if affected:
+                caller_callees, memberships, kinds, locations, uses = (
+                    merge_parse_results(
+                        (updated[fortran_file][1]
+                         for fortran_file in fortran_files
+                         if fortran_file in updated), sep_=sep_
+                    )
+                )
+
+                if batch:
+                    graphs = build_call_graphs(
+                        affected, caller_callees, memberships, kinds,
+                        sep_, ignore, clustering, without_variables
+                    )
+                else:
+                    graphs = {
+                        root_caller: build_call_graph(
+                            root_caller, caller_callees, memberships, kinds,
+                            sep_, ignore, clustering, without_variables
+                        )
+                        for root_caller in affected
+                    }
+
+                to_render = {}
+                for root_caller in affected:
+                    graph, nodes, ext_caller_callees = graphs[root_caller]
+                    used_nodes, used_edges = add_module_uses(
+                        nodes, ext_caller_callees, uses, caller_callees,
+                        locations, sep_
+                    )
+                    dependents[root_caller] = _dependents(
+                        root_caller, used_nodes, caller_callees, memberships,
+                        uses, sep_
+                    )
+
+                    filename = sep.join([out_dir, root_caller])
+                    rewritten = []
+                    requirements = module_dependencies(
+                        used_edges, kinds, locations, sep_
+                    )
+                    sources = list_sources(locations, used_nodes, sep_,
+                                           requirements)
+                    if _write_if_changed('{}.sources'.format(filename),
+                                         format_sources(sources)):
+                        rewritten.append('sources')
+                    if _write_if_changed(
+                            '{}.levels'.format(filename),
+                            format_levels(
+                                compile_levels(sources, requirements)[0]
+                            )):
+                        rewritten.append('levels')
+                    dependencies = list_dependencies(used_edges, locations,
+                                                     sep_)
+                    if any([
+                            _write_if_changed(
+                                '{}.{}'.format(filename,
+                                               _dependencies_suffixes[deps_format]),
+                                format_dependencies(dependencies, source_dir,
+                                                    build_dir, deps_format)
+                            )
+                            for deps_format in dependencies_formats]):
+                        rewritten.append('dependencies')
+                    if render and fragments is not None:
+                        # i.e. as its dot source
+                        graph = fragments.source(root_caller, nodes,
+                                                 ext_caller_callees, kinds)
+                    if render and (
+                            _write_if_changed(
+                                '{}.gv'.format(filename),
+                                graph if isinstance(graph, str)
+                                else to_digraph(graph).source
+                            )
+                            or (format_ and not exists(
+                                '{}.gv.{}'.format(filename, format_)))):
+                        rewritten.append('gv')
+                        to_render[root_caller] = graph
+
+                    if rewritten:
+                        print(f"{root_caller}: {', '.join(rewritten)} updated",
+                              flush=True)
+
+                # store call graphs (with their layouts running concurrently)
+                render_call_graphs(to_render, out_dir, format_, jobs)
+
+            # only now that all outputs are up to date (otherwise the same
+            # modified files are considered again at the next check)
+            results = updated
+            error = None
+
+        except KeyboardInterrupt:
+            return
+        except Exception as e:
+            # e.g. file caught while being written, try again later (but
+            # only report the error again if it changes)
+            if str(e) != error:
+                error = str(e)
+                print(f"callgrapher: {e}", file=sys.stderr)
+
+        try:
+            time.sleep(poll)
+        except KeyboardInterrupt:
+            return
+
 
 if __name__ == '__main__':
+    import argparse
+
     # terminal interface
     parser = argparse.ArgumentParser(
         description="generate call graphs from preprocessed Fortran source code"
@@ -601,7 +3639,7 @@ if __name__ == '__main__':
 
     parser.add_argument('root_callers',
                         type=str,
-                        nargs='+',
+                        nargs='*',
                         help="name(s) of the caller(s) in the algorithm "
                              "to use as root to call graph (use double "
                              "underscore to separate module and "
@@ -621,9 +3659,23 @@ if __name__ == '__main__':
                         default=None)
     parser.add_argument('-e', '--extension',
                         type=str,
-                        help="file extension for the source code (case-sensitive) "
-                             "- default to f90",
-                        default='f90')
+                        nargs='+',
+                        help="file extension(s) for the source code "
+                             "(case-sensitive, only free-form source code "
+                             "being parsed, e.g. not .f files) - default to "
+                             "f90",
+                        default=['f90'])
+    parser.add_argument('--exclude',
+                        type=str,
+                        nargs='+',
+                        help="pattern(s) of files and directories to skip "
+                             "when searching the source directory (matching "
+                             "names, or paths relative to the source "
+                             "directory if containing a '/'), in addition to "
+                             "those listed in any .callgraphignore file found "
+                             "on the way (one pattern per line, relative to "
+                             "the directory the file is in)",
+                        default=None)
     parser.add_argument('-o', '--output_dir',
                         type=str,
                         help="path to directory where to save dot and "
@@ -646,46 +3698,544 @@ if __name__ == '__main__':
                         dest='without_variables',
                         action='store_true',
                         help="option to not display the variables")
-    parser.set_defaults(cluster=False, without_variables=False)
+    parser.add_argument('--max_depth',
+                        type=int,
+                        help="number of call levels from the root caller "
+                             "(at least 0) at which to stop exploring the "
+                             "call graph (outlining the nodes whose callees "
+                             "or members are left out, and only writing the "
+                             "call graphs) - default to no limit",
+                        default=None)
+    parser.add_argument('--max_nodes',
+                        type=int,
+                        help="number of nodes (at least 1) at which to stop "
+                             "exploring the call graph (outlining the nodes "
+                             "whose callees or members are left out, and only "
+                             "writing the call graphs), the root caller and "
+                             "its module always being nodes - default to no "
+                             "limit",
+                        default=None)
+    parser.add_argument('--no_siblings',
+                        dest='no_siblings',
+                        action='store_true',
+                        help="option to not add all the members of a module "
+                             "when reaching one of them (outlining the "
+                             "modules whose members are left out, and only "
+                             "writing the call graphs)")
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        help="number of processes to use to parse the "
+                             "Fortran files and to lay out the call graphs "
+                             "(0 to use all available cores) - default to 1",
+                        default=1)
+    parser.add_argument('-k', '--cache',
+                        type=str,
+                        nargs='?',
+                        const='',
+                        help="path to file where to keep the results of the "
+                             "parsing of each Fortran file so that only new "
+                             "or modified files are parsed in subsequent "
+                             "runs (and the dot source of the parts of the "
+                             "call graphs if using --batch) - default to "
+                             "callgrapher.cache in output directory if option "
+                             "given without a path",
+                        default=None)
+    parser.add_argument('-a', '--batch',
+                        dest='batch',
+                        action='store_true',
+                        help="find what is reachable from all root callers "
+                             "in one shared traversal, and assemble the call "
+                             "graphs from the dot source of their parts (i.e. "
+                             "of each module) formatted once (same call graphs "
+                             "but nodes and edges not necessarily listed in "
+                             "the same order)")
+    parser.add_argument('-m', '--compact',
+                        dest='compact',
+                        action='store_true',
+                        help="option to build the call graphs from a compact "
+                             "representation of the parsed source code using "
+                             "less memory (same call graphs but nodes and "
+                             "edges not necessarily listed in the same order)")
+    parser.add_argument('-f', '--format',
+                        type=str,
+                        help="output format for the layout of the call graphs "
+                             "(use gv to only write their dot source) - "
+                             "default to pdf",
+                        default='pdf')
+    parser.add_argument('-n', '--no_render',
+                        dest='no_render',
+                        action='store_true',
+                        help="option to not store the call graphs at all "
+                             "(i.e. only write the sources and dependencies "
+                             "files)")
+    parser.add_argument('--dependencies_format',
+                        type=str,
+                        nargs='+',
+                        choices=list(_dependencies_suffixes),
+                        help="format(s) of the files of object dependencies "
+                             "(make for .dependencies makefile rules, json for "
+                             ".dependencies.json, ninja for .ninja build "
+                             "statements of a 'fortran' rule, cmake for .cmake "
+                             "source properties) - default to make",
+                        default=['make'])
+    parser.add_argument('-u', '--callers_of',
+                        type=str,
+                        nargs='+',
+                        help="name(s) of the callee(s) in the algorithm to "
+                             "find all callers of (use double underscore to "
+                             "separate module and subroutine/function), "
+                             "printing the callers, the root callers "
+                             "affected (those given, otherwise all programs "
+                             "and uncalled subroutines/functions), and the "
+                             "files affected, instead of generating call "
+                             "graphs")
+    parser.add_argument('--json',
+                        dest='json',
+                        action='store_true',
+                        help="option to print the callers (or the "
+                             "differences) in JSON format")
+    parser.add_argument('-d', '--diff',
+                        type=str,
+                        help="path to directory containing (or to snapshot "
+                             "stored using --export_graph of) an earlier "
+                             "version of the Fortran files to compare with, "
+                             "printing the symbols, calls, and file "
+                             "dependencies added and removed in the call "
+                             "graphs of the root callers (or in the whole "
+                             "source code if none are given), and storing "
+                             "these call graphs (or the calls added and "
+                             "removed) with the changes highlighted as "
+                             "<root>.diff.gv (or diff.gv), instead of "
+                             "generating call graphs",
+                        default=None)
+    parser.add_argument('--metrics',
+                        type=str,
+                        help="path to file where to store, for each entity "
+                             "of the whole source code, the number of "
+                             "entities calling it and called by it, the "
+                             "numbers of entities it depends on and "
+                             "depending on it, the size of the cycle it is "
+                             "in, whether it is reached from any program, "
+                             "and for programs and modules the number of "
+                             "others using them (in JSON format, with the "
+                             "most depended-on modules, the subroutines/"
+                             "functions not reached from any program, and "
+                             "the cycles, if the path ends with .json, in "
+                             "CSV format otherwise), printing a summary, "
+                             "instead of generating call graphs (requires "
+                             "numpy and scipy)",
+                        default=None)
+    parser.add_argument('--serve',
+                        type=str,
+                        nargs='?',
+                        const='-',
+                        help="path to Unix socket where to answer queries "
+                             "(JSON objects, one per line) on the parsed "
+                             "source code, parsing again only the files "
+                             "modified in the meantime, instead of "
+                             "generating call graphs - default to standard "
+                             "input and output if option given without a "
+                             "path",
+                        default=None)
+    parser.add_argument('-w', '--watch',
+                        dest='watch',
+                        action='store_true',
+                        help="option to keep checking for modified files "
+                             "after generating the outputs, to parse them "
+                             "again and to regenerate the outputs of the "
+                             "root callers whose call graphs may depend on "
+                             "them (files rewritten only if their content "
+                             "changes)")
+    parser.add_argument('--poll',
+                        type=float,
+                        help="interval in seconds between checks for "
+                             "modified files when serving queries or "
+                             "watching - default to 1",
+                        default=1.)
+    parser.add_argument('-x', '--export_graph',
+                        type=str,
+                        help="path to file where to store the results of the "
+                             "parsing (with the line numbers of the "
+                             "definitions) to be loaded in subsequent runs "
+                             "instead of parsing (compressed if the path "
+                             "ends with .gz)",
+                        default=None)
+    parser.add_argument('-l', '--load_graph',
+                        type=str,
+                        help="path to file where the results of a previous "
+                             "parsing were stored (using --export_graph) to "
+                             "be loaded instead of parsing the source code",
+                        default=None)
+    parser.add_argument('-p', '--profile',
+                        type=str,
+                        nargs='?',
+                        const='',
+                        help="path to file where to store a report (in JSON "
+                             "format) with the wall and CPU times of each "
+                             "stage, the number of files and lines parsed per "
+                             "second, the number of matches for each category "
+                             "of statement, the number of nodes and edges of "
+                             "each call graph, and the peak memory used - "
+                             "default to callgrapher.profile.json in output "
+                             "directory if option given without a path",
+                        default=None)
+    parser.add_argument('--pstats',
+                        type=str,
+                        help="path to file where to store the statistics of "
+                             "the profiling of the parsing (with cProfile, "
+                             "for the main process only, i.e. not the parsing "
+                             "workers if several jobs are used)",
+                        default=None)
+    parser.set_defaults(cluster=False, without_variables=False, batch=False,
+                        no_render=False, json=False, watch=False,
+                        compact=False, no_siblings=False)
 
     # collect parameters
     args = parser.parse_args()
 
+    if not (args.root_callers or args.callers_of or args.serve or args.diff
+            or args.metrics):
+        parser.error("root_callers required unless using --callers_of, "
+                     "--diff, --metrics, or --serve")
+    if args.batch and args.compact:
+        parser.error("--batch and --compact cannot be used together")
+    _truncating = (args.max_depth is not None or args.max_nodes is not None
+                   or args.no_siblings)
+    if _truncating and (args.batch or args.compact or args.watch
+                        or args.no_render):
+        parser.error("--max_depth, --max_nodes, and --no_siblings cannot be "
+                     "used with --batch, --compact, --watch, or --no_render")
+    if (args.max_depth is not None) and (args.max_depth < 0):
+        parser.error("--max_depth must be at least 0")
+    if (args.max_nodes is not None) and (args.max_nodes < 1):
+        parser.error("--max_nodes must be at least 1")
+
     _root_callers = args.root_callers
     _source_dir = args.source_dir
     _build_dir = args.build_dir if args.build_dir else _source_dir
     _output_dir = args.output_dir
-    _extension = args.extension
+    _extensions = args.extension
+    _fixed_form = [extension for extension in _extensions
+                   if extension.lower() in _fixed_form_extensions]
+    if _fixed_form:
+        print(f"callgrapher: skipping files with extension(s) "
+              f"{', '.join(_fixed_form)} (fixed-form source code cannot be "
+              f"parsed)", file=sys.stderr)
+    _exclude = args.exclude
     _ignore = args.ignore
     _clustering = args.cluster
     _without_variables = args.without_variables
+    _max_depth = args.max_depth
+    _max_nodes = args.max_nodes
+    _siblings = not args.no_siblings
+    _jobs = args.jobs
+    _batch = args.batch
+    _compact = args.compact
+    _format = None if args.format == 'gv' else args.format
+    _no_render = args.no_render
+    _dependencies_formats = args.dependencies_format
+    _callers_of = args.callers_of
+    _json = args.json
+    _diff = args.diff
+    _metrics = args.metrics
+    _serve = args.serve
+    _watch = args.watch
+    _poll = args.poll
+    _cache = args.cache
+    if _cache == '':
+        _cache = sep.join([_output_dir, 'callgrapher.cache'])
+    _profile_file = args.profile
+    if _profile_file == '':
+        _profile_file = sep.join([_output_dir, 'callgrapher.profile.json'])
+    _profile = None if _profile_file is None else {
+        'jobs': _jobs, 'cache': _cache, 'stages': {}, 'roots': {}
+    }
+    _pstats = args.pstats
+    _export_graph = args.export_graph
+    _load_graph = args.load_graph
 
-    # gather all Fortran files found in source directory and its sub-directories
     _sep = '__'
-    _fortran_files = glob(
-        sep.join([_source_dir, '/**/*.{}'.format(_extension)]),
-        recursive=True
-    )
 
-    # parse all source code
-    _caller_callees, _memberships, _kinds, _locations = parse_fortran_files(
-        _fortran_files, _sep
-    )
+    # answer queries instead of generating call graphs
+    if _serve:
+        serve(_source_dir, _extensions, _sep,
+              None if _serve == '-' else _serve, _poll, _jobs, _exclude)
+        raise SystemExit
 
-    # for each root caller
-    for _root_caller in _root_callers:
-        # generate a call graph
-        _nodes, _ext_caller_callees = generate_dot_and_pdf(
-            _root_caller, _caller_callees, _memberships, _kinds,
-            _sep, _output_dir, _ignore, _clustering, _without_variables
+    # create the output directory (as rendering used to) before anything is
+    # written in it, since the outputs are not necessarily rendered first
+    makedirs(_output_dir, exist_ok=True)
+
+    # keep regenerating the outputs as the source code is modified
+    if _watch and _root_callers:
+        watch(_root_callers, _source_dir, _extensions, _sep, _output_dir,
+              _build_dir, _ignore, _clustering, _without_variables, _batch,
+              _format, not _no_render, _poll, _jobs, _exclude,
+              _dependencies_formats)
+        raise SystemExit
+
+    if _load_graph:
+        # load results of a previous parsing instead of parsing
+        (_caller_callees, _memberships, _kinds, _locations, _uses,
+         _lines) = profile_stage(
+            _profile, 'load', load_graph, _load_graph, _sep
+        )
+    else:
+        # find all Fortran files in source directory and its sub-directories
+        # (to parse them as they are found, unless the time spent finding
+        # them is profiled)
+        _fortran_files = []
+        _found = _recording(
+            walk_fortran_files(_source_dir, _extensions, _exclude),
+            _fortran_files
+        )
+        if _profile is not None:
+            _found = profile_stage(_profile, 'walk', list, _found)
+
+        # parse all source code (with the parsing profiled if requested)
+        _profiler = None
+        if _pstats:
+            import cProfile
+
+            _profiler = cProfile.Profile()
+        if _profiler:
+            _profiler.enable()
+        (_caller_callees, _memberships, _kinds, _locations, _uses, _lines,
+         *_counts) = profile_stage(
+            _profile, 'parse', parse_fortran_files,
+            _found, _sep, _jobs, _cache, True, _source_dir,
+            _profile is not None
+        )
+        if _profiler:
+            _profiler.disable()
+            _profiler.dump_stats(_pstats)
+
+        if _profile is not None:
+            _profile['files'] = len(_fortran_files)
+            _profile['matches'] = _counts[0]
+
+    # store results of the parsing for subsequent runs (if requested)
+    if _export_graph:
+        profile_stage(
+            _profile, 'export', export_graph,
+            _export_graph, _caller_callees, _memberships, _kinds, _locations,
+            _uses, _lines, _sep
+        )
+    del _lines
+
+    # find callers of given callees instead of generating call graphs
+    if _callers_of:
+        _reverse_index = profile_stage(
+            _profile, 'reverse index', build_reverse_index,
+            _caller_callees, _memberships, _kinds, _sep
+        )
+        _callers = profile_stage(
+            _profile, 'callers', find_callers,
+            _callers_of, _caller_callees, _memberships, _kinds, _sep,
+            _ignore, _without_variables, _reverse_index
+        )
+        print(
+            format_impact_report(
+                impact_report(_callers_of, _callers, _kinds, _locations,
+                              _sep, _root_callers, _reverse_index),
+                _json
+            )
+        )
+        if _profile is not None:
+            write_profile(_profile, _profile_file)
+        raise SystemExit
+
+    # measure the whole source code instead of generating call graphs
+    if _metrics:
+        _model = profile_stage(
+            _profile, 'compact', compact_parse_results,
+            _caller_callees, _memberships, _kinds, _locations, _sep, _uses
+        )
+        _measures = profile_stage(
+            _profile, 'metrics', call_graph_metrics,
+            _model, _ignore, _without_variables
+        )
+        write_metrics(_measures, _metrics)
+        print(format_metrics(_measures))
+        if _profile is not None:
+            write_profile(_profile, _profile_file)
+        raise SystemExit
+
+    # compare with an earlier version instead of generating call graphs
+    if _diff:
+        if isfile(_diff):
+            _previous = profile_stage(
+                _profile, 'load previous', load_graph, _diff, _sep
+            )[:5]
+        else:
+            _previous = profile_stage(
+                _profile, 'parse previous', parse_fortran_files,
+                walk_fortran_files(_diff, _extensions, _exclude),
+                _sep, _jobs, _cache, False, _diff
+            )
+        _old = (*_previous[:3], relative_locations(
+            _previous[3], None if isfile(_diff) else _diff
+        ), _previous[4])
+        _new = (_caller_callees, _memberships, _kinds,
+                relative_locations(_locations,
+                                   None if _load_graph else _source_dir),
+                _uses)
+
+        _reports = {}
+        _graphs = {}
+        for _root_caller in (_root_callers or [None]):
+            _report, _graph = profile_stage(
+                _profile, 'diff', diff_call_graphs,
+                _root_caller, _old, _new, _sep, _ignore, _without_variables
+            )
+            _name = 'diff' if _root_caller is None else f"{_root_caller}.diff"
+            _reports['*' if _root_caller is None else _root_caller] = _report
+            _graphs[_name] = _graph
+        print(format_diff_report(_reports, _json))
+
+        if not _no_render:
+            profile_stage(
+                _profile, 'render', render_call_graphs,
+                _graphs, _output_dir, _format, _jobs
+            )
+        if _profile is not None:
+            write_profile(_profile, _profile_file)
+        raise SystemExit
+
+    # replace the results of the parsing by their compact representation
+    if _compact:
+        _model = profile_stage(
+            _profile, 'compact', compact_parse_results,
+            _caller_callees, _memberships, _kinds, _locations, _sep, _uses
         )
+        del _caller_callees, _memberships, _kinds, _locations, _uses
 
-        # create sources and dependencies files
-        generate_sources_file(
-            _root_caller, _locations, _nodes, _sep, _output_dir
+    # build call graphs (for all root callers at once if requested)
+    if _compact:
+        _results = {
+            _root_caller: profile_stage(
+                _profile, 'graph', build_call_graph_compact,
+                _root_caller, _model, _ignore, _clustering, _without_variables
+            )
+            for _root_caller in _root_callers
+        }
+    elif _batch:
+        _results = profile_stage(
+            _profile, 'graph', build_call_graphs,
+            _root_callers, _caller_callees, _memberships, _kinds,
+            _sep, _ignore, _clustering, _without_variables
         )
+    else:
+        _results = {
+            _root_caller: profile_stage(
+                _profile, 'graph', build_call_graph,
+                _root_caller, _caller_callees, _memberships, _kinds,
+                _sep, _ignore, _clustering, _without_variables,
+                _max_depth, _max_nodes, _siblings
+            )
+            for _root_caller in _root_callers
+        }
+
+    # for each root caller
+    for _root_caller in _root_callers:
+        _graph, _nodes, _ext_caller_callees = _results[_root_caller]
+
+        if _truncating:
+            # the sources and dependencies of a partial call graph would
+            # not be those required, so only report on the exploration
+            print(f"{_root_caller}: {len(_nodes)} nodes "
+                  f"({len(_graph.get('truncated', []))} truncated)")
+        else:
+            # create sources (in compilation order), compilation levels, and
+            # dependencies files (with the modules used without only)
+            if _compact:
+                _used_nodes, _used_edges = add_module_uses_compact(
+                    _model, _nodes, _ext_caller_callees
+                )
+                _requirements = module_dependencies_compact(_model, _used_edges)
+                _sources = profile_stage(
+                    _profile, 'sources', list_sources_compact,
+                    _model, _used_nodes, _requirements
+                )
+                _dependencies = profile_stage(
+                    _profile, 'dependencies', list_dependencies_compact,
+                    _model, _used_edges
+                )
+            else:
+                _used_nodes, _used_edges = add_module_uses(
+                    _nodes, _ext_caller_callees, _uses, _caller_callees,
+                    _locations, _sep
+                )
+                _requirements = module_dependencies(
+                    _used_edges, _kinds, _locations, _sep
+                )
+                _sources = profile_stage(
+                    _profile, 'sources', list_sources,
+                    _locations, _used_nodes, _sep, _requirements
+                )
+                _dependencies = profile_stage(
+                    _profile, 'dependencies', list_dependencies,
+                    _used_edges, _locations, _sep
+                )
+            _levels, _cycles = profile_stage(
+                _profile, 'levels', compile_levels, _sources, _requirements
+            )
+
+            _filename = sep.join([_output_dir, _root_caller])
+            with open('{}.sources'.format(_filename), 'w',
+                      buffering=_buffer_size) as f:
+                write_sources(f, _sources)
+            with open('{}.levels'.format(_filename), 'w') as f:
+                f.write(format_levels(_levels))
+            for _deps_format in _dependencies_formats:
+                with open('{}.{}'.format(_filename,
+                                         _dependencies_suffixes[_deps_format]),
+                          'w', buffering=_buffer_size) as f:
+                    write_dependencies(f, _dependencies, _source_dir,
+                                       _build_dir, _deps_format)
+
+            # report on the compilation (with the critical path being the
+            # longest chain of files requiring one another, i.e. one per level)
+            print(f"{_root_caller}: {len(_sources)} files in {len(_levels)} "
+                  f"levels (critical path of {len(_levels)} files)")
+            for _cycle in _cycles:
+                print(f"{_root_caller}: cycle between {', '.join(_cycle)}",
+                      file=sys.stderr)
+
+        if _profile is not None:
+            _profile['roots'][_root_caller] = {
+                'nodes': len(_nodes),
+                'edges': sum(
+                    statement[0] == 'edge'
+                    for statements in [_graph['base'], *_graph['clusters'].values()]
+                    for statement in statements
+                )
+            }
 
-        generate_dependencies_file(
-            _root_caller, _ext_caller_callees, _locations, _sep,
-            _source_dir, _build_dir, _output_dir
+    # store call graphs (with their layouts running concurrently), those
+    # built at once being assembled from the dot source of their parts
+    if not _no_render:
+        if _batch:
+            _fragments = FragmentCache(_sep, _clustering, cache_file=_cache)
+            _graphs = {
+                _root_caller: profile_stage(
+                    _profile, 'dot', _fragments.source, _root_caller,
+                    _results[_root_caller][1], _results[_root_caller][2],
+                    _kinds
+                )
+                for _root_caller in _root_callers
+            }
+            _fragments.close()
+            if _profile is not None:
+                _profile['fragments'] = {'hits': _fragments.hits,
+                                         'misses': _fragments.misses}
+        else:
+            _graphs = {_root_caller: _results[_root_caller][0]
+                       for _root_caller in _root_callers}
+        profile_stage(
+            _profile, 'render', render_call_graphs,
+            _graphs, _output_dir, _format, _jobs
         )
+
+    if _profile is not None:
+        write_profile(_profile, _profile_file)